@@ -0,0 +1,123 @@
+# src/benchmarks/backends.py
+"""
+Benchmark of the solver backends (see opt_model/backends.py) on growing horizons.
+
+Every case runs in a fresh process so that the peak resident memory of one backend does not leak
+into the next. The sample day of a question is repeated to get longer horizons.
+
+Run from src/:
+    python -m benchmarks.backends --days 1 7 30 --modes min_energy battery
+"""
+import argparse
+import json
+import multiprocessing as mp
+import resource
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+DATA_DIR = Path(__file__).resolve().parent.parent.parent / "data"
+QUESTION_OF_MODE = {"min_energy": "question_1a", "cost_only": "question_1b", "epsilon": "question_1b",
+                    "battery": "question_1c"}
+
+
+def repeat_days(params, days):
+    """Overrides that repeat the daily price/PV/reference series `days` times."""
+    overrides = {
+        "energy_price_DKK_per_kWh": np.tile(params["energy_price_DKK_per_kWh"], days),
+        "pv_max": np.tile(params["pv_max"], days),
+    }
+    if params.get("p_ref") is not None:
+        overrides["p_ref"] = np.tile(params["p_ref"], days)
+    if params.get("energy_min") is not None:
+        overrides["energy_min"] = params["energy_min"] * days
+    return overrides
+
+
+def _run_case(backend, mode, days, epsilon, discomfort_formulation):
+    from data_ops import DataLoader
+    from opt_model import OptModel
+    from opt_model.matrix_builder import assemble_lp
+    from opt_model.backends import get_backend
+
+    df_data = DataLoader(input_path=str(DATA_DIR), question_name=QUESTION_OF_MODE[mode]).load_dataset_as_df()
+    model = OptModel(df_data, solver_params={"OutputFlag": 0} if backend == "gurobi" else None)
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    params = model.get_parameters()
+    params.update(repeat_days(params, days))
+    eps = None if epsilon is None else epsilon * days
+    lp = assemble_lp(params, mode, eps, discomfort_formulation=discomfort_formulation)
+    assemble_s = time.perf_counter() - t0
+
+    res = get_backend(backend).solve(lp, p_ref=params["p_ref"], solver_params=model.solver_params)
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "backend": backend,
+        "mode": mode,
+        "days": days,
+        "hours": lp.n_hours,
+        "n_vars": lp.n_vars,
+        "n_rows": int(sum(len(b.rhs) for b in lp.blocks)),
+        "assemble_s": assemble_s,
+        "build_s": res["timings"]["build_s"] if res else None,
+        "solve_s": res["timings"]["solve_s"] if res else None,
+        "extract_s": res["timings"]["extract_s"] if res else None,
+        "obj": res["obj"] if res else None,
+        "python_peak_mb": py_peak / 2 ** 20,
+        # ru_maxrss is in kB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def _run_case_safe(args):
+    try:
+        return _run_case(*args)
+    except Exception as exc:
+        backend, mode, days = args[:3]
+        return {"backend": backend, "mode": mode, "days": days, "error": f"{type(exc).__name__}: {exc}"}
+
+
+def benchmark_backends(backends=("gurobi", "highs"), modes=("min_energy", "battery"), days=(1, 7, 30),
+                       epsilon=3.0, discomfort_formulation="l1"):
+    """Run every (backend, mode, days) case in its own process and return the result rows."""
+    cases = [(b, m, d, epsilon if m in ("epsilon", "battery") else None, discomfort_formulation)
+             for m in modes for d in days for b in backends]
+    ctx = mp.get_context("spawn")
+    rows = []
+    for case in cases:
+        with ctx.Pool(1) as pool:
+            rows.append(pool.apply(_run_case_safe, (case,)))
+    return rows
+
+
+def print_benchmark(rows):
+    print("\n-------------------------------------------------------------------------------------------------")
+    print(" backend |       mode | hours |   vars | assemble ms |  build ms |  solve ms |       objective | peak RSS MB")
+    print("-------------------------------------------------------------------------------------------------")
+    for r in rows:
+        if "error" in r:
+            print(f" {r['backend']:>7} | {r['mode']:>10} | {r['days'] * 24:5d} | {r['error']}")
+            continue
+        print(f" {r['backend']:>7} | {r['mode']:>10} | {r['hours']:5d} | {r['n_vars']:6d} | {1e3 * r['assemble_s']:11.2f} |"
+              f" {1e3 * r['build_s']:9.2f} | {1e3 * r['solve_s']:9.2f} | {r['obj']:15.4f} | {r['peak_rss_mb']:11.1f}")
+    print("-------------------------------------------------------------------------------------------------")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["gurobi", "highs"])
+    parser.add_argument("--modes", nargs="+", default=["min_energy", "battery"])
+    parser.add_argument("--days", nargs="+", type=int, default=[1, 7, 30])
+    parser.add_argument("--output", help="Write the rows as JSON to this file")
+    args = parser.parse_args()
+
+    rows = benchmark_backends(args.backends, args.modes, args.days)
+    print_benchmark(rows)
+    if args.output:
+        Path(args.output).write_text(json.dumps(rows, indent=2))
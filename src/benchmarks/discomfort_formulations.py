@@ -0,0 +1,81 @@
+# src/benchmarks/discomfort_formulations.py
+"""
+Benchmark of the discomfort formulations of the Q1.b epsilon-constraint model.
+
+Run from src/:
+    python -m benchmarks.discomfort_formulations
+"""
+import time
+from pathlib import Path
+
+import numpy as np
+
+from data_ops import DataLoader
+from opt_model import OptModel
+from opt_model.matrix_builder import DISCOMFORT_FORMULATIONS
+
+
+def benchmark_discomfort_formulations(df_data, epsilons=None, repeats=3, formulations=DISCOMFORT_FORMULATIONS):
+    """
+    Build and solve the epsilon model for every formulation and epsilon, `repeats` times each,
+    and compare solve time and objective against the original NonConvex=2 formulation.
+
+    Returns a list of rows (dicts) with the median build and solve time, the objective, the achieved
+    squared discomfort and the objective gap to the "nonconvex" formulation.
+    """
+    if epsilons is None:
+        # Spread over the frontier of the sample data (epsilon_max is about 55 kW^2/day)
+        epsilons = [2.0, 10.0, 25.0, 50.0]
+
+    rows = []
+    for epsilon in epsilons:
+        reference = None
+        for formulation in formulations:
+            build_times, solve_times = [], []
+            res = None
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                model = OptModel(df_data, solver_params={"OutputFlag": 0})
+                model.build_parametric(mode="epsilon", epsilon_discomfort=epsilon,
+                                       discomfort_formulation=formulation)
+                t1 = time.perf_counter()
+                res = model.solve_parametric()
+                t2 = time.perf_counter()
+                build_times.append(t1 - t0)
+                solve_times.append(t2 - t1)
+
+            p_ref = np.asarray(model.params["p_ref"], dtype=float)
+            row = {
+                "formulation": formulation,
+                "epsilon": float(epsilon),
+                "build_s": float(np.median(build_times)),
+                "solve_s": float(np.median(solve_times)),
+                "obj": res["obj"] if res else None,
+                # Squared deviation for every formulation, so l1/pwl are comparable
+                "squared_discomfort": float(np.sum((np.asarray(res["p_load"]) - p_ref) ** 2)) if res else None,
+            }
+            if formulation == "nonconvex":
+                reference = row
+            if reference is not None and reference["obj"] is not None and row["obj"] is not None:
+                row["obj_gap"] = row["obj"] - reference["obj"]
+                row["speedup"] = reference["solve_s"] / row["solve_s"] if row["solve_s"] > 0 else None
+            rows.append(row)
+    return rows
+
+
+def print_benchmark(rows):
+    print("\n------------------------------------------------------------------------------------------")
+    print(" formulation | epsilon |  build (ms) |  solve (ms) | speedup |    objective |  obj gap | sq. discomfort")
+    print("------------------------------------------------------------------------------------------")
+    for r in rows:
+        speedup = f"{r['speedup']:7.2f}" if r.get("speedup") else "      -"
+        gap = f"{r['obj_gap']:8.4f}" if "obj_gap" in r else "       -"
+        print(f" {r['formulation']:>11} | {r['epsilon']:7.2f} | {1e3 * r['build_s']:11.2f} | {1e3 * r['solve_s']:11.2f} |"
+              f" {speedup} | {r['obj']:12.4f} | {gap} | {r['squared_discomfort']:10.4f}")
+    print("------------------------------------------------------------------------------------------")
+
+
+if __name__ == "__main__":
+    data_dir = Path(__file__).resolve().parent.parent.parent / "data"
+    df_data = DataLoader(input_path=str(data_dir), question_name="question_1b").load_dataset_as_df()
+    print_benchmark(benchmark_discomfort_formulations(df_data))
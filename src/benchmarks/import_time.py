@@ -0,0 +1,111 @@
+# src/benchmarks/import_time.py
+"""
+Import-time budget check.
+
+Every module in IMPORT_BUDGETS is imported in a fresh interpreter (python -X importtime), repeat times.
+The median cumulative import time has to stay below the budget and none of the listed heavy modules may
+be loaded on the way. The exit code is 1 when a module breaks its budget, so the check can run in CI next
+to the benchmark suite:
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeat 9 --scale 2.0 --output import_times.json
+
+--scale multiplies all budgets, for slower machines. The budgets have about 3x headroom over a warm
+file-system cache on a development machine.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+
+# Module: (budget in seconds, modules that must not be imported with it)
+IMPORT_BUDGETS = {
+    "instrumentation": (0.05, ("numpy", "pandas", "gurobipy", "matplotlib")),
+    "data_ops": (0.05, ("pandas", "matplotlib", "xarray", "yaml", "gurobipy")),
+    "utils": (0.05, ("pandas", "matplotlib", "gurobipy")),
+    "opt_model": (0.05, ("gurobipy", "scipy", "pandas", "matplotlib")),
+    "data_ops.data_loader": (0.3, ("pandas", "matplotlib", "xarray", "yaml", "gurobipy")),
+    "runner": (0.6, ("pandas", "matplotlib", "xarray", "yaml")),
+    "main": (1.2, ("matplotlib", "xarray", "yaml")),
+}
+
+
+def measure(module, forbidden=()):
+    """(seconds, forbidden modules that were loaded) of importing module in a fresh interpreter."""
+    code = f"import json, sys; import {module}; print(json.dumps(sorted(sys.modules)))"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=SRC_DIR,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+    loaded = set(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    # Lines look like "import time:  self [us] | cumulative | name", the top-level entry has no indent
+    cumulative = None
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].rstrip() == f" {module}":
+            cumulative = int(parts[1].strip()) / 1e6
+    if cumulative is None:
+        raise RuntimeError(f"No import time found for {module}")
+    return cumulative, sorted(m for m in forbidden if m in loaded)
+
+
+def check(budgets=None, repeat=5, scale=1.0):
+    """One row per module with the median import time, the budget and the violations."""
+    rows = []
+    for module, (budget, forbidden) in (budgets or IMPORT_BUDGETS).items():
+        times, heavy = [], []
+        for _ in range(repeat):
+            seconds, heavy = measure(module, forbidden)
+            times.append(seconds)
+        median = statistics.median(times)
+        rows.append({
+            "module": module,
+            "median_s": median,
+            "min_s": min(times),
+            "budget_s": budget * scale,
+            "forbidden_loaded": heavy,
+            "ok": median <= budget * scale and not heavy,
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply all budgets")
+    parser.add_argument("--modules", nargs="+", help="Only check these modules")
+    parser.add_argument("--output", help="Write the rows as JSON")
+    args = parser.parse_args(argv)
+
+    budgets = IMPORT_BUDGETS
+    if args.modules:
+        unknown = set(args.modules) - set(IMPORT_BUDGETS)
+        if unknown:
+            parser.error(f"No budget for {sorted(unknown)}")
+        budgets = {m: IMPORT_BUDGETS[m] for m in args.modules}
+
+    rows = check(budgets, repeat=args.repeat, scale=args.scale)
+    print(f"{'module':<24} {'median [ms]':>12} {'budget [ms]':>12}  status")
+    for row in rows:
+        status = "ok" if row["ok"] else "FAIL"
+        if row["forbidden_loaded"]:
+            status += f" (loads {', '.join(row['forbidden_loaded'])})"
+        print(f"{row['module']:<24} {1e3 * row['median_s']:12.1f} {1e3 * row['budget_s']:12.1f}  {status}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+    failed = [row["module"] for row in rows if not row["ok"]]
+    if failed:
+        print(f"\nImport-time budget exceeded: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
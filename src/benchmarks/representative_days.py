@@ -0,0 +1,72 @@
+# src/benchmarks/representative_days.py
+"""
+Error report of the representative-day annual estimate (utils.RepresentativeDays).
+
+A synthetic year is built from the sample data (utils.sample_year), every day is solved as the reference
+and the estimate from k representative days is compared against it.
+
+Run from src/:
+    python -m benchmarks.representative_days
+    python -m benchmarks.representative_days --question question_1b --mode epsilon --epsilon 2 --k 4 7 12 --n-check 8
+"""
+import argparse
+import json
+from pathlib import Path
+
+from data_ops import DataLoader
+from opt_model import open_env, close_env
+from utils import RepresentativeDays, sample_year
+from instrumentation import set_quiet
+
+
+def print_report(rows, full):
+    print(f"\nFull year: {full['n_solves']} solves, {1e3 * full['solve_time_s']:.1f} ms, "
+          f"cost {full['annual_cost']:.2f} DKK, discomfort {full['annual_discomfort']:.4f}")
+    print("----------------------------------------------------------------------------------------------")
+    print("   k | solves | solve ratio | speedup |   est. cost | cost err | corrected err |  stderr | disc. err")
+    print("----------------------------------------------------------------------------------------------")
+    for r in rows:
+        corrected = f"{100 * r['corrected_cost_error']:12.2f}%" if "corrected_cost_error" in r else "            -"
+        stderr = f"{100 * r['cost_stderr']:6.2f}%" if "cost_stderr" in r else "      -"
+        print(f" {r['k']:3d} | {r['n_solves']:6d} | {full['n_solves'] / r['n_solves']:11.1f} | {r['speedup']:7.1f} |"
+              f" {r['annual_cost']:11.2f} | {100 * r['cost_error']:7.2f}% | {corrected} | {stderr} |"
+              f" {100 * r['discomfort_error']:8.2f}%")
+    print("----------------------------------------------------------------------------------------------")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--question", default="question_1c")
+    parser.add_argument("--mode", default="battery")
+    parser.add_argument("--epsilon", type=float, default=2.0, help="Discomfort budget of the epsilon/battery modes")
+    parser.add_argument("--k", nargs="+", type=int, default=[4, 7, 12, 24])
+    parser.add_argument("--n-days", type=int, default=365)
+    parser.add_argument("--n-check", type=int, default=0, help="Extra sampled days for the bias correction")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the rows as JSON")
+    args = parser.parse_args(argv)
+
+    data_dir = Path(__file__).resolve().parent.parent.parent / "data"
+    df_data = DataLoader(input_path=str(data_dir), question_name=args.question).load_dataset_as_df()
+    epsilon = args.epsilon if args.mode in ("epsilon", "battery") else None
+
+    set_quiet(True)
+    open_env()
+    try:
+        year = sample_year(df_data, n_days=args.n_days, seed=args.seed)
+        rd = RepresentativeDays(df_data, year["energy_price_DKK_per_kWh"], year["pv_max"], year.get("p_ref"))
+        full = rd.solve_full(args.mode, epsilon)
+        rows = rd.error_report(args.k, mode=args.mode, epsilon_discomfort=epsilon, n_check=args.n_check,
+                               seed=args.seed, full=full)
+    finally:
+        close_env()
+        set_quiet(False)
+
+    print_report(rows, full)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
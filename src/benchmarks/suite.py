@@ -0,0 +1,364 @@
+# src/benchmarks/suite.py
+"""
+Benchmark suite for data loading, model building, solving and result extraction.
+
+Synthetic inputs (benchmarks/synthetic.py) are generated for every horizon length, consumer count and
+scenario count. Every case records the median time and the peak traced Python memory of each phase:
+
+    load:    DataLoader.load_dataset_as_df() and DataProcessor compile of the question folder
+    build:   from the call until the first Gurobi optimize()
+    solve:   time spent in optimize()
+    extract: from the end of the last optimize() until the call returns
+
+Cases: build_and_solve, build_and_solve_multi_objective (cost_only, epsilon, battery), their parametric
+(matrix-form) counterparts, Runner scenario sweeps and BatchOptModel over several consumers.
+
+Run from src/:
+    python -m benchmarks.suite run --output bench.json
+    python -m benchmarks.suite compare baseline.json bench.json --threshold 0.25
+
+The default sizes stay inside the size-limited Gurobi license, larger runs need a full license.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import gurobipy as gp
+
+import opt_model.opt_model as opt_model_module
+import opt_model.batch as batch_module
+from data_ops import DataLoader, DataProcessor, split_consumers
+from opt_model import OptModel, BatchOptModel
+from runner import Runner
+from .synthetic import generate_question
+
+DEFAULTS = {"horizons": (24, 72, 168), "consumers": (1, 2, 4), "scenarios": (1, 10, 50), "repeats": 3}
+QUICK = {"horizons": (24,), "consumers": (1, 2), "scenarios": (1, 5), "repeats": 1}
+
+# Cases of one consumer: (name, question, how to call it)
+MODEL_CASES = (
+    ("build_and_solve", "question_1a", "legacy", None),
+    ("multi_objective:cost_only", "question_1b", "legacy", "cost_only"),
+    ("multi_objective:epsilon", "question_1b", "legacy", "epsilon"),
+    ("multi_objective:battery", "question_1c", "legacy", "battery"),
+    ("parametric:min_energy", "question_1a", "parametric", "min_energy"),
+    ("parametric:cost_only", "question_1b", "parametric", "cost_only"),
+    ("parametric:epsilon", "question_1b", "parametric", "epsilon"),
+    ("parametric:battery", "question_1c", "parametric", "battery"),
+)
+
+
+# --- Phase probe ---
+
+class _PhaseProbe:
+    """
+    Records when every Gurobi optimize() starts and ends, and the traced memory peak of each phase above the
+    memory that was already allocated when the phase started.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.t_start = time.perf_counter()
+        self.calls = []          # (start, end) of every optimize()
+        self.peaks = {"build": 0, "solve": 0, "extract": 0}
+        self._start_phase()
+
+    def _start_phase(self):
+        tracemalloc.reset_peak()
+        self.phase_start_mem = tracemalloc.get_traced_memory()[0]
+
+    def _take_peak(self, phase):
+        self.peaks[phase] = max(self.peaks[phase], tracemalloc.get_traced_memory()[1] - self.phase_start_mem)
+        self._start_phase()
+
+    def before_optimize(self):
+        self._take_peak("build" if not self.calls else "extract")
+        self.calls.append([time.perf_counter(), None])
+
+    def after_optimize(self):
+        self.calls[-1][1] = time.perf_counter()
+        self._take_peak("solve")
+
+    def phases(self, t_end):
+        self._take_peak("extract" if self.calls else "build")
+        if not self.calls:
+            return {"build_s": t_end - self.t_start, "solve_s": 0.0, "extract_s": 0.0}
+        solve = sum(end - start for start, end in self.calls)
+        return {
+            "build_s": self.calls[0][0] - self.t_start,
+            "solve_s": solve,
+            # Everything after the first solve that is not solving: result extraction (and re-solve setup)
+            "extract_s": t_end - self.calls[0][0] - solve,
+        }
+
+
+@contextlib.contextmanager
+def _probe_models(probe):
+    """Let the model modules create Gurobi models whose optimize() reports to the probe."""
+
+    class ProbedModel(gp.Model):
+        def optimize(self, *args, **kwargs):
+            probe.before_optimize()
+            try:
+                return super().optimize(*args, **kwargs)
+            finally:
+                probe.after_optimize()
+
+    shim = types.ModuleType("gurobipy_probe")
+    shim.__dict__.update(gp.__dict__)
+    shim.Model = ProbedModel
+    modules = (opt_model_module, batch_module)
+    originals = [module.gp for module in modules]
+    for module in modules:
+        module.gp = shim
+    try:
+        yield
+    finally:
+        for module, original in zip(modules, originals):
+            module.gp = original
+
+
+def _measure(call, repeats):
+    """Median phase times and maximum phase peaks (MB) of `repeats` calls, printed output is swallowed."""
+    probe = _PhaseProbe()
+    runs, error = [], None
+    with _probe_models(probe):
+        for _ in range(repeats):
+            probe.reset()
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    call()
+            except (gp.GurobiError, RuntimeError, ValueError) as exc:
+                error = f"{type(exc).__name__}: {exc}"
+                break
+            phases = probe.phases(time.perf_counter())
+            phases.update({f"{k}_peak_mb": v / 2 ** 20 for k, v in probe.peaks.items()})
+            phases["n_solves"] = len(probe.calls)
+            runs.append(phases)
+    if error is not None:
+        return {"error": error}
+    out = {}
+    for key in runs[0]:
+        values = [r[key] for r in runs]
+        out[key] = float(np.max(values)) if key.endswith("_mb") else float(np.median(values))
+    out["total_s"] = out["build_s"] + out["solve_s"] + out["extract_s"]
+    return out
+
+
+def _measure_load(data_dir, question, repeats):
+    times, peaks = [], []
+    for _ in range(repeats):
+        tracemalloc.reset_peak()
+        start_mem = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        DataLoader(input_path=str(data_dir), question_name=question).load_dataset_as_df()
+        DataProcessor(data_dir, question).compile(use_cache=False)
+        times.append(time.perf_counter() - t0)
+        # Peak above what was allocated before loading
+        peaks.append(tracemalloc.get_traced_memory()[1] - start_mem)
+    return {"load_s": float(np.median(times)), "load_peak_mb": float(np.max(peaks)) / 2 ** 20}
+
+
+# --- Cases ---
+
+def _model_call(df_data, kind, mode, n_hours):
+    # Half of the sample frontier per day keeps the epsilon cases feasible for every horizon
+    epsilon = 25.0 * n_hours / 24
+
+    def call():
+        model = OptModel(df_data, solver_params={"OutputFlag": 0})
+        if kind == "legacy":
+            if mode is None:
+                return model.build_and_solve()
+            return model.build_and_solve_multi_objective(mode=mode, epsilon_discomfort=0 if mode == "battery" else epsilon)
+        model.build_parametric(mode=mode, epsilon_discomfort={"epsilon": epsilon, "battery": 0}.get(mode))
+        return model.solve_parametric()
+    return call
+
+
+def _scenarios(df_data, n_scenarios, seed=0):
+    rng = np.random.default_rng(seed)
+    base = np.asarray(df_data["bus_params"]["energy_price_DKK_per_kWh"].iloc[0], dtype=float)
+    return {f"S{k}": {"energy_price_DKK_per_kWh": base * rng.uniform(0.7, 1.3, size=len(base)),
+                      "export_tariff_DKK/kWh": float(rng.uniform(0.1, 1.0))}
+            for k in range(n_scenarios)}
+
+
+def run_suite(horizons=DEFAULTS["horizons"], consumers=DEFAULTS["consumers"], scenarios=DEFAULTS["scenarios"],
+              repeats=DEFAULTS["repeats"], data_dir=None, seed=0):
+    """Run all cases and return the result rows."""
+    rows = []
+    tmp = tempfile.TemporaryDirectory() if data_dir is None else None
+    root = Path(tmp.name if tmp else data_dir)
+    tracemalloc.start()
+    try:
+        for n_hours in horizons:
+            base = root / f"h{n_hours}_c1"
+            for question in ("question_1a", "question_1b", "question_1c"):
+                generate_question(base, question, n_hours=n_hours, n_consumers=1, seed=seed)
+            loaded = {q: DataLoader(input_path=str(base), question_name=q).load_dataset_as_df()
+                      for q in ("question_1a", "question_1b", "question_1c")}
+
+            for name, question, kind, mode in MODEL_CASES:
+                row = {"case": name, "question": question, "hours": n_hours, "consumers": 1, "scenarios": 1}
+                row.update(_measure_load(base, question, repeats))
+                row.update(_measure(_model_call(loaded[question], kind, mode, n_hours), repeats))
+                rows.append(row)
+                print(_format_row(row))
+
+            for n_scenarios in scenarios:
+                df_data = loaded["question_1c"]
+                sweep = _scenarios(df_data, n_scenarios, seed)
+                row = {"case": "runner:battery", "question": "question_1c", "hours": n_hours, "consumers": 1,
+                       "scenarios": n_scenarios}
+                row.update(_measure(lambda: Runner(df_data, sweep).run_scenario_analysis_battery(), repeats))
+                rows.append(row)
+                print(_format_row(row))
+
+            for n_consumers in consumers:
+                path = root / f"h{n_hours}_c{n_consumers}"
+                generate_question(path, "question_1c", n_hours=n_hours, n_consumers=n_consumers, seed=seed)
+                row = {"case": "batch:battery", "question": "question_1c", "hours": n_hours,
+                       "consumers": n_consumers, "scenarios": 1}
+                row.update(_measure_load(path, "question_1c", repeats))
+                split = [data for _, data in
+                         split_consumers(DataLoader(input_path=str(path), question_name="question_1c").load_dataset_as_df())]
+                row.update(_measure(lambda: BatchOptModel(split, solver_params={"OutputFlag": 0}).solve(
+                    mode="battery", epsilon_discomfort=0), repeats))
+                rows.append(row)
+                print(_format_row(row))
+    finally:
+        tracemalloc.stop()
+        if tmp is not None:
+            tmp.cleanup()
+    return rows
+
+
+# --- Output and comparison ---
+
+def _meta():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).parent).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "gurobi": ".".join(map(str, gp.gurobi.version())),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def _key(row):
+    return (row["case"], row["hours"], row["consumers"], row["scenarios"])
+
+
+def _format_row(row):
+    label = f"{row['case']:<28} h={row['hours']:<5} c={row['consumers']:<3} s={row['scenarios']:<4}"
+    if "error" in row:
+        return f"{label} {row['error']}"
+    load = f"load {1e3 * row['load_s']:8.2f} ms | " if "load_s" in row else " " * 19 + "| "
+    return (f"{label} {load}build {1e3 * row['build_s']:8.2f} ms | solve {1e3 * row['solve_s']:8.2f} ms | "
+            f"extract {1e3 * row['extract_s']:8.2f} ms | peak {max(row.get(k, 0) for k in row if k.endswith('_mb')):7.2f} MB")
+
+
+def write_results(rows, path):
+    with open(path, "w") as f:
+        json.dump({"meta": _meta(), "results": rows}, f, indent=2)
+
+
+def compare(baseline, current, threshold=0.25, min_abs_s=0.002, min_abs_mb=0.5):
+    """
+    Compare two result files (dicts as written by write_results).
+    A metric regresses when it grew by more than `threshold` (relative) and more than the absolute
+    minimum, so noise on sub-millisecond phases is not flagged. Returns (regressions, improvements).
+    """
+    base = {_key(r): r for r in baseline["results"]}
+    regressions, improvements = [], []
+    for row in current["results"]:
+        ref = base.get(_key(row))
+        if ref is None or "error" in ref or "error" in row:
+            continue
+        for metric, value in row.items():
+            if not (metric.endswith("_s") or metric.endswith("_mb")) or metric not in ref:
+                continue
+            old = ref[metric]
+            min_abs = min_abs_s if metric.endswith("_s") else min_abs_mb
+            if abs(value - old) < min_abs or old <= 0:
+                continue
+            change = value / old - 1.0
+            entry = (_key(row), metric, old, value, change)
+            if change > threshold:
+                regressions.append(entry)
+            elif change < -threshold:
+                improvements.append(entry)
+    return regressions, improvements
+
+
+def print_comparison(regressions, improvements):
+    for title, entries in (("Regressions", regressions), ("Improvements", improvements)):
+        print(f"\n{title}: {len(entries)}")
+        for (case, hours, consumers, scenarios), metric, old, new, change in entries:
+            print(f"  {case:<28} h={hours:<5} c={consumers:<3} s={scenarios:<4} {metric:<16} "
+                  f"{old:10.4f} -> {new:10.4f} ({100 * change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run the suite and write JSON results")
+    run.add_argument("--output", default="benchmark_results.json")
+    run.add_argument("--horizons", nargs="+", type=int)
+    run.add_argument("--consumers", nargs="+", type=int)
+    run.add_argument("--scenarios", nargs="+", type=int)
+    run.add_argument("--repeats", type=int)
+    run.add_argument("--quick", action="store_true", help="Small grid for a fast check")
+    run.add_argument("--data-dir", help="Keep the synthetic inputs in this directory")
+    run.add_argument("--seed", type=int, default=0)
+
+    cmp = sub.add_parser("compare", help="Compare results against a baseline, exit 1 on regressions")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=0.25, help="Relative slowdown that counts as regression")
+    cmp.add_argument("--min-abs-ms", type=float, default=2.0, help="Ignore time changes below this")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        grid = dict(QUICK if args.quick else DEFAULTS)
+        for key in grid:
+            if getattr(args, key) is not None:
+                grid[key] = getattr(args, key)
+        rows = run_suite(data_dir=args.data_dir, seed=args.seed, **grid)
+        write_results(rows, args.output)
+        print(f"\nWrote {len(rows)} results to {args.output}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions, improvements = compare(baseline, current, args.threshold, args.min_abs_ms / 1e3)
+    print_comparison(regressions, improvements)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+# src/benchmarks/synthetic.py
+"""
+Synthetic input data in the data/question_* schema, for benchmarks with any horizon and consumer count.
+
+    generate_question(out_dir, "question_1c", n_hours=168, n_consumers=4, seed=0)
+
+writes bus_params.json, DER_production.json, appliance_params.json, consumer_params.json and
+usage_preference(s).json to out_dir/question_1c. The daily shapes follow the sample data (evening price
+peak, PV around noon, morning/evening load) with seeded noise, so runs are reproducible.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+QUESTIONS = ("question_1a", "question_1b", "question_1c")
+
+
+def _daily_shape(hours, peak, width):
+    """Periodic bump around hour `peak` of every day."""
+    d = (hours % 24 - peak + 12) % 24 - 12
+    return np.exp(-0.5 * (d / width) ** 2)
+
+
+def synthetic_series(n_hours, rng):
+    hours = np.arange(n_hours)
+    prices = 1.0 + 0.4 * _daily_shape(hours, 8, 2.0) + 1.2 * _daily_shape(hours, 19, 2.0)
+    prices = prices + 0.05 * rng.standard_normal(n_hours)
+    pv_ratio = np.clip(_daily_shape(hours, 12.5, 2.5) * rng.uniform(0.5, 1.0, size=n_hours), 0.0, 1.0)
+    pv_ratio[(hours % 24 < 5) | (hours % 24 > 20)] = 0.0
+    load_ratio = np.clip(0.05 + 0.7 * _daily_shape(hours, 7, 1.5) + 0.9 * _daily_shape(hours, 18.5, 2.0)
+                         + 0.03 * rng.standard_normal(n_hours), 0.0, 1.0)
+    return np.round(prices, 4), np.round(pv_ratio, 4), np.round(load_ratio, 4)
+
+
+def generate_question(out_dir, question="question_1c", n_hours=24, n_consumers=1, seed=0):
+    """Write one synthetic question folder and return its path."""
+    if question not in QUESTIONS:
+        raise ValueError(f"Unknown question {question}, use one of {QUESTIONS}")
+    rng = np.random.default_rng(seed)
+    path = Path(out_dir) / question
+    path.mkdir(parents=True, exist_ok=True)
+    days = n_hours / 24
+
+    prices, _, _ = synthetic_series(n_hours, rng)
+    bus = [{
+        "bus_ID": "Bus1",
+        "import_tariff_DKK/kWh": 0.5,
+        "export_tariff_DKK/kWh": 0.4,
+        "max_import_kW": 1000,
+        "max_export_kW": 500,
+        "penalty_excess_import_DKK/kWh": 10,
+        "penalty_excess_export_DKK/kWh": 10,
+        "energy_price_DKK_per_kWh": prices.tolist(),
+    }]
+
+    consumers, production, preferences = [], [], []
+    appliances = {"DER": [], "load": [], "storage": [] if question == "question_1c" else None, "heat_pump": None}
+    for i in range(1, n_consumers + 1):
+        cid = f"C{i}"
+        pv_id, load_id, bess_id = f"PV_{i:02d}", f"FFL_{i:02d}", f"BESS_{i:02d}"
+        _, pv_ratio, load_ratio = synthetic_series(n_hours, rng)
+
+        flexible = f"{load_id},{bess_id}" if question == "question_1c" else load_id
+        consumers.append({"consumer_id": cid, "connection_bus": "Bus1", "list_appliances": [pv_id, flexible]})
+        production.append({"consumer_id": cid, "DER_type": "solar", "hourly_profile_ratio": pv_ratio.tolist()})
+        appliances["DER"].append({"DER_id": pv_id, "DER_type": "PV", "max_power_kW": 3.0, "min_power_ratio": 0.0,
+                                  "max_ramp_rate_up_ratio": 1.0, "max_ramp_rate_down_ratio": 1.0})
+        appliances["load"].append({"load_type": "fully flexible load", "load_id": load_id,
+                                   "max_load_kWh_per_hour": 3.0, "min_load_ratio": 0.0,
+                                   "max_ramp_rate_up_ratio": 1.0, "max_ramp_rate_down_ratio": 1.0,
+                                   "min_on_time_h": 0, "min_off_time_h": 0})
+        if question == "question_1c":
+            appliances["storage"].append({"storage_id": bess_id, "storage_capacity_kWh": 6.0,
+                                          "max_charging_power_ratio": 0.15, "max_discharging_power_ratio": 0.3,
+                                          "charging_efficiency": 0.9, "discharging_efficiency": 0.9})
+
+        load_pref = {"load_id": load_id, "max_total_energy_per_day_hour_equivalent": None}
+        if question == "question_1a":
+            # 8 hour-equivalents per day as in the sample data, over the whole horizon
+            load_pref["min_total_energy_per_day_hour_equivalent"] = round(8 * days, 4)
+            load_pref["hourly_profile_ratio"] = None
+        else:
+            load_pref["min_total_energy_per_day_hour_equivalent"] = None
+            load_pref["hourly_profile_ratio"] = load_ratio.tolist()
+        pref = {"consumer_id" if question == "question_1a" else "consumer_ID": cid,
+                "grid_preferences": None, "DER_preferences": None, "load_preferences": [load_pref],
+                "storage_preferences": ([{"storage_id": bess_id, "initial_soc_ratio": 0.5, "final_soc_ratio": 0.5}]
+                                        if question == "question_1c" else None),
+                "heat_pump_preferences": None}
+        preferences.append(pref)
+
+    # Q1.a names the file usage_preference, Q1.b/Q1.c usage_preferences
+    pref_name = "usage_preference" if question == "question_1a" else "usage_preferences"
+    files = {
+        "bus_params": bus,
+        "DER_production": production,
+        "appliance_params": appliances,
+        "consumer_params": consumers,
+        pref_name: preferences,
+    }
+    for name, content in files.items():
+        with open(path / f"{name}.json", "w") as f:
+            json.dump(content, f)
+    return path
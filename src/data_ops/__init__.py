@@ -1,5 +1,29 @@
-from .data_loader import DataLoader
-from .data_visualizer import plot_single_scenario
+# Submodules are imported on first use of one of their names (PEP 562 module __getattr__), so
+# "from data_ops import DataLoader" does not import matplotlib, and the plotting code does not import pandas.
+_EXPORTS = {
+    "DataLoader": ".data_loader",
+    "plot_single_scenario": ".data_visualizer",
+    "plot_scenarios": ".data_visualizer",
+    "ScenarioPlotter": ".data_visualizer",
+    "split_consumers": ".data_processor",
+    "DataProcessor": ".data_processor",
+    "ConsumerInputs": ".data_processor",
+    "StorageInputs": ".data_processor",
+    "compile_consumer": ".data_processor",
+    "TimeSeriesStore": ".timeseries_store",
+    "ScenarioOverlay": ".scenario_overlay",
+}
+__all__ = list(_EXPORTS)
 
 
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
 
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
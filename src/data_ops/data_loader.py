@@ -1,20 +1,15 @@
 # -----------------------------
 # Load Data
 # -----------------------------
+# pandas and yaml are imported where they are used, so importing the loader stays cheap
 import json
 import csv
-import pandas as pd
-from pathlib import Path
-
 from pathlib import Path
 from dataclasses import dataclass
-from logging import Logger
-import pandas as pd
-import xarray as xr
 import numpy as np
-import yaml
 
 from utils import load_dataset
+from .timeseries_store import TimeSeriesStore
 
 
 
@@ -81,6 +76,7 @@ class DataLoader:
             with open(file_path, "r") as f:
                 return json.load(f)
         elif suffix == ".csv":
+            import pandas as pd
             return pd.read_csv(file_path)
         else:
             raise ValueError(f"Unsupported file type: {suffix}")
@@ -101,6 +97,7 @@ class DataLoader:
 
         suffix = file_path.suffix.lower()
         if suffix == ".yaml" or suffix == ".yml":
+            import yaml
             with open(file_path, "r") as f:
                 self.aux_data = yaml.safe_load(f)
         elif suffix == ".json":
@@ -111,11 +108,26 @@ class DataLoader:
 
         return self.aux_data
     
+    def open_timeseries(self, store_name: str = "timeseries"):
+        """
+        Open the memory-mapped time series store (see timeseries_store.py) in the question folder.
+        Nothing is read until a consumer window is accessed.
+        """
+        store_path = self.input_path / self.question_name / store_name
+        if not (store_path / "meta.json").exists():
+            raise FileNotFoundError(f"Time series store not found: {store_path}")
+        return TimeSeriesStore(store_path)
+
+    def ingest_timeseries(self, files, series, store_name: str = "timeseries", **kwargs):
+        """Stream large CSV/Parquet files into the time series store of the question folder (see TimeSeriesStore.ingest)."""
+        return TimeSeriesStore.ingest(files, self.input_path / self.question_name / store_name, series, **kwargs)
+
     def load_dataset_as_df(self):
         """
         Load all JSON/CSV files under question_name and convert them to pandas DataFrames
         if possible.
         """
+        import pandas as pd
         data_dict = self._load_dataset()
         df_dict = {}
 
@@ -1,4 +1,277 @@
 import json
 import csv
-import pandas as pd
+import hashlib
+import os
+import pickle
+import uuid
+from dataclasses import dataclass
+import numpy as np
 from pathlib import Path
+
+# Processed inputs are cached here (see DataProcessor)
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent.parent / "processed_data" / "compiled"
+COMPILED_VERSION = 1
+
+
+def _split_ids(list_appliances):
+    """Appliance ids of a consumer; entries may hold several comma separated ids ("FFL_01,BESS_01")."""
+    ids = set()
+    for entry in list_appliances or []:
+        ids.update(a.strip() for a in str(entry).split(",") if a.strip())
+    return ids
+
+
+def _consumer_column(df):
+    # The input files use both consumer_id and consumer_ID
+    for col in ("consumer_id", "consumer_ID"):
+        if col in df.columns:
+            return col
+    return None
+
+
+def split_consumers(df_data):
+    """
+    Split a multi-consumer dataset into one single-consumer dataset per row of consumer_params,
+    in the layout OptModel expects (row [0] of every table belongs to the consumer).
+
+    Returns a list of (consumer_id, data) in consumer_params order.
+    """
+    consumers = df_data["consumer_params"]
+    bus_df = df_data["bus_params"]
+    bus_col = "bus_id" if "bus_id" in bus_df.columns else "bus_ID"
+    appliances = df_data["appliance_params"]
+    pref_key = "usage_preferences" if "usage_preferences" in df_data else "usage_preference"
+
+    out = []
+    for _, row in consumers.iterrows():
+        cid = row["consumer_id"]
+        data = dict(df_data)
+
+        bus = bus_df[bus_df[bus_col] == row["connection_bus"]] if bus_col in bus_df.columns else bus_df
+        data["bus_params"] = bus.reset_index(drop=True)
+
+        for key in ("DER_production", pref_key):
+            df = df_data[key]
+            col = _consumer_column(df)
+            data[key] = (df[df[col] == cid] if col else df).reset_index(drop=True)
+
+        ids = _split_ids(row.get("list_appliances"))
+        data["appliance_params"] = {
+            kind: [a for a in (items or []) if ids & {a.get("DER_id"), a.get("load_id"), a.get("storage_id")}] or None
+            for kind, items in appliances.items()
+        }
+        data["consumer_params"] = consumers[consumers["consumer_id"] == cid].reset_index(drop=True)
+        out.append((cid, data))
+    return out
+
+
+# --- Compiled inputs ---
+
+def _f64(values):
+    """Contiguous, read-only float64 array (shared between models, so it must not be changed in place)."""
+    arr = np.ascontiguousarray(values, dtype=np.float64)
+    arr.setflags(write=False)
+    return arr
+
+
+@dataclass(slots=True)
+class StorageInputs:
+    storage_id: str
+    capacity_kWh: float
+    max_charging_power_ratio: float
+    max_discharging_power_ratio: float
+    charging_efficiency: float
+    discharging_efficiency: float
+
+    def as_dict(self):
+        # Same keys as the storage entry of appliance_params.json
+        return {
+            "storage_id": self.storage_id,
+            "storage_capacity_kWh": self.capacity_kWh,
+            "max_charging_power_ratio": self.max_charging_power_ratio,
+            "max_discharging_power_ratio": self.max_discharging_power_ratio,
+            "charging_efficiency": self.charging_efficiency,
+            "discharging_efficiency": self.discharging_efficiency,
+        }
+
+
+@dataclass(slots=True)
+class ConsumerInputs:
+    """
+    Model inputs of one consumer as float64 arrays, with the derived series (pv_max, p_ref) precomputed.
+    OptModel accepts it in place of the DataFrame dict for the parametric / matrix models.
+    """
+    prices: np.ndarray
+    import_tariff: float
+    export_tariff: float
+    max_import: float
+    max_export: float
+    pv_max: np.ndarray
+    max_load: float
+    p_ref: np.ndarray = None
+    energy_min: float = None
+    storage: StorageInputs = None
+    initial_soc: float = None
+    terminal_soc: float = None
+
+    @property
+    def n_hours(self):
+        return len(self.prices)
+
+    def as_params(self):
+        """Flat parameter dict, the same as OptModel.get_parameters() on the raw data."""
+        return {
+            "energy_price_DKK_per_kWh": self.prices,
+            "import_tariff_DKK/kWh": self.import_tariff,
+            "export_tariff_DKK/kWh": self.export_tariff,
+            "max_import_kW": self.max_import,
+            "max_export_kW": self.max_export,
+            "pv_max": self.pv_max,
+            "max_load": self.max_load,
+            "p_ref": self.p_ref,
+            "energy_min": self.energy_min,
+            "epsilon": None,
+            "storage": self.storage.as_dict() if self.storage is not None else None,
+            "initial_soc_kWh": self.initial_soc,
+            "terminal_soc_kWh": self.terminal_soc,
+        }
+
+
+def compile_consumer(raw):
+    """
+    Compile the raw JSON content of a question folder (DataLoader._load_dataset()) into ConsumerInputs.
+    Uses the first consumer of every table, like OptModel.
+    """
+    bus = raw["bus_params"][0]
+    load = raw["appliance_params"]["load"][0]
+    der = raw["appliance_params"]["DER"][0]
+    storage = (raw["appliance_params"].get("storage") or [None])[0]
+    # Q1.a names the file usage_preference, Q1.b/Q1.c usage_preferences
+    prefs = raw.get("usage_preferences", raw.get("usage_preference"))[0]["load_preferences"][0]
+
+    max_pv_power = float(der["max_power_kW"])
+    max_load = float(load["max_load_kWh_per_hour"])
+
+    inputs = ConsumerInputs(
+        prices=_f64(bus["energy_price_DKK_per_kWh"]),
+        import_tariff=float(bus["import_tariff_DKK/kWh"]),
+        export_tariff=float(bus["export_tariff_DKK/kWh"]),
+        max_import=float(bus["max_import_kW"]),
+        max_export=float(bus["max_export_kW"]),
+        pv_max=_f64(max_pv_power * np.asarray(raw["DER_production"][0]["hourly_profile_ratio"], dtype=np.float64)),
+        max_load=max_load,
+    )
+    if prefs.get("min_total_energy_per_day_hour_equivalent") is not None:
+        inputs.energy_min = float(prefs["min_total_energy_per_day_hour_equivalent"]) * max_pv_power
+    if prefs.get("hourly_profile_ratio") is not None:
+        inputs.p_ref = _f64(max_load * np.asarray(prefs["hourly_profile_ratio"], dtype=np.float64))
+    if storage:
+        inputs.storage = StorageInputs(
+            storage_id=str(storage.get("storage_id", "")),
+            capacity_kWh=float(storage["storage_capacity_kWh"]),
+            max_charging_power_ratio=float(storage["max_charging_power_ratio"]),
+            max_discharging_power_ratio=float(storage["max_discharging_power_ratio"]),
+            charging_efficiency=float(storage["charging_efficiency"]),
+            discharging_efficiency=float(storage["discharging_efficiency"]),
+        )
+        # The battery starts and ends the day half full, as in OptModel.get_parameters()
+        inputs.initial_soc = 0.5 * inputs.storage.capacity_kWh
+        inputs.terminal_soc = inputs.initial_soc
+    return inputs
+
+
+def _freeze(inputs):
+    """Mark the arrays of unpickled inputs read-only again."""
+    for name in ("prices", "pv_max", "p_ref"):
+        value = getattr(inputs, name)
+        if value is not None:
+            setattr(inputs, name, _f64(value))
+    return inputs
+
+
+class DataProcessor:
+    """
+    Compile step between DataLoader and OptModel.
+
+    The JSON files of a question folder are compiled once into ConsumerInputs and cached as a binary
+    (pickle) file in processed_data/compiled/. The cache is invalidated when a source file changes: by default on
+    size and modification time, with validate="hash" on a SHA-256 of the file contents.
+
+    Example:
+        inputs = DataProcessor("data", "question_1c").compile()
+        OptModel(inputs).build_parametric(mode="battery", epsilon_discomfort=0)
+    """
+
+    def __init__(self, input_path, question_name, cache_dir=None, validate="mtime"):
+        if validate not in ("mtime", "hash"):
+            raise ValueError(f"validate must be 'mtime' or 'hash', got {validate}")
+        self.input_path = Path(input_path).resolve()
+        self.question_name = question_name
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else DEFAULT_CACHE_DIR
+        self.validate = validate
+
+    @property
+    def source_dir(self):
+        return self.input_path / self.question_name
+
+    @property
+    def cache_file(self):
+        # Folder names can repeat under different roots, so the cache name includes a hash of the full path
+        tag = hashlib.sha256(str(self.source_dir).encode()).hexdigest()[:12]
+        return self.cache_dir / f"{self.question_name}-{tag}.pkl"
+
+    def source_fingerprint(self):
+        """Fingerprint of the source files, stored with the cache and compared on load."""
+        if not self.source_dir.exists():
+            raise FileNotFoundError(f"Question directory not found: {self.source_dir}")
+        h = hashlib.sha256(f"v{COMPILED_VERSION}:{self.validate}".encode())
+        for path in sorted(p for p in self.source_dir.glob("*.json") if p.is_file()):
+            h.update(path.name.encode())
+            if self.validate == "hash":
+                h.update(path.read_bytes())
+            else:
+                stat = path.stat()
+                h.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return h.hexdigest()
+
+    def _load_raw(self):
+        raw = {}
+        for path in self.source_dir.glob("*.json"):
+            with open(path, "r") as f:
+                raw[path.stem] = json.load(f)
+        return raw
+
+    def load_cached(self, fingerprint=None):
+        """Cached ConsumerInputs, or None when there is no valid cache."""
+        fingerprint = fingerprint or self.source_fingerprint()
+        try:
+            with open(self.cache_file, "rb") as f:
+                version, cached_fingerprint, inputs = pickle.load(f)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError, AttributeError):
+            return None
+        if version != COMPILED_VERSION or cached_fingerprint != fingerprint:
+            return None
+        return _freeze(inputs)
+
+    def compile(self, use_cache=True):
+        """ConsumerInputs of the question folder, from the cache when the sources did not change."""
+        fingerprint = self.source_fingerprint()
+        if use_cache:
+            cached = self.load_cached(fingerprint)
+            if cached is not None:
+                return cached
+
+        inputs = compile_consumer(self._load_raw())
+        if use_cache:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Written to a temporary file and renamed, so parallel loaders never read a partial cache
+            tmp = self.cache_file.with_name(f".{uuid.uuid4().hex}.tmp")
+            with open(tmp, "wb") as f:
+                pickle.dump((COMPILED_VERSION, fingerprint, inputs), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.cache_file)
+        return inputs
+
+    @classmethod
+    def compile_all(cls, input_path, question_names, **kwargs):
+        """{question_name: ConsumerInputs} for many question/consumer folders."""
+        return {name: cls(input_path, name, **kwargs).compile() for name in question_names}
@@ -1,56 +1,185 @@
 # data_visualizer.py
-#import matplotlib
-#matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+# Figures are created with the Agg canvas directly (not through pyplot), so they are never registered with
+# an interactive backend and are freed as soon as they go out of scope.
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
 from pathlib import Path
+import multiprocessing as mp
 import os
 import numpy as np
+from instrumentation import report
+from utils.results_store import safe_name
+
+# Series drawn for every scenario: (results key, label, marker)
+SERIES = (
+    ("p_import", "Import", "o"),
+    ("p_export", "Export", "s"),
+    ("p_pv", "PV", "^"),
+    ("p_load", "Load", "x"),
+)
+COLORS = ("#1f77b4", "#ff7f0e", "#2ca02c", "#d62728")
+
 
 def plot_single_scenario(results, scenario_name="Scenario", save_dir=None):
-    #plt.ion()
-    
-    # """Plot primal variables and duals for one scenario using OO style."""
-    # print(f"[DEBUG] Called plot_single_scenario for {scenario_name}")
-    # print(f"[DEBUG] save_dir = {save_dir}")
-    # print("RESULTS:")
-    # print(results)
-    hours = range(len(results["p_load"]))
-
-    # Create figure and axis
-    fig, ax = plt.subplots(figsize=(10, 6))
-
-    # Plot on the axis object
-    ax.plot(hours, results["p_import"], label="Import", marker="o")
-    ax.plot(hours, results["p_export"], label="Export", marker="s")
-    ax.plot(hours, results["p_pv"], label="PV", marker="^")
-    ax.plot(hours, results["p_load"], label="Load", marker="x")
-
-    # Labels and title
-    ax.set_xlabel("Hour")
-    ax.set_ylabel("Energy (kWh)")
-    ax.set_title(f"Scenario: {scenario_name}")
-    ax.legend(loc="upper left")
-    print(save_dir)
-
-    # Save if requested
-    # if save_dir is not None:
-    #     os.makedirs(save_dir, exist_ok=True)
-    #     file_path = Path(save_dir) / f"{scenario_name}.png"
-    #     fig.savefig(file_path, dpi=300, bbox_inches="tight")
-    #     print(f"[DEBUG] Saved plot to {file_path}, exists={file_path.exists()}")
+    """Plot the power flows of one scenario, save it as PNG if save_dir is given and return the figure."""
+    plotter = ScenarioPlotter(dpi=300)
+    plotter.draw(results, scenario_name)
 
     if save_dir is not None:
-        
         os.makedirs(save_dir, exist_ok=True)
-        file_path = (save_dir) / f"{scenario_name}.png"
-        fig.savefig(file_path, dpi=300, bbox_inches="tight")
-        print(file_path)
-        # print(f"[DEBUG] Saved plot to {file_path}")
-        # print(f"[DEBUG] File exists? {file_path.exists()}")
+        file_path = Path(save_dir) / f"{safe_name(scenario_name)}.png"
+        plotter.fig.savefig(file_path, bbox_inches="tight")
+        report(file_path)
+    return plotter.fig
+
+
+class ScenarioPlotter:
+    """
+    One figure that is reused for many scenarios: draw() only replaces the line data, the title and the
+    axis limits, so no figure, axis or artist is created per scenario.
+    """
+
+    def __init__(self, figsize=(10, 6), dpi=100, markers=True):
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot()
+        self.lines = {}
+        for key, label, marker in SERIES:
+            (self.lines[key],) = self.ax.plot([], [], label=label, marker=marker if markers else None)
+        self.ax.set_xlabel("Hour")
+        self.ax.set_ylabel("Energy (kWh)")
+        self.ax.legend(loc="upper left")
+
+    def draw(self, results, scenario_name="Scenario"):
+        for key, line in self.lines.items():
+            values = np.asarray(results[key], dtype=float)
+            line.set_data(np.arange(len(values)), values)
+        self.ax.set_title(f"Scenario: {scenario_name}")
+        self.ax.relim()
+        self.ax.autoscale_view()
+        return self.fig
+
+    def save(self, path, **kwargs):
+        self.fig.savefig(path, **kwargs)
+
+    def close(self):
+        self.fig.clear()
+        self.lines = {}
+
+
+def _series_only(results):
+    """Drop everything but the plotted series, so only these are sent to worker processes."""
+    return {key: np.asarray(results[key], dtype=float) for key, _, _ in SERIES}
+
+
+def _render_chunk(chunk, save_dir, fmt, dpi):
+    """Worker entry point: render a chunk of (name, series) with one reused figure."""
+    plotter = ScenarioPlotter(dpi=dpi)
+    paths = []
+    try:
+        for name, series in chunk:
+            plotter.draw(series, name)
+            path = Path(save_dir) / f"{safe_name(name)}.{fmt}"
+            plotter.save(path)
+            paths.append(str(path))
+    finally:
+        plotter.close()
+    return paths
+
+
+def downsample(values, max_points):
+    """Min/max envelope of a series with at most about max_points points, peaks are kept."""
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n), values
+    buckets = max(1, max_points // 2)
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    idx = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        seg = values[lo:hi]
+        a, b = lo + int(np.argmin(seg)), lo + int(np.argmax(seg))
+        idx.extend((a, b) if a <= b else (b, a))
+    idx = np.unique(idx)
+    return idx, values[idx]
+
+
+def _svg_plot(name, series, width=640, height=240, max_points=500):
+    """Small inline SVG line chart of the series of one scenario."""
+    ymax = max(float(np.max(v)) if len(v) else 0.0 for v in series.values()) or 1.0
+    n = max(len(v) for v in series.values())
+    sx = (width - 40) / max(n - 1, 1)
+    sy = (height - 30) / ymax
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}">',
+             f'<text x="40" y="14" font-size="12">Scenario: {escape(str(name))}</text>']
+    for (key, label, _), color in zip(SERIES, COLORS):
+        x, y = downsample(series[key], max_points)
+        points = " ".join(f"{40 + xi * sx:.1f},{height - 15 - yi * sy:.1f}" for xi, yi in zip(x, y))
+        parts.append(f'<polyline fill="none" stroke="{color}" stroke-width="1.2" points="{points}"><title>{label}</title></polyline>')
+    parts.append(f'<line x1="40" y1="{height - 15}" x2="{width}" y2="{height - 15}" stroke="#999"/></svg>')
+    return "".join(parts)
+
+
+def plot_scenarios(results, save_dir, fmt="png", combined=None, n_workers=None, dpi=100, max_points=500,
+                   filename="scenarios"):
+    """
+    Render many scenarios at once.
+
+    results: dict of scenario name -> results dict (or an iterable of (name, results)), infeasible
+             scenarios (None) and error records are skipped
+    combined:
+        None:   one file per scenario (fmt "png", "svg" or "pdf", named with utils.results_store.safe_name),
+                rendered in a process pool where every worker reuses one figure for its chunk
+        "pdf":  all scenarios as pages of one multi-page PDF
+        "html": one HTML report with a small inline SVG chart per scenario, series downsampled to about
+                max_points points
+    Returns the list of written files.
+    """
+    save_dir = Path(save_dir)
+    save_dir.mkdir(parents=True, exist_ok=True)
+    items = results.items() if isinstance(results, dict) else results
+    items = [(str(name), _series_only(res)) for name, res in items
+             if isinstance(res, dict) and all(key in res for key, _, _ in SERIES)]
+    if not items:
+        return []
+
+    if combined == "pdf":
+        from matplotlib.backends.backend_pdf import PdfPages
+        path = save_dir / f"{filename}.pdf"
+        plotter = ScenarioPlotter(dpi=dpi, markers=False)
+        try:
+            with PdfPages(path) as pdf:
+                for name, series in items:
+                    pdf.savefig(plotter.draw(series, name))
+        finally:
+            plotter.close()
+        report(f"Saved {len(items)} scenarios to {path}")
+        return [str(path)]
 
-    
+    if combined == "html":
+        path = save_dir / f"{filename}.html"
+        with open(path, "w") as f:
+            f.write(f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{escape(filename)}</title></head><body>\n")
+            legend = " ".join(f'<span style="color:{c}">&#9632; {label}</span>' for (_, label, _), c in zip(SERIES, COLORS))
+            f.write(f"<p>{legend}</p>\n")
+            for name, series in items:
+                f.write(_svg_plot(name, series, max_points=max_points) + "\n")
+            f.write("</body></html>\n")
+        report(f"Saved {len(items)} scenarios to {path}")
+        return [str(path)]
 
+    if combined is not None:
+        raise ValueError(f"Unknown combined output {combined}, use None, 'pdf' or 'html'")
 
-    # Show the figure
-    # plt.show(block=True)
-    # input("Press Enter to exit...")
+    n_workers = max(1, min(n_workers or os.cpu_count() or 1, len(items)))
+    if n_workers == 1:
+        paths = _render_chunk(items, save_dir, fmt, dpi)
+    else:
+        chunks = [items[i::n_workers] for i in range(n_workers)]
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=mp.get_context("spawn")) as pool:
+            paths = [p for out in pool.map(_render_chunk, chunks, [save_dir] * n_workers, [fmt] * n_workers,
+                                           [dpi] * n_workers) for p in out]
+    report(f"Saved {len(paths)} scenario plots to {save_dir}")
+    return paths
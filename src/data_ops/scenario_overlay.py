@@ -0,0 +1,188 @@
+# src/data_ops/scenario_overlay.py
+"""
+Copy-on-write scenario overlays.
+
+A ScenarioOverlay is a shared, read-only base dataset (the dict of DataFrames from DataLoader, or
+ConsumerInputs) plus a small patch with the scenario keys that change (same keys as the scenario dicts,
+see opt_model.PARAMETRIC_KEYS). Nothing of the base is copied:
+
+    base = ScenarioOverlay(df_data)
+    for name, sc in scenarios.items():
+        data = base.with_patch(sc)                  # instead of deepcopy(df_data) + bus_df.at[0, key] = val
+        res = cache.solve(data, mode="battery")     # any OptModel accepts the overlay
+
+OptModel reads the parameters through as_params(): the base parameters are read once per base, stored as
+read-only arrays and shared by every overlay, and the patch is laid on top. Code that reads the input
+tables directly (build_and_solve) gets the base tables, only the tables a patch key lives in are copied,
+on first access: bus_params for BUS_KEYS, DER_production and usage_preference(s) for TABLE_KEYS, written
+back as the ratios these tables hold. Patch keys without an input table (epsilon, the battery state of
+charge) raise a KeyError when the tables are read, they only exist in as_params().
+
+compact() drops the input tables and keeps only the base parameters, so an overlay pickles in a few kB
+for worker processes.
+"""
+from collections.abc import Mapping
+
+import numpy as np
+
+from .data_processor import _f64
+
+# Patch keys that are columns of bus_params
+BUS_KEYS = (
+    "energy_price_DKK_per_kWh",
+    "import_tariff_DKK/kWh",
+    "export_tariff_DKK/kWh",
+    "max_import_kW",
+    "max_export_kW",
+)
+
+# Patch keys that are derived from another input table (see OptModel.get_parameters)
+TABLE_KEYS = {
+    "pv_max": "DER_production",          # hourly_profile_ratio * max_power_kW of the PV
+    "p_ref": "usage_preferences",         # hourly_profile_ratio * max_load_kWh_per_hour
+    "energy_min": "usage_preferences",    # min_total_energy_per_day_hour_equivalent * max_power_kW
+}
+
+
+def _freeze(value):
+    """Series become read-only float64 arrays, scalars and None are kept."""
+    if value is not None and not isinstance(value, (str, dict)) and np.ndim(value) > 0:
+        return _f64(value)
+    return value
+
+
+class _Base:
+    """Input data shared by all overlays of it, with its parameters read once."""
+    __slots__ = ("data", "_params")
+
+    def __init__(self, data, params=None):
+        self.data = data
+        self._params = params
+
+    def params(self):
+        if self._params is None:
+            if hasattr(self.data, "as_params"):
+                params = self.data.as_params()
+            else:
+                from opt_model import OptModel
+                params = OptModel(self.data).get_parameters()
+            self._params = {key: _freeze(value) for key, value in params.items()}
+        return self._params
+
+    def __getstate__(self):
+        return self.data, self._params
+
+    def __setstate__(self, state):
+        self.data, self._params = state
+
+
+class ScenarioOverlay(Mapping):
+    """Read-only base dataset plus a per-scenario patch, see the module docstring."""
+    __slots__ = ("_base", "_patch", "_copies")
+
+    def __init__(self, base, patch=None):
+        if isinstance(base, ScenarioOverlay):
+            # Overlays of overlays share the base, the patches are merged
+            patch = {**base._patch, **(patch or {})}
+            base = base._base
+        elif not isinstance(base, _Base):
+            base = _Base(base)
+        self._base = base
+        self._patch = {key: _freeze(value) for key, value in (patch or {}).items()}
+        self._copies = {}
+
+    def with_patch(self, patch=None, **changes):
+        """New overlay on the same base, with patch and changes on top of this overlay's patch."""
+        return ScenarioOverlay(self, {**(patch or {}), **changes})
+
+    @property
+    def patch(self):
+        return dict(self._patch)
+
+    @property
+    def base(self):
+        return self._base.data
+
+    def as_params(self):
+        """Flat parameter dict (OptModel.get_parameters), the shared base parameters with the patch on top."""
+        params = dict(self._base.params())
+        params.update(self._patch)
+        return params
+
+    def compact(self):
+        """Same overlay without the input tables, only as_params() works on it."""
+        return ScenarioOverlay(_Base(None, self._base.params()), self._patch)
+
+    # --- Mapping view of the input tables ---
+    def _tables(self):
+        data = self._base.data
+        if data is None:
+            raise KeyError("Compact overlay has no input tables, use as_params()")
+        if not isinstance(data, Mapping):
+            raise KeyError(f"{type(data).__name__} has no input tables, use as_params()")
+        return data
+
+    def _table_of(self, key):
+        if key in BUS_KEYS:
+            return "bus_params"
+        table = TABLE_KEYS[key]
+        # Q1.a names the file usage_preference, Q1.b/Q1.c usage_preferences
+        if table == "usage_preferences" and table not in self._tables():
+            return "usage_preference"
+        return table
+
+    def _patched_table(self, name, table, keys):
+        """Copy of table with the patch keys written into it."""
+        table = table.copy()
+        if name == "bus_params":
+            for key in keys:
+                value = self._patch[key]
+                table.at[0, key] = value.tolist() if hasattr(value, "tolist") else value
+            return table
+
+        appliances = self._tables()["appliance_params"]
+        max_pv_power = appliances["DER"][0]["max_power_kW"]
+        if name == "DER_production":
+            table.at[0, "hourly_profile_ratio"] = (np.asarray(self._patch["pv_max"]) / max_pv_power).tolist()
+            return table
+
+        prefs = [dict(pref) for pref in table.at[0, "load_preferences"]]
+        if "p_ref" in keys:
+            max_load = appliances["load"][0]["max_load_kWh_per_hour"]
+            p_ref = self._patch["p_ref"]
+            prefs[0]["hourly_profile_ratio"] = None if p_ref is None else (np.asarray(p_ref) / max_load).tolist()
+        if "energy_min" in keys:
+            energy_min = self._patch["energy_min"]
+            prefs[0]["min_total_energy_per_day_hour_equivalent"] = (
+                None if energy_min is None else float(energy_min) / max_pv_power)
+        table.at[0, "load_preferences"] = prefs
+        return table
+
+    def __getitem__(self, name):
+        unsupported = sorted(key for key in self._patch if key not in BUS_KEYS and key not in TABLE_KEYS)
+        if unsupported:
+            raise KeyError(f"Patch keys {unsupported} have no input table, use as_params()")
+        table = self._tables()[name]
+        keys = [key for key in self._patch if self._table_of(key) == name]
+        if not keys:
+            return table
+        if name not in self._copies:
+            # Copy on write: only the patched tables of this scenario are copied
+            self._copies[name] = self._patched_table(name, table, keys)
+        return self._copies[name]
+
+    def __iter__(self):
+        return iter(self._tables())
+
+    def __len__(self):
+        return len(self._tables())
+
+    def __repr__(self):
+        return f"ScenarioOverlay(patch={sorted(self._patch)})"
+
+    def __getstate__(self):
+        return self._base, self._patch
+
+    def __setstate__(self, state):
+        self._base, self._patch = state
+        self._copies = {}
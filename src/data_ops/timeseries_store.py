@@ -0,0 +1,200 @@
+# src/data_ops/timeseries_store.py
+"""
+Memory-mapped store of hourly series for many consumers.
+
+Layout of a store directory:
+
+    meta.json                 consumer ids, number of hours, start time, step, series names
+    <series>.npy              float64, shape (consumers, hours), or (hours,) for series shared by all consumers
+
+Every consumer is one contiguous row, so the window of one consumer is a zero-copy slice of the memmap
+and only the pages of that window are read from disk. Large CSV or Parquet files are ingested in chunks,
+so neither ingestion nor access needs the whole dataset in memory.
+
+Example:
+    store = TimeSeriesStore.ingest("profiles.parquet", "data/year_store",
+                                   series={"energy_price_DKK_per_kWh": "price", "pv_max": "pv_kW", "p_ref": "load_kW"})
+    window = store.window("C1", start=24, stop=48)    # dict of memmap views
+    model.update_parameters(window)
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+# Series names used by the model (see OptModel.get_parameters)
+MODEL_SERIES = ("energy_price_DKK_per_kWh", "pv_max", "p_ref")
+
+
+def _iter_chunks(path, columns, chunksize):
+    """DataFrame chunks of a CSV or Parquet file, only with the given columns."""
+    import pandas as pd
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("Reading Parquet files needs pyarrow (pip install pyarrow)") from exc
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=list(columns)):
+            yield batch.to_pandas()
+    elif suffix in (".csv", ".gz", ".bz2", ".zip", ".xz"):
+        yield from pd.read_csv(path, usecols=list(columns), chunksize=chunksize)
+    else:
+        raise ValueError(f"Unsupported time series file type: {suffix}")
+
+
+def _as_times(column):
+    """Integer hours stay numeric, anything else is parsed as timestamps (once, Parquet already has them)."""
+    import pandas as pd
+    if pd.api.types.is_numeric_dtype(column) or pd.api.types.is_datetime64_any_dtype(column):
+        return column
+    return pd.to_datetime(column)
+
+
+class TimeSeriesStore:
+    """Read-only (or, while ingesting, writable) view of a store directory, see the module docstring."""
+
+    def __init__(self, path, mode="r"):
+        self.path = Path(path)
+        with open(self.path / "meta.json") as f:
+            self.meta = json.load(f)
+        self.consumer_ids = [str(c) for c in self.meta["consumer_ids"]]
+        self.n_hours = int(self.meta["n_hours"])
+        self._index = {cid: i for i, cid in enumerate(self.consumer_ids)}
+        # np.load only maps the files, nothing is read until a slice is used
+        self.series = {name: np.load(self.path / f"{name}.npy", mmap_mode=mode) for name in self.meta["series"]}
+
+    def __len__(self):
+        return len(self.consumer_ids)
+
+    def __repr__(self):
+        return f"TimeSeriesStore({self.path}, consumers={len(self)}, hours={self.n_hours}, series={list(self.series)})"
+
+    # --- Creating stores ---
+    @classmethod
+    def create(cls, path, consumer_ids, n_hours, series, shared=(), start=None, step="1h"):
+        """
+        Create an empty store (NaN filled) and return it writable.
+        series are the names of the stored series, the ones in shared have one row for all consumers.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "consumer_ids": [str(c) for c in consumer_ids],
+            "n_hours": int(n_hours),
+            "series": list(series),
+            "shared": [s for s in series if s in shared],
+            "start": None if start is None else str(start),
+            "step": step,
+        }
+        for name in series:
+            shape = (int(n_hours),) if name in shared else (len(meta["consumer_ids"]), int(n_hours))
+            arr = np.lib.format.open_memmap(path / f"{name}.npy", mode="w+", dtype=np.float64, shape=shape)
+            arr[:] = np.nan
+            arr.flush()
+            del arr
+        with open(path / "meta.json", "w") as f:
+            json.dump(meta, f, indent=2)
+        return cls(path, mode="r+")
+
+    @classmethod
+    def from_arrays(cls, path, consumer_ids, arrays, start=None, step="1h"):
+        """Store in-memory arrays, 1-d arrays are shared by all consumers."""
+        arrays = {name: np.asarray(values, dtype=np.float64) for name, values in arrays.items()}
+        n_hours = next(iter(arrays.values())).shape[-1]
+        shared = [name for name, values in arrays.items() if values.ndim == 1]
+        store = cls.create(path, consumer_ids, n_hours, list(arrays), shared=shared, start=start, step=step)
+        for name, values in arrays.items():
+            store.series[name][:] = values
+        store.flush()
+        return cls(path)
+
+    @classmethod
+    def ingest(cls, files, path, series, consumer_col="consumer_id", time_col="hour", shared=(),
+               step="1h", chunksize=500_000):
+        """
+        Stream long-format CSV/Parquet files (one row per consumer and time step) into a store.
+
+        series maps store series names to file columns, e.g. {"pv_max": "pv_kW"}. time_col holds either
+        integer hours or timestamps (converted to steps of `step` after the first timestamp). Series in
+        shared are the same for every consumer (e.g. the spot price), the value of any consumer is kept.
+
+        Two passes over the files: the first collects consumer ids and the time range, the second writes
+        every chunk straight into the memory-mapped arrays. Memory use is bounded by chunksize.
+        """
+        import pandas as pd
+        files = [files] if isinstance(files, (str, Path)) else list(files)
+
+        # Pass 1: consumer ids and time range
+        ids, t_min, t_max = {}, None, None
+        for file in files:
+            for chunk in _iter_chunks(file, [consumer_col, time_col], chunksize):
+                for cid in pd.unique(chunk[consumer_col].astype(str)):
+                    ids.setdefault(cid, len(ids))
+                times = _as_times(chunk[time_col])
+                lo, hi = times.min(), times.max()
+                t_min = lo if t_min is None or lo < t_min else t_min
+                t_max = hi if t_max is None or hi > t_max else t_max
+        if not ids:
+            raise ValueError(f"No rows found in {files}")
+
+        timestamps = isinstance(t_min, pd.Timestamp)
+        step_delta = pd.Timedelta(step)
+        n_hours = int((t_max - t_min) / step_delta) + 1 if timestamps else int(t_max - t_min) + 1
+        store = cls.create(path, list(ids), n_hours, list(series), shared=shared,
+                           start=t_min if timestamps else int(t_min), step=step)
+
+        # Pass 2: scatter every chunk into the memmaps
+        columns = [consumer_col, time_col] + list(series.values())
+        for file in files:
+            for chunk in _iter_chunks(file, columns, chunksize):
+                rows = chunk[consumer_col].astype(str).map(ids).to_numpy()
+                times = _as_times(chunk[time_col])
+                if timestamps:
+                    cols = ((times - t_min) / step_delta).to_numpy().astype(np.int64)
+                else:
+                    cols = (times.to_numpy() - t_min).astype(np.int64)
+                for name, column in series.items():
+                    values = chunk[column].to_numpy(dtype=np.float64)
+                    if name in shared:
+                        store.series[name][cols] = values
+                    else:
+                        store.series[name][rows, cols] = values
+        store.flush()
+        return cls(path)
+
+    def flush(self):
+        for arr in self.series.values():
+            if isinstance(arr, np.memmap):
+                arr.flush()
+
+    # --- Access ---
+    def _row(self, consumer):
+        if isinstance(consumer, (int, np.integer)):
+            return int(consumer)
+        try:
+            return self._index[str(consumer)]
+        except KeyError:
+            raise KeyError(f"Unknown consumer {consumer}") from None
+
+    def window(self, consumer, start=0, stop=None, names=None):
+        """{series: view of hours [start, stop)} of one consumer, zero-copy slices of the memmaps."""
+        row = self._row(consumer)
+        stop = self.n_hours if stop is None else stop
+        if not 0 <= start < stop <= self.n_hours:
+            raise IndexError(f"Window [{start}, {stop}) outside of the {self.n_hours} stored hours")
+        out = {}
+        for name in names or self.series:
+            arr = self.series[name]
+            out[name] = arr[start:stop] if arr.ndim == 1 else arr[row, start:stop]
+        return out
+
+    def iter_windows(self, consumers=None, start=0, stop=None, names=None):
+        """Lazily yield (consumer_id, window) for the given consumers (all by default)."""
+        for consumer in (self.consumer_ids if consumers is None else consumers):
+            yield str(consumer), self.window(consumer, start, stop, names)
+
+    def model_window(self, consumer, start=0, stop=None):
+        """Window restricted to the series the model uses, ready for update_parameters / build_parametric overrides."""
+        return self.window(consumer, start, stop, names=[s for s in MODEL_SERIES if s in self.series])
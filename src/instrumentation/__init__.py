@@ -0,0 +1,4 @@
+from .core import (set_quiet, is_quiet, quiet, report, apply_output_flag, add_sink, remove_sink, clear_sinks,
+                   enabled, emit, count, timer, PhaseTimer)
+from .sinks import MetricsRegistry, JsonLinesSink
+from .solver import optimize, solver_stats
@@ -0,0 +1,150 @@
+# src/instrumentation/core.py
+"""
+Global instrumentation state: quiet mode, sinks, per-phase timers and counters.
+
+With no sink attached (the default) timers and counters return immediately, so instrumented hot paths
+cost next to nothing. Attach a sink to collect events:
+
+    from instrumentation import MetricsRegistry, add_sink, set_quiet
+    registry = add_sink(MetricsRegistry())
+    set_quiet(True)           # no Gurobi log, no energy summaries / dual printing
+    ...
+    registry.print_summary()
+"""
+import os
+import time
+
+_state = {
+    # QUIET=1 in the environment starts in quiet mode, e.g. for batch jobs
+    "quiet": os.environ.get("QUIET", "").lower() in ("1", "true", "yes"),
+    "sinks": [],
+}
+
+
+# --- Quiet mode ---
+
+def set_quiet(quiet=True):
+    """Turn the Gurobi log (OutputFlag) and all summary printing off (True) or on (False)."""
+    _state["quiet"] = bool(quiet)
+
+
+def is_quiet():
+    return _state["quiet"]
+
+
+class quiet:
+    """Context manager for a quiet block: with quiet(): ..."""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+
+    def __enter__(self):
+        self.previous = _state["quiet"]
+        _state["quiet"] = self.enabled
+        return self
+
+    def __exit__(self, *exc):
+        _state["quiet"] = self.previous
+
+
+def report(*args, **kwargs):
+    """print() that is silent in quiet mode."""
+    if not _state["quiet"]:
+        print(*args, **kwargs)
+
+
+def apply_output_flag(m):
+    """Switch the Gurobi log of model m off in quiet mode (explicit solver_params set afterwards still win)."""
+    if _state["quiet"]:
+        m.setParam("OutputFlag", 0)
+
+
+# --- Sinks ---
+
+def add_sink(sink):
+    """Send all events to sink (an object with emit(event: dict)), returns the sink."""
+    _state["sinks"].append(sink)
+    return sink
+
+
+def remove_sink(sink):
+    if sink in _state["sinks"]:
+        _state["sinks"].remove(sink)
+
+
+def clear_sinks():
+    _state["sinks"].clear()
+
+
+def enabled():
+    return bool(_state["sinks"])
+
+
+def emit(kind, name, value, **tags):
+    if not _state["sinks"]:
+        return
+    event = {"ts": time.time(), "kind": kind, "name": name, "value": value}
+    if tags:
+        event["tags"] = tags
+    for sink in _state["sinks"]:
+        sink.emit(event)
+
+
+# --- Timers and counters ---
+
+def count(name, n=1, **tags):
+    emit("counter", name, n, **tags)
+
+
+class timer:
+    """
+    Time one phase:
+        with timer("build", method="build_parametric"):
+            ...
+    """
+
+    def __init__(self, name, **tags):
+        self.name = name
+        self.tags = tags
+        self.elapsed = None
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.t0
+        emit("timer", self.name, self.elapsed, **self.tags)
+
+
+class PhaseTimer:
+    """
+    Consecutive phases of one call without nesting the code in with blocks:
+        phases = PhaseTimer(method="build_and_solve")
+        phases.start("build") ... phases.start("optimize") ... phases.start("extract") ... phases.stop()
+    Starting a phase ends the previous one.
+    """
+
+    def __init__(self, **tags):
+        self.tags = tags
+        self.current = None
+        self.t0 = None
+        self.elapsed = {}
+
+    def start(self, name):
+        now = time.perf_counter()
+        self._close(now)
+        self.current, self.t0 = name, now
+        return self
+
+    def stop(self):
+        self._close(time.perf_counter())
+        self.current = None
+        return self.elapsed
+
+    def _close(self, now):
+        if self.current is None:
+            return
+        elapsed = now - self.t0
+        self.elapsed[self.current] = self.elapsed.get(self.current, 0.0) + elapsed
+        emit("timer", self.current, elapsed, **self.tags)
@@ -0,0 +1,79 @@
+# src/instrumentation/sinks.py
+"""Event sinks: an in-process metrics registry and structured JSON lines logs."""
+import json
+import sys
+import threading
+from collections import defaultdict, deque
+
+
+class MetricsRegistry:
+    """
+    Aggregates events in memory: timer statistics per name, counter totals and the last solver statistics.
+    """
+
+    def __init__(self, keep_solves=1000):
+        self._lock = threading.Lock()
+        self.timers = defaultdict(lambda: {"count": 0, "total_s": 0.0, "min_s": float("inf"), "max_s": 0.0})
+        self.counters = defaultdict(float)
+        self.solves = deque(maxlen=keep_solves)
+
+    def emit(self, event):
+        kind, name, value = event["kind"], event["name"], event["value"]
+        with self._lock:
+            if kind == "timer":
+                t = self.timers[name]
+                t["count"] += 1
+                t["total_s"] += value
+                t["min_s"] = min(t["min_s"], value)
+                t["max_s"] = max(t["max_s"], value)
+            elif kind == "counter":
+                self.counters[name] += value
+            elif kind == "solver":
+                self.solves.append(dict(value, **event.get("tags", {})))
+
+    def summary(self):
+        with self._lock:
+            timers = {name: dict(t, mean_s=t["total_s"] / t["count"]) for name, t in self.timers.items()}
+            return {"timers": timers, "counters": dict(self.counters), "solves": len(self.solves)}
+
+    def reset(self):
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+            self.solves.clear()
+
+    def print_summary(self, file=None):
+        # Printed on request, so not affected by quiet mode
+        file = file or sys.stdout
+        s = self.summary()
+        print("\n------------------------------------------------------------------", file=file)
+        print(" phase            |  count |   total ms |    mean ms |     max ms", file=file)
+        print("------------------------------------------------------------------", file=file)
+        for name, t in sorted(s["timers"].items(), key=lambda kv: -kv[1]["total_s"]):
+            print(f" {name:<16} | {t['count']:6d} | {1e3 * t['total_s']:10.2f} | {1e3 * t['mean_s']:10.3f} |"
+                  f" {1e3 * t['max_s']:10.3f}", file=file)
+        print("------------------------------------------------------------------", file=file)
+        for name, value in sorted(s["counters"].items()):
+            print(f" {name}: {value:g}", file=file)
+
+
+class JsonLinesSink:
+    """Writes one JSON object per event to a file path or an open stream."""
+
+    def __init__(self, target=None):
+        self._lock = threading.Lock()
+        if target is None:
+            self._file, self._owned = sys.stderr, False
+        elif hasattr(target, "write"):
+            self._file, self._owned = target, False
+        else:
+            self._file, self._owned = open(target, "a", buffering=1), True
+
+    def emit(self, event):
+        line = json.dumps(event, default=float)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        if self._owned:
+            self._file.close()
@@ -0,0 +1,49 @@
+# src/instrumentation/solver.py
+"""Gurobi solver statistics."""
+from .core import emit, count, enabled
+
+# Model attributes recorded after every instrumented solve, read only when a sink is attached
+SOLVER_ATTRIBUTES = ("Status", "Runtime", "IterCount", "BarIterCount", "NodeCount", "NumVars", "NumConstrs",
+                     "NumQConstrs", "NumNZs", "ObjVal")
+
+
+def solver_stats(m):
+    """Dict of solver statistics of a solved model (attributes that are not available are skipped)."""
+    import gurobipy as gp
+
+    stats = {}
+    for attr in SOLVER_ATTRIBUTES:
+        try:
+            stats[attr] = m.getAttr(attr)
+        except (gp.GurobiError, AttributeError):
+            pass
+    return stats
+
+
+def optimize(m, **tags):
+    """
+    m.optimize() with instrumentation: an "optimize" timer, solve counters and solver statistics.
+    With a sink attached, a presolve callback also records how many rows and columns presolve removed.
+    """
+    if not enabled():
+        m.optimize()
+        return
+
+    import gurobipy as gp
+    from gurobipy import GRB
+
+    presolve = {}
+
+    def callback(model, where):
+        if where == GRB.Callback.PRESOLVE:
+            presolve["presolve_removed_cols"] = model.cbGet(GRB.Callback.PRE_COLDEL)
+            presolve["presolve_removed_rows"] = model.cbGet(GRB.Callback.PRE_ROWDEL)
+
+    m.optimize(callback)
+    stats = solver_stats(m)
+    stats.update(presolve)
+    emit("timer", "optimize", stats.get("Runtime", 0.0), **tags)
+    emit("solver", m.ModelName, stats, **tags)
+    count("solves", **tags)
+    if stats.get("Status") != GRB.OPTIMAL:
+        count("solves_not_optimal", **tags)
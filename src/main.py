@@ -1,5 +1,7 @@
 #%% Imports
 
+import argparse
+import sys
 from data_ops import DataLoader
 from pathlib import Path
 import pandas as pd
@@ -9,14 +11,52 @@ from utils import run_epsilon_constraint
 from runner import Runner
 from utils import make_scenarios
 from utils import make_scenarios_battery
-from copy import deepcopy
-from data_ops import plot_single_scenario
+from utils import SolveCache
+from opt_model import open_env, close_env
+from instrumentation import set_quiet, is_quiet
 
 
+# --- Summary of a scenario result (same output as build_and_solve / build_and_solve_multi_objective) ---
+def print_summary(res, battery=False):
+    if res is None:
+        print("Optimization was not successful")
+        return
+    if res.get("status") == "error":
+        print(f"Failed: {res['error']}")
+        return
+    if not is_quiet():
+        T = len(res["p_load"])
+        total_pv_used = sum(res["p_pv"]) - sum(res["p_export"])
+        print("\n -- Energy Summary -- ")
+        print(f"Total energy consumed by load: {sum(res['p_load']):.4f} kWh/day")
+        print(f"Imported from grid: {sum(res['p_import']):.4f} kWh/day")
+        print(f"From PV: {total_pv_used:.4f} kWh/day")
+        if battery:
+            print(f"Battery discharge: {sum(res['p_dis']):.4f} kWh/day")
+            print(f"Battery charge: {sum(res['p_ch']):.4f} kWh/day")
+
+        # Duals in the row order of the parametric model (see opt_model.matrix_builder):
+        # min_energy: power_balance, energy_min
+        # battery: init_soc, terminal_soc, soc_balance[1..T-1], discomfort_balance, power_balance, epsilon
+        duals = res.get("duals")
+        if battery:
+            for t in range(T):
+                if duals is None:
+                    print(f"lambda[{t}] = (no dual value)")
+                else:
+                    print(f"lambda[{t}] = {duals[2 * T + 1 + t]:.4f}")
+            if duals is not None:
+                for t in range(1, T):
+                    print(f"soc_balance[{t}] dual = {duals[1 + t]:.4f}")
+        elif duals is not None:
+            for t in range(T):
+                print(f"lambda[{t}] = {duals[t]:.4f}")
+            print(f"eta (min daily energy) = {duals[T]:.4f}")
+    print(f"Min cost: {res['obj']:.4f} DKK")
 
 
 # --- Main function to control execution ---
-def main(question_flag="1.c"):
+def main(question_flag="1.a", cache_dir=None):
     # Set data file prefix based on the flag
     if question_flag == "1.a":
         data_prefix = "question_1a"
@@ -47,6 +87,9 @@ def main(question_flag="1.c"):
         else:
             df_data[name] = content
 
+    # Repeated solves of the same model are served from the cache, shared on disk between runs only with cache_dir
+    cache = SolveCache(maxsize=256, cache_dir=cache_dir)
+
     # Execute the selected problem
     if question_flag == "1.a":
         # Run original single-objective problem
@@ -54,37 +97,19 @@ def main(question_flag="1.c"):
         optmodel.build_and_solve()
 
         scenarios = make_scenarios(df_data["bus_params"])
-        runner = Runner(df_data, scenarios)
-        results = runner.run_scenario_analysis()
-
-
-
-        scenarios = make_scenarios(df_data["bus_params"])
-        runner = Runner(df_data, scenarios)
+        runner = Runner(df_data, scenarios, cache=cache)
         results = runner.run_scenario_analysis()
-        all_results = {}
-        for name, sc in scenarios.items():
-            modified_data = deepcopy(df_data)
-            bus_df = modified_data["bus_params"]
-
-            # overwrite the paramameters that we want to change
-            for key, val in sc.items():
-                bus_df.at[0, key] = val
-
+        for name, res in results.items():
             print(f"\n---{name} ---")
+            # Energy summary and duals of the scenario, from the Runner result (no second solve)
+            print_summary(res)
 
-            model = OptModel(modified_data)
-            res = model.build_and_solve()
-            all_results[name] = res
+        cache.print_stats()
 
 
     elif question_flag == "1.b":
-        # Run new multi-objective problem
-        #run_epsilon_constraint(df_data)
-        current_model = OptModel(df_data)
-        result = current_model.build_and_solve_multi_objective(
-            mode="epsilon",
-            epsilon_discomfort= run_epsilon_constraint(df_data))
+        # Run new multi-objective problem, one warm-started model for the whole Pareto front
+        frontier = run_epsilon_constraint(df_data)
         
     
     elif question_flag == "1.c":
@@ -94,34 +119,60 @@ def main(question_flag="1.c"):
             epsilon_discomfort=0)
         
         scenarios = make_scenarios_battery(df_data["bus_params"])
-        runner = Runner(df_data, scenarios)
+        runner = Runner(df_data, scenarios, cache=cache)
         results = runner.run_scenario_analysis_battery()
-        all_results = {}
-        for name, sc in scenarios.items():
-            modified_data = deepcopy(df_data)
-            bus_df = modified_data["bus_params"]
-
-            # overwrite the paramameters that we want to change
-            for key, val in sc.items():
-                bus_df.at[0, key] = val
+        for name, res in results.items():
             print(f"\n--- {name} ---")
-            # solve
-            epsilon_val = sc.get("epsilon",0)
-            model = OptModel(modified_data)
-            res = model.build_and_solve_multi_objective(
-                mode="battery",
-                epsilon_discomfort=epsilon_val)
-            all_results[name] = res
+            # Energy summary and duals of the scenario, from the Runner result (no second solve)
+            print_summary(res, battery=True)
+
+        cache.print_stats()
         
 
 
+# --- Command line ---
+def cli(argv=None):
+    """
+    python main.py                                  # Question 1.a
+    python main.py --question 1.b                   # Question 1.b (same for 1.c)
+    python main.py --question 1.c --cache-dir ../processed_data/solve_cache   # keep solves on disk between runs
+    python main.py --config ../configs/battery_tariff_grid.json --quiet      # scenario batch of a config file
+    """
+    parser = argparse.ArgumentParser(description=cli.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--question", default="1.a", choices=["1.a", "1.b", "1.c"])
+    parser.add_argument("--config", help="JSON/YAML batch config, overrides --question")
+    parser.add_argument("--quiet", action="store_true", help="No Gurobi log and no summaries")
+    parser.add_argument("--threads", type=int, default=None, help="Threads of the shared Gurobi environment")
+    parser.add_argument("--cache-dir", help="Keep the solve cache on disk in this directory (off by default)")
+    args = parser.parse_args(argv)
+
+    if args.quiet:
+        set_quiet(True)
+
+    if args.config:
+        runner = Runner.from_config(args.config)
+        if args.threads is not None:
+            runner.config["env_params"]["Threads"] = args.threads
+        results = runner.run()
+        errors = [name for name, res in results.items() if isinstance(res, dict) and res.get("status") == "error"]
+        return 1 if errors else 0
+
+    # All models of the run share one Gurobi environment (one license check)
+    open_env({} if args.threads is None else {"Threads": args.threads})
+    try:
+        main(question_flag=args.question, cache_dir=args.cache_dir)
+    finally:
+        close_env()
+    return 0
+
+
 # %% Execution
 if __name__ == "__main__":
-    # To switch exercises, simply change the flag below:
-    # Use "1.a" for the original cost minimization problem
-    # Use "1.b" for the new epsilon-constraint problem
-    # Use "1.c" for the battery installation problem
+    # To switch exercises, pass --question:
+    # "1.a" for the original cost minimization problem
+    # "1.b" for the new epsilon-constraint problem
+    # "1.c" for the battery installation problem
 
-    main(question_flag="1.a")
+    sys.exit(cli())
 
  
\ No newline at end of file
@@ -1 +1,38 @@
-from .opt_model import OptModel
\ No newline at end of file
+# Submodules are imported on first use of one of their names (see data_ops/__init__.py)
+_EXPORTS = {
+    "OptModel": ".opt_model",
+    "ParetoSweep": ".pareto",
+    "ParetoFrontier": ".pareto",
+    "ParetoPoint": ".pareto",
+    "BatchOptModel": ".batch",
+    "RollingHorizon": ".rolling_horizon",
+    "solve_merit_order": ".merit_order",
+    "solve_merit_order_params": ".merit_order",
+    "get_backend": ".backends",
+    "GurobiBackend": ".backends",
+    "HighsBackend": ".backends",
+    "extract_arrays": ".extraction",
+    "get_array": ".extraction",
+    "price_and_tariff_ranges": ".extraction",
+    "WhatIf": ".what_if",
+    "StochasticOptModel": ".stochastic",
+    "reduce_scenarios": ".stochastic",
+    "BatterySizing": ".battery_sizing",
+    "open_env": ".environment",
+    "get_env": ".environment",
+    "close_env": ".environment",
+}
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,156 @@
+# src/opt_model/backends.py
+"""
+Solver backends for the matrix-form models (see matrix_builder.MatrixLP).
+
+Every backend takes a MatrixLP and returns the same results dict as OptModel.solve_parametric():
+objective, one list per variable group, discomfort and the constraint duals in the model's constraint
+order with Gurobi's sign convention (Pi = d objective / d rhs).
+
+    "gurobi": gurobipy, needs a license, supports every formulation
+    "highs":  HiGHS through scipy.optimize.linprog, free, LP only (modes min_energy, cost_only,
+              battery and epsilon with discomfort_formulation "l1" or "pwl")
+"""
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from .matrix_builder import discomfort_value
+from instrumentation import report, apply_output_flag, optimize, emit
+
+
+class SolverBackend:
+    """Interface of a solver backend."""
+    name = None
+
+    def solve(self, lp, p_ref=None, solver_params=None):
+        raise NotImplementedError
+
+    def _results(self, lp, obj, x, duals, p_ref, timings=None):
+        groups = {name: x[lp.slices[name]] for name in lp.var_names}
+        results = {"obj": float(obj)}
+        for name, values in groups.items():
+            results[name] = values.tolist()
+        discomfort = discomfort_value(lp, groups, p_ref)
+        if discomfort is not None:
+            results["discomfort"] = discomfort
+        results["duals"] = None if duals is None else list(map(float, duals))
+        results["backend"] = self.name
+        results["timings"] = timings or {}
+        return results
+
+
+class GurobiBackend(SolverBackend):
+    name = "gurobi"
+
+    def __init__(self, env=None):
+        self.env = env
+
+    def solve(self, lp, p_ref=None, solver_params=None):
+        import gurobipy as gp
+        from gurobipy import GRB
+        from .matrix_builder import build_gurobi
+
+        t0 = time.perf_counter()
+        from .environment import get_env
+
+        m = gp.Model(f"Consumer_{lp.mode}", env=self.env if self.env is not None else get_env())
+        try:
+            apply_output_flag(m)
+            for name, value in (solver_params or {}).items():
+                m.setParam(name, value)
+            if lp.discomfort_formulation == "nonconvex":
+                m.params.NonConvex = 2
+            if lp.quadratic is not None or lp.cone is not None:
+                m.params.QCPDual = 1
+            m.ModelSense = GRB.MINIMIZE
+            vars, _ = build_gurobi(m, lp)
+            m.update()
+            t1 = time.perf_counter()
+            optimize(m, method="backend", backend=self.name, mode=lp.mode)
+            t2 = time.perf_counter()
+            if m.status != GRB.OPTIMAL:
+                report(f"Optimization of {m.ModelName} was not successful")
+                return None
+
+            x = np.concatenate([vars[name].X for name in lp.var_names])
+            try:
+                duals = m.getAttr("Pi", m.getConstrs())
+            except gp.GurobiError:
+                duals = None
+            return self._results(lp, m.ObjVal, x, duals, p_ref,
+                                 {"build_s": t1 - t0, "solve_s": t2 - t1, "extract_s": time.perf_counter() - t2})
+        finally:
+            m.dispose()
+
+
+class HighsBackend(SolverBackend):
+    """HiGHS dual simplex / IPM through scipy.optimize.linprog, no license needed."""
+    name = "highs"
+
+    def solve(self, lp, p_ref=None, solver_params=None):
+        from scipy.optimize import linprog
+
+        if lp.quadratic is not None or lp.cone is not None:
+            raise NotImplementedError(
+                "The HiGHS backend solves LPs only, use discomfort_formulation='l1' or 'pwl' for mode epsilon")
+
+        t0 = time.perf_counter()
+        # Split the blocks into equality rows and <= rows, >= rows are negated
+        eq_rows, eq_rhs, ub_rows, ub_rhs, row_map = [], [], [], [], []
+        n_eq = n_ub = 0
+        for block in lp.blocks:
+            size = len(block.rhs)
+            if block.sense == "=":
+                row_map.append(("eq", n_eq, size, 1.0))
+                eq_rows.append(block.A)
+                eq_rhs.append(block.rhs)
+                n_eq += size
+            else:
+                sign = 1.0 if block.sense == "<" else -1.0
+                row_map.append(("ub", n_ub, size, sign))
+                ub_rows.append(sign * block.A)
+                ub_rhs.append(sign * block.rhs)
+                n_ub += size
+
+        options = {"presolve": True}
+        options.update(solver_params or {})
+        A_ub = sp.vstack(ub_rows, format="csr") if ub_rows else None
+        b_ub = np.concatenate(ub_rhs) if ub_rhs else None
+        A_eq = sp.vstack(eq_rows, format="csr") if eq_rows else None
+        b_eq = np.concatenate(eq_rhs) if eq_rhs else None
+        bounds = np.column_stack([lp.lb, lp.ub])
+        t1 = time.perf_counter()
+        res = linprog(lp.obj, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, bounds=bounds,
+                      method="highs", options=options)
+        t2 = time.perf_counter()
+        emit("timer", "optimize", t2 - t1, method="backend", backend=self.name, mode=lp.mode)
+        if res.status != 0:
+            report(f"HiGHS optimization of {lp.mode} was not successful: {res.message}")
+            return None
+
+        # Duals back in block order, linprog marginals are d objective / d b like Gurobi's Pi
+        duals = []
+        for kind, start, size, sign in row_map:
+            if kind == "eq":
+                duals.append(res.eqlin.marginals[start:start + size])
+            else:
+                duals.append(sign * res.ineqlin.marginals[start:start + size])
+        duals = np.concatenate(duals) if duals else np.zeros(0)
+        return self._results(lp, res.fun, res.x, duals, p_ref,
+                             {"build_s": t1 - t0, "solve_s": t2 - t1, "extract_s": time.perf_counter() - t2})
+
+
+BACKENDS = {
+    "gurobi": GurobiBackend,
+    "highs": HighsBackend,
+}
+
+
+def get_backend(backend="gurobi", **kwargs):
+    """Backend instance from a name (or pass through an instance)."""
+    if isinstance(backend, SolverBackend):
+        return backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown solver backend {backend}, use one of {sorted(BACKENDS)}")
+    return BACKENDS[backend](**kwargs)
@@ -0,0 +1,151 @@
+# src/opt_model/batch.py
+import numpy as np
+import scipy.sparse as sp
+import gurobipy as gp
+from gurobipy import GRB
+
+from .opt_model import OptModel
+from .matrix_builder import assemble_lp
+from .environment import get_env
+from instrumentation import report, apply_output_flag, optimize, timer
+
+
+class BatchOptModel:
+    """
+    Solve many independent consumers in one call.
+
+    Every consumer is assembled in matrix form (see matrix_builder) and up to chunk_size consumers are
+    stacked into one block-diagonal Gurobi model, so the fixed per-model overhead (environment, model
+    creation, presolve setup) is paid once per chunk instead of once per household.
+    All consumers in a batch must have the same horizon.
+
+    Example:
+        consumers = [data for _, data in split_consumers(df_data)]
+        out = BatchOptModel(consumers).solve(mode="battery", epsilon_discomfort=3.0)
+        out["primal"].shape  # (consumers, hours, variables)
+    """
+
+    def __init__(self, consumers, consumer_ids=None, solver_params=None, chunk_size=500, env=None):
+        self.consumers = list(consumers)
+        self.env = env
+        self.consumer_ids = list(consumer_ids) if consumer_ids is not None else list(range(len(self.consumers)))
+        self.solver_params = dict(solver_params or {})
+        self.chunk_size = max(1, int(chunk_size))
+
+    def _assemble(self, mode, epsilon):
+        lps, p_refs = [], []
+        for i, data in enumerate(self.consumers):
+            params = OptModel(data).get_parameters()
+            eps = epsilon[i] if epsilon is not None else None
+            lps.append(assemble_lp(params, mode, eps))
+            p_refs.append(params["p_ref"])
+        self.p_ref = p_refs
+
+        n_hours = {lp.n_hours for lp in lps}
+        if len(n_hours) > 1:
+            raise ValueError(f"All consumers in a batch need the same horizon, got {sorted(n_hours)}")
+        return lps
+
+    def _solve_chunk(self, lps, mode):
+        """Solve one block-diagonal model for a chunk of consumers, return x per consumer and duals per block."""
+        m = gp.Model(f"Consumer_Batch_{mode}", env=self.env if self.env is not None else get_env())
+        apply_output_flag(m)
+        for name, value in self.solver_params.items():
+            m.setParam(name, value)
+        if mode == "epsilon":
+            m.params.NonConvex = 2
+            m.params.QCPDual = 1
+
+        x = m.addMVar(sum(lp.n_vars for lp in lps),
+                      lb=np.concatenate([lp.lb for lp in lps]),
+                      ub=np.concatenate([lp.ub for lp in lps]),
+                      obj=np.concatenate([lp.obj for lp in lps]),
+                      name="x")
+        m.ModelSense = GRB.MINIMIZE
+
+        # One block-diagonal MConstr per constraint block, consumers stacked along the rows
+        constraints = {}
+        for block in lps[0].blocks:
+            rows = [lp.block(block.name) for lp in lps]
+            constraints[block.name] = m.addMConstr(
+                sp.block_diag([r.A for r in rows], format="csr"), x, block.sense,
+                np.concatenate([r.rhs for r in rows]), name=block.name)
+
+        n_vars = lps[0].n_vars
+        if lps[0].quadratic is not None:
+            for k, lp in enumerate(lps):
+                q = lp.quadratic
+                s = lp.slices[q.var]
+                v = x[k * n_vars + s.start:k * n_vars + s.stop]
+                m.addConstr(v @ v + q.linear @ v <= q.rhs, name=f"{q.name}[{k}]")
+
+        optimize(m, method="batch", mode=mode, consumers=len(lps))
+        if m.status != GRB.OPTIMAL:
+            report(f"Optimization of {m.ModelName} was not successful")
+            return None, None
+
+        # Every consumer has the same variable layout, so x is a (consumers, variables) array
+        xs = x.X.reshape(len(lps), n_vars)
+        duals = {}
+        try:
+            for name, constr in constraints.items():
+                duals[name] = constr.Pi.reshape(len(lps), -1)
+        except gp.GurobiError:
+            duals = None
+        return xs, duals
+
+    def solve(self, mode="min_energy", epsilon_discomfort=None):
+        """
+        Solve all consumers and return stacked NumPy arrays:
+
+            "consumer_ids": consumer ids in batch order
+            "variables":    names of the last axis of "primal"
+            "primal":       (consumers, hours, variables)
+            "obj":          (consumers,) cost of each consumer
+            "discomfort":   (consumers,) for the discomfort modes
+            "duals":        {constraint block: (consumers, rows)}
+
+        epsilon_discomfort can be one value for all consumers or one value per consumer.
+        Consumers of a chunk that could not be solved are NaN.
+        """
+        N = len(self.consumers)
+        epsilon = None
+        if epsilon_discomfort is not None:
+            epsilon = np.broadcast_to(np.asarray(epsilon_discomfort, dtype=float), (N,))
+
+        with timer("assemble", method="batch", mode=mode, consumers=N):
+            lps = self._assemble(mode, epsilon)
+        first = lps[0]
+        T = first.n_hours
+        names = first.var_names
+
+        primal = np.full((N, T, len(names)), np.nan)
+        obj = np.full(N, np.nan)
+        duals = {b.name: np.full((N, len(b.rhs)), np.nan) for b in first.blocks}
+
+        for start in range(0, N, self.chunk_size):
+            chunk = lps[start:start + self.chunk_size]
+            xs, chunk_duals = self._solve_chunk(chunk, mode)
+            if xs is None:
+                continue
+            stop = start + len(chunk)
+            obj[start:stop] = np.einsum("ij,ij->i", np.array([lp.obj for lp in chunk]), xs)
+            # (consumers, groups * hours) -> (consumers, hours, groups)
+            primal[start:stop] = xs.reshape(len(chunk), len(names), T).transpose(0, 2, 1)
+            if chunk_duals is not None:
+                for name, values in chunk_duals.items():
+                    duals[name][start:stop] = values
+
+        out = {
+            "consumer_ids": self.consumer_ids,
+            "variables": names,
+            "primal": primal,
+            "obj": obj,
+            "duals": duals,
+        }
+        if mode == "battery":
+            out["discomfort"] = primal[:, :, names.index("s_pos")].sum(axis=1) + primal[:, :, names.index("s_neg")].sum(axis=1)
+        elif mode in ("cost_only", "epsilon"):
+            p_ref = np.asarray(self.p_ref, dtype=float)
+            out["discomfort"] = np.sum((primal[:, :, names.index("p_load")] - p_ref) ** 2, axis=1)
+        return out
@@ -0,0 +1,278 @@
+# src/opt_model/battery_sizing.py
+"""
+Battery sizing by Benders decomposition over many days of operation.
+
+The battery capacity C (kWh), and with size_power=True a charge/discharge power limit P (kW), become
+decisions. The problem
+
+    min  capacity_cost * C + power_cost * P + sum_d Q_d(C, P)
+
+is split into a small master problem over (C, P) and one operational subproblem per day. Q_d is the
+battery model of Q1.c (see matrix_builder.assemble_lp, mode "battery") for the prices / PV / reference
+load of day d, where E_bat <= C, the power limits and the initial / terminal state of charge are written
+in terms of a sizing variable that is fixed to the current master proposal. The dual of that fixing
+constraint is a subgradient of Q_d, so every subproblem returns the cut
+
+    theta_d >= Q_d(C_k, P_k) + g_d * (C - C_k) + h_d * (P - P_k)
+
+The day models are built once and every iteration only changes the right-hand sides of the fixing
+constraints. They are solved in a thread pool with one Gurobi environment per thread (environments are not
+thread safe, Gurobi releases the GIL while optimizing). The master is a small LP in the main environment.
+
+Example:
+    sizing = BatterySizing(df_data, prices=year_prices, pv_max=year_pv, capacity_cost=0.8, max_capacity=20)
+    out = sizing.run()
+    out["capacity_kWh"], out["total_cost"], out["gap"]
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import gurobipy as gp
+from gurobipy import GRB
+
+from .opt_model import OptModel
+from .environment import get_env
+from .matrix_builder import assemble_lp, build_gurobi
+from instrumentation import report, is_quiet, apply_output_flag, optimize
+
+
+def _daily(values, n_days, T, name):
+    """(days, T) array from a (days, T) array, a series of days * T values or one daily profile."""
+    arr = np.asarray(values, dtype=float)
+    if arr.ndim == 1 and arr.shape == (T,):
+        arr = np.tile(arr, (n_days, 1))
+    elif arr.ndim == 1:
+        arr = arr.reshape(-1, T) if arr.size % T == 0 else arr
+    if arr.shape != (n_days, T):
+        raise ValueError(f"{name} needs {n_days} days of {T} hours, got shape {np.shape(values)}")
+    return arr
+
+
+class _DayModel:
+    """Battery model of one day with the sizing decisions as fixed variables."""
+
+    def __init__(self, env, params, epsilon, soc_ratio, size_power, solver_params):
+        lp = assemble_lp(params, "battery", epsilon)
+        m = gp.Model("Battery_Sizing_Day", env=env)
+        apply_output_flag(m)
+        for name, value in solver_params.items():
+            m.setParam(name, value)
+        m.ModelSense = GRB.MINIMIZE
+        vars, constraints = build_gurobi(m, lp)
+
+        T = lp.n_hours
+        storage = params["storage"]
+        cap = m.addMVar(1, name="capacity")
+        for name in ("E_bat", "p_ch", "p_dis"):
+            vars[name].UB = np.full(T, np.inf)
+        # The state of charge and the power limits scale with the capacity
+        m.addConstr(vars["E_bat"] - np.ones((T, 1)) @ cap <= 0, name="capacity_limit")
+        constraints["init_soc"].RHS = np.zeros(1)
+        constraints["terminal_soc"].RHS = np.zeros(1)
+        m.update()
+        m.chgCoeff(constraints["init_soc"].tolist()[0], cap.tolist()[0], -soc_ratio)
+        m.chgCoeff(constraints["terminal_soc"].tolist()[0], cap.tolist()[0], -soc_ratio)
+        self.fix = {"capacity": m.addConstr(cap == 0.0, name="fix_capacity")}
+
+        if size_power:
+            power = m.addMVar(1, name="power")
+            m.addConstr(vars["p_ch"] - np.ones((T, 1)) @ power <= 0, name="charge_limit")
+            m.addConstr(vars["p_dis"] - np.ones((T, 1)) @ power <= 0, name="discharge_limit")
+            self.fix["power"] = m.addConstr(power == 0.0, name="fix_power")
+        else:
+            m.addConstr(vars["p_ch"] - storage["max_charging_power_ratio"] * np.ones((T, 1)) @ cap <= 0,
+                        name="charge_limit")
+            m.addConstr(vars["p_dis"] - storage["max_discharging_power_ratio"] * np.ones((T, 1)) @ cap <= 0,
+                        name="discharge_limit")
+        m.update()
+        self.model = m
+        self.vars = vars
+
+    def solve(self, sizing):
+        """(cost, {decision: subgradient}) of the day at the given sizing."""
+        for name, constr in self.fix.items():
+            constr.RHS = np.array([sizing[name]])
+        optimize(self.model, method="battery_sizing")
+        if self.model.status != GRB.OPTIMAL:
+            raise RuntimeError(f"Battery sizing day model is not optimal (status {self.model.status})")
+        return self.model.ObjVal, {name: float(constr.Pi[0]) for name, constr in self.fix.items()}
+
+
+class BatterySizing:
+    """Benders decomposition of the battery sizing problem, see the module docstring."""
+
+    def __init__(self, df_data, prices, pv_max, p_ref=None, capacity_cost=1.0, power_cost=0.0,
+                 max_capacity=50.0, max_power=None, size_power=False, epsilon_discomfort=0,
+                 multi_cut=True, n_workers=None, solver_params=None):
+        """
+        Args:
+            prices / pv_max / p_ref: (days, 24) arrays or series of days * 24 values, p_ref defaults to the
+                daily reference profile of the data
+            capacity_cost / power_cost: investment cost in DKK per kWh / kW over the whole horizon
+                (e.g. the annualised cost when a year of days is given)
+            size_power: also size a power limit P (kW) for charging and discharging, otherwise the power
+                stays a fixed ratio of the capacity as in the storage data
+            multi_cut: one cut per day and iteration (fewer iterations) instead of one aggregated cut
+        """
+        self.params = OptModel(df_data).get_parameters()
+        if self.params["storage"] is None:
+            raise ValueError("Battery sizing needs data with a storage unit (question_1c)")
+        T = len(self.params["energy_price_DKK_per_kWh"])
+        prices = np.asarray(prices, dtype=float)
+        n_days = prices.shape[0] if prices.ndim == 2 else prices.size // T
+        self.prices = _daily(prices, n_days, T, "prices")
+        self.pv_max = _daily(pv_max, n_days, T, "pv_max")
+        self.p_ref = _daily(self.params["p_ref"] if p_ref is None else p_ref, n_days, T, "p_ref")
+        self.n_days = n_days
+
+        self.capacity_cost = float(capacity_cost)
+        self.power_cost = float(power_cost)
+        self.max_capacity = float(max_capacity)
+        self.size_power = size_power
+        storage = self.params["storage"]
+        if max_power is None:
+            max_power = max(storage["max_charging_power_ratio"], storage["max_discharging_power_ratio"]) * self.max_capacity
+        self.max_power = float(max_power)
+        self.epsilon_discomfort = epsilon_discomfort
+        self.soc_ratio = self.params["initial_soc_kWh"] / storage["storage_capacity_kWh"]
+        self.multi_cut = multi_cut
+        self.n_workers = max(1, min(n_workers or os.cpu_count() or 1, n_days))
+        self.solver_params = dict(solver_params or {})
+        self._envs = []
+        self._groups = []
+
+    # --- Subproblems ---
+    def _new_env(self):
+        env = gp.Env(empty=True)
+        if is_quiet():
+            env.setParam("OutputFlag", 0)
+        env.start()
+        self._envs.append(env)
+        return env
+
+    def _build_days(self):
+        """Build every day model once, grouped by worker thread, each group in its own environment."""
+        # Single-threaded solves, the parallelism comes from the thread pool
+        solver_params = {"Threads": 1, **self.solver_params}
+        days = np.array_split(np.arange(self.n_days), self.n_workers)
+        self._groups = []
+        for group in days:
+            env = self._new_env()
+            models = []
+            for d in group:
+                params = dict(self.params, energy_price_DKK_per_kWh=self.prices[d], pv_max=self.pv_max[d],
+                              p_ref=self.p_ref[d])
+                models.append(_DayModel(env, params, self.epsilon_discomfort, self.soc_ratio, self.size_power,
+                                        solver_params))
+            self._groups.append((group, models))
+
+    def _solve_days(self, pool, sizing):
+        """(costs, subgradients) of every day at the given sizing, arrays of shape (days,) and (days, decisions)."""
+        def run(group_models):
+            return [model.solve(sizing) for model in group_models[1]]
+
+        costs = np.zeros(self.n_days)
+        grads = np.zeros((self.n_days, len(sizing)))
+        for (group, _), out in zip(self._groups, pool.map(run, self._groups)):
+            for d, (cost, grad) in zip(group, out):
+                costs[d] = cost
+                grads[d] = [grad[name] for name in sizing]
+        return costs, grads
+
+    # --- Master ---
+    def _build_master(self):
+        m = gp.Model("Battery_Sizing_Master", env=get_env())
+        apply_output_flag(m)
+        m.ModelSense = GRB.MINIMIZE
+        decisions = {"capacity": m.addVar(ub=self.max_capacity, obj=self.capacity_cost, name="capacity")}
+        if self.size_power:
+            decisions["power"] = m.addVar(ub=self.max_power, obj=self.power_cost, name="power")
+        n_theta = self.n_days if self.multi_cut else 1
+        theta = m.addMVar(n_theta, lb=-np.inf, obj=1.0, name="theta")
+        return m, decisions, theta
+
+    def _add_cuts(self, master, decisions, theta, sizing, costs, grads):
+        names = list(sizing)
+        if self.multi_cut:
+            for d in range(self.n_days):
+                master.addConstr(theta[d] >= costs[d] + gp.quicksum(
+                    grads[d, i] * (decisions[name] - sizing[name]) for i, name in enumerate(names)))
+        else:
+            total = grads.sum(axis=0)
+            master.addConstr(theta[0] >= costs.sum() + gp.quicksum(
+                total[i] * (decisions[name] - sizing[name]) for i, name in enumerate(names)))
+
+    def _investment(self, sizing):
+        return self.capacity_cost * sizing["capacity"] + self.power_cost * sizing.get("power", 0.0)
+
+    def run(self, max_iterations=50, tolerance=1e-4, initial_capacity=None):
+        """
+        Run Benders iterations until the relative gap between the upper bound (best evaluated sizing) and
+        the lower bound (master objective) is below tolerance.
+        """
+        t_start = time.perf_counter()
+        self._build_days()
+        build_time = time.perf_counter() - t_start
+        master, decisions, theta = self._build_master()
+
+        sizing = {"capacity": self.max_capacity / 2 if initial_capacity is None else float(initial_capacity)}
+        if self.size_power:
+            sizing["power"] = self.max_power / 2
+
+        history = []
+        best = None
+        lower = -np.inf
+        try:
+            with ThreadPoolExecutor(max_workers=self.n_workers) as pool:
+                for iteration in range(1, max_iterations + 1):
+                    costs, grads = self._solve_days(pool, sizing)
+                    total = self._investment(sizing) + costs.sum()
+                    if best is None or total < best["total_cost"]:
+                        best = {"sizing": dict(sizing), "total_cost": total, "daily_costs": costs}
+                    self._add_cuts(master, decisions, theta, sizing, costs, grads)
+
+                    optimize(master, method="battery_sizing_master")
+                    if master.status != GRB.OPTIMAL:
+                        raise RuntimeError(f"Battery sizing master is not optimal (status {master.status})")
+                    lower = master.ObjVal
+                    upper = best["total_cost"]
+                    gap = (upper - lower) / max(1.0, abs(upper))
+                    history.append({"iteration": iteration, **sizing, "lower_bound": lower, "upper_bound": upper,
+                                    "gap": gap})
+                    if not is_quiet():
+                        report(f"Benders iteration {iteration}: capacity {sizing['capacity']:.3f} kWh, "
+                               f"bounds [{lower:.4f}, {upper:.4f}], gap {100 * gap:.4f}%")
+                    if gap <= tolerance:
+                        break
+                    sizing = {name: var.X for name, var in decisions.items()}
+        finally:
+            master.dispose()
+            self.close()
+
+        sizing = best["sizing"]
+        return {
+            "capacity_kWh": sizing["capacity"],
+            "power_kW": sizing.get("power"),
+            "investment_cost": self._investment(sizing),
+            "operating_cost": float(best["daily_costs"].sum()),
+            "total_cost": best["total_cost"],
+            "daily_costs": best["daily_costs"],
+            "lower_bound": lower,
+            "upper_bound": best["total_cost"],
+            "gap": history[-1]["gap"],
+            "iterations": len(history),
+            "history": history,
+            "build_time_s": build_time,
+            "wall_time_s": time.perf_counter() - t_start,
+        }
+
+    def close(self):
+        """Dispose the day models and their environments."""
+        for _, models in self._groups:
+            for model in models:
+                model.model.dispose()
+        for env in self._envs:
+            env.dispose()
+        self._groups, self._envs = [], []
@@ -0,0 +1,50 @@
+# src/opt_model/environment.py
+"""
+Process-wide pooled Gurobi environment.
+
+Without an env, gp.Model() uses Gurobi's default environment. After open_env() every model built by
+OptModel, BatchOptModel, StochasticOptModel, BatterySizing (master) and GurobiBackend uses one shared,
+pre-configured environment instead, so the license check and the environment setup are paid once per
+process and not once per solve.
+
+    open_env({"Threads": 1})   # OutputFlag=0 when instrumentation is quiet, which also hides the license banner
+    ...                        # build and solve models
+    close_env()
+
+Model-level solver_params are still applied on top of the environment parameters.
+"""
+import gurobipy as gp
+
+from instrumentation import is_quiet
+
+_shared = {"env": None, "params": None}
+
+
+def open_env(params=None, quiet=None):
+    """Start the shared environment (or return the running one if it has the same parameters)."""
+    params = dict(params or {})
+    quiet = is_quiet() if quiet is None else quiet
+    if quiet:
+        params.setdefault("OutputFlag", 0)
+    if _shared["env"] is not None:
+        if params == _shared["params"]:
+            return _shared["env"]
+        close_env()
+
+    env = gp.Env(empty=True)
+    for name, value in params.items():
+        env.setParam(name, value)
+    env.start()
+    _shared["env"], _shared["params"] = env, params
+    return env
+
+
+def get_env():
+    """The shared environment, or None (Gurobi's default environment) if open_env() was not called."""
+    return _shared["env"]
+
+
+def close_env():
+    if _shared["env"] is not None:
+        _shared["env"].dispose()
+    _shared["env"], _shared["params"] = None, None
@@ -0,0 +1,136 @@
+# src/opt_model/extraction.py
+"""
+Bulk extraction of solved Gurobi models into NumPy arrays.
+
+Every attribute is read with one getAttr call per variable group / constraint block (MVar, MConstr,
+tupledict or list of Var/Constr), instead of one .X / .Pi per element.
+
+With sensitivity=True the LP ranging information is added:
+    obj ranges  (SAObjLow/SAObjUp) of the p_import / p_export cost coefficients
+    rhs ranges  (SARHSLow/SARHSUp) of energy_min and the (linear) epsilon constraint
+and the ranges are translated into how far one hour's price or a tariff can move before the optimal basis
+changes (see price_and_tariff_ranges). Within these ranges the primal solution stays optimal and the new
+cost follows directly from it, so tariff "what if" questions need no re-solve.
+"""
+import numpy as np
+import gurobipy as gp
+
+# Cost coefficients and right-hand sides that get ranging information
+SA_VARIABLES = ("p_import", "p_export")
+SA_CONSTRAINTS = ("energy_min", "epsilon", "Epsilon_Constraint")
+
+
+def _elements(group):
+    """List of Var/Constr of a group, None if the group is an MVar/MConstr (read in bulk directly)."""
+    if isinstance(group, (gp.MVar, gp.MConstr)):
+        return None
+    if isinstance(group, dict):
+        return list(group.values())
+    if isinstance(group, (list, tuple)):
+        return list(group)
+    return [group]
+
+
+def get_array(m, attr, group):
+    """Attribute of every element of a group as a float array."""
+    elements = _elements(group)
+    if elements is None:
+        return np.asarray(group.getAttr(attr), dtype=float).ravel()
+    return np.asarray(m.getAttr(attr, elements), dtype=float)
+
+
+def _is_lp(m):
+    return m.IsMIP == 0 and m.IsQP == 0 and m.IsQCP == 0
+
+
+def _hundred_percent(obj, low, up, direction):
+    """
+    Largest uniform change delta (down, up) of coefficients c_i + d_i * delta that keeps the basis optimal,
+    by the 100% rule: the sum of the used fractions of the individual ranges stays <= 1. Conservative
+    when several coefficients move at once, exact for a single coefficient.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        room_up, room_down = up - obj, obj - low
+        use_up = np.where(direction > 0, direction / room_up, np.where(direction < 0, -direction / room_down, 0.0))
+        use_down = np.where(direction > 0, direction / room_down, np.where(direction < 0, -direction / room_up, 0.0))
+    use_up = np.nan_to_num(use_up, nan=0.0, posinf=np.inf)
+    use_down = np.nan_to_num(use_down, nan=0.0, posinf=np.inf)
+    total_up, total_down = float(np.sum(use_up)), float(np.sum(use_down))
+    return (1.0 / total_down if total_down > 0 else np.inf, 1.0 / total_up if total_up > 0 else np.inf)
+
+
+def price_and_tariff_ranges(obj_ranges, obj_coeffs):
+    """
+    Allowed changes of the prices and tariffs from the p_import / p_export coefficient ranges.
+
+    cost coefficient of p_import[t] = price[t] + import_tariff, of p_export[t] = -(price[t] - export_tariff).
+    Returns {"price": (T, 2) array of (max decrease, max increase) per hour,
+             "import_tariff": (max decrease, max increase), "export_tariff": (...)}.
+    """
+    imp_low, imp_up = obj_ranges["p_import"]
+    exp_low, exp_up = obj_ranges["p_export"]
+    c_imp, c_exp = obj_coeffs["p_import"], obj_coeffs["p_export"]
+    T = len(c_imp)
+
+    price = np.empty((T, 2))
+    for t in range(T):
+        # A price change moves the import coefficient up and the export coefficient down
+        price[t] = _hundred_percent(np.array([c_imp[t], c_exp[t]]), np.array([imp_low[t], exp_low[t]]),
+                                    np.array([imp_up[t], exp_up[t]]), np.array([1.0, -1.0]))
+    return {
+        "price": price,
+        "import_tariff": _hundred_percent(c_imp, imp_low, imp_up, np.ones(T)),
+        "export_tariff": _hundred_percent(c_exp, exp_low, exp_up, np.ones(T)),
+    }
+
+
+def extract_arrays(m, variables, constraints=None, sensitivity=False):
+    """
+    NumPy results of a solved model.
+
+    variables:   {name: MVar | tupledict | list of Var}
+    constraints: {name: MConstr | Constr | tupledict/dict/list of Constr}, used for per-block duals/slacks
+                 and for the ranging of energy_min / epsilon
+
+    Returns {"obj", "x": {name: array}, "rc": {name: array}, "duals": array over m.getConstrs() or None,
+             "slack": array over m.getConstrs(), "constraint_duals": {name: array}} and, with sensitivity=True on
+    an LP, "sensitivity": {"obj": {var: (low, up)}, "rhs": {constraint: (low, up)}, "ranges": see
+    price_and_tariff_ranges}.
+    """
+    constraints = constraints or {}
+    lp = _is_lp(m)
+    out = {
+        "obj": m.ObjVal,
+        "x": {name: get_array(m, "X", group) for name, group in variables.items()},
+        "rc": {},
+        "duals": None,
+        "slack": None,
+        "constraint_duals": {},
+    }
+
+    linear = [(name, c) for name, c in constraints.items() if not isinstance(c, (gp.QConstr, gp.MQConstr))]
+    all_constrs = m.getConstrs()
+    if all_constrs:
+        out["slack"] = np.asarray(m.getAttr("Slack", all_constrs), dtype=float)
+    try:
+        if lp:
+            out["rc"] = {name: get_array(m, "RC", group) for name, group in variables.items()}
+        out["duals"] = np.asarray(m.getAttr("Pi", all_constrs), dtype=float) if all_constrs else np.zeros(0)
+        out["constraint_duals"] = {name: get_array(m, "Pi", c) for name, c in linear}
+    except gp.GurobiError:
+        # No duals for MIPs or quadratic models solved without QCPDual
+        pass
+
+    if sensitivity:
+        if not lp:
+            out["sensitivity"] = None
+            return out
+        sa_obj = {name: (get_array(m, "SAObjLow", variables[name]), get_array(m, "SAObjUp", variables[name]))
+                  for name in SA_VARIABLES if name in variables}
+        sa_rhs = {name: (get_array(m, "SARHSLow", c), get_array(m, "SARHSUp", c))
+                  for name, c in linear if name in SA_CONSTRAINTS}
+        out["sensitivity"] = {"obj": sa_obj, "rhs": sa_rhs}
+        if len(sa_obj) == len(SA_VARIABLES):
+            coeffs = {name: get_array(m, "Obj", variables[name]) for name in SA_VARIABLES}
+            out["sensitivity"]["ranges"] = price_and_tariff_ranges(sa_obj, coeffs)
+    return out
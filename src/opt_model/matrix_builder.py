@@ -0,0 +1,291 @@
+# src/opt_model/matrix_builder.py
+"""
+Matrix-form assembly of the consumer models.
+
+assemble_lp() turns the model parameters (see OptModel.get_parameters) into a solver independent
+MatrixLP: variable groups with bounds and objective coefficients, and blocks of sparse constraint
+rows. build_gurobi() adds a MatrixLP to a gurobipy model with addMVar / addMConstr, so the number of
+Python objects created does not grow with the horizon length.
+
+The variable and constraint order is the same as in the per-hour formulation of
+build_and_solve / build_and_solve_multi_objective, so primal and dual results line up.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+import scipy.sparse as sp
+import gurobipy as gp
+
+
+@dataclass
+class ConstraintBlock:
+    """Rows A @ x (sense) rhs, one Gurobi MConstr."""
+    name: str
+    A: sp.csr_matrix
+    sense: str
+    rhs: np.ndarray
+
+
+@dataclass
+class QuadraticBlock:
+    """Single constraint x[var] @ x[var] + linear @ x[var] <= rhs, where rhs already includes -constant."""
+    name: str
+    var: str
+    linear: np.ndarray
+    rhs: float
+    constant: float
+
+
+@dataclass
+class ConeBlock:
+    """Second-order cone x[lhs] @ x[lhs] <= x[rhs]^2 with x[rhs] >= 0 (a single variable)."""
+    name: str
+    lhs: str
+    rhs: str
+
+
+# Ways to write the epsilon discomfort limit of mode "epsilon"
+DISCOMFORT_FORMULATIONS = (
+    "nonconvex",  # squared deviation as a quadratic constraint, solved with NonConvex=2 (original)
+    "qcp",        # same quadratic constraint, solved as a convex QCP by the barrier
+    "soc",        # z = p_load - p_ref, ||z||^2 <= r^2 with r fixed to sqrt(epsilon)
+    "pwl",        # LP: secant (inner) piecewise-linear approximation of the squared deviation, conservative
+    "l1",         # LP: absolute deviation s_pos + s_neg, as in the battery mode
+)
+
+
+@dataclass
+class MatrixLP:
+    """Solver independent matrix form of one consumer model."""
+    mode: str
+    n_hours: int
+    var_names: List[str]
+    slices: Dict[str, slice]
+    lb: np.ndarray
+    ub: np.ndarray
+    obj: np.ndarray
+    blocks: List[ConstraintBlock] = field(default_factory=list)
+    quadratic: Optional[QuadraticBlock] = None
+    cone: Optional[ConeBlock] = None
+    discomfort_formulation: Optional[str] = None
+
+    @property
+    def n_vars(self):
+        return len(self.lb)
+
+    def block(self, name):
+        for b in self.blocks:
+            if b.name == name:
+                return b
+        raise KeyError(name)
+
+
+def _as_array(values, n):
+    arr = np.asarray(values, dtype=float)
+    if arr.ndim == 0:
+        arr = np.full(n, float(arr))
+    if arr.shape != (n,):
+        raise ValueError(f"Expected {n} values, got shape {arr.shape}")
+    return arr
+
+
+def assemble_lp(params, mode, epsilon_discomfort=None, discomfort_formulation="nonconvex", pwl_segments=16):
+    """
+    Assemble the matrix form of a mode ("min_energy", "cost_only", "epsilon" or "battery").
+    discomfort_formulation picks how mode "epsilon" writes the discomfort limit, see DISCOMFORT_FORMULATIONS.
+    """
+    if discomfort_formulation not in DISCOMFORT_FORMULATIONS:
+        raise ValueError(f"Unknown discomfort formulation {discomfort_formulation}, use one of {DISCOMFORT_FORMULATIONS}")
+    prices = np.asarray(params["energy_price_DKK_per_kWh"], dtype=float)
+    T = len(prices)
+    formulation = discomfort_formulation if mode == "epsilon" else None
+    eye = sp.identity(T, format="csr")
+
+    # --- Variables, same order as the per-hour models ---
+    var_names = ["p_load", "p_pv", "p_import", "p_export"]
+    lbs = {name: np.zeros(T) for name in var_names}
+    ubs = {
+        "p_load": _as_array(params["max_load"], T),
+        "p_pv": _as_array(params["pv_max"], T),
+        "p_import": _as_array(params["max_import_kW"], T),
+        "p_export": _as_array(params["max_export_kW"], T),
+    }
+    objs = {
+        "p_load": np.zeros(T),
+        "p_pv": np.zeros(T),
+        "p_import": prices + params["import_tariff_DKK/kWh"],
+        "p_export": -(prices - params["export_tariff_DKK/kWh"]),
+    }
+
+    if mode == "battery":
+        storage = params["storage"]
+        capacity = storage["storage_capacity_kWh"]
+        for name, ub in (("p_ch", storage["max_charging_power_ratio"] * capacity),
+                         ("p_dis", storage["max_discharging_power_ratio"] * capacity),
+                         ("E_bat", capacity),
+                         ("s_pos", np.inf),
+                         ("s_neg", np.inf)):
+            var_names.append(name)
+            lbs[name] = np.zeros(T)
+            ubs[name] = np.full(T, ub)
+            objs[name] = np.zeros(T)
+
+    # Extra variables of the convex / linear discomfort formulations
+    sizes = {name: T for name in var_names}
+    extra = {
+        "soc": (("z", -np.inf, np.inf, T), ("r", 0.0, None, 1)),
+        "pwl": (("z", -np.inf, np.inf, T), ("d", 0.0, np.inf, T)),
+        "l1": (("s_pos", 0.0, np.inf, T), ("s_neg", 0.0, np.inf, T)),
+    }.get(formulation, ())
+    for name, lb, ub, size in extra:
+        if ub is None:  # r is fixed to sqrt(epsilon) through its bounds
+            lb = ub = float(np.sqrt(max(epsilon_discomfort, 0.0)))
+        var_names.append(name)
+        sizes[name] = size
+        lbs[name] = np.full(size, lb)
+        ubs[name] = np.full(size, ub)
+        objs[name] = np.zeros(size)
+
+    slices, start = {}, 0
+    for name in var_names:
+        slices[name] = slice(start, start + sizes[name])
+        start += sizes[name]
+    n_vars = start
+
+    def row_block(coefs):
+        """Horizontal concatenation of per-group blocks in variable order."""
+        rows = next(iter(coefs.values())).shape[0]
+        return sp.hstack([coefs.get(name, sp.csr_matrix((rows, sizes[name]))) for name in var_names], format="csr")
+
+    def sum_row(*names):
+        row = np.zeros((1, n_vars))
+        for name in names:
+            row[0, slices[name]] = 1.0
+        return sp.csr_matrix(row)
+
+    blocks = []
+    quadratic = None
+    cone = None
+
+    if mode == "battery":
+        eta_ch = storage["charging_efficiency"]
+        eta_dis = storage["discharging_efficiency"]
+        E0 = params.get("initial_soc_kWh")
+        E0 = capacity * 0.5 if E0 is None else E0
+        E_end = params.get("terminal_soc_kWh", E0)
+
+        # SoC recursion E[t] - E[t-1] - eta_ch p_ch[t] + p_dis[t] / eta_dis = E0 * (t == 0)
+        # as a sparse difference matrix; row 0 is init_soc, rows 1.. are soc_balance
+        diff = sp.diags([np.ones(T), -np.ones(T - 1)], [0, -1], format="csr")
+        soc = row_block({"E_bat": diff, "p_ch": -eta_ch * eye, "p_dis": (1.0 / eta_dis) * eye})
+        terminal = sp.csr_matrix(([1.0], ([0], [slices["E_bat"].start + T - 1])), shape=(1, n_vars))
+
+        blocks.append(ConstraintBlock("init_soc", soc[:1], "=", np.array([E0])))
+        if E_end is None:
+            # Free terminal state of charge, E_bat[T-1] >= 0 is implied by the bounds
+            blocks.append(ConstraintBlock("terminal_soc", terminal, ">", np.array([0.0])))
+        else:
+            blocks.append(ConstraintBlock("terminal_soc", terminal, "=", np.array([E_end])))
+        blocks.append(ConstraintBlock("soc_balance", soc[1:], "=", np.zeros(T - 1)))
+        blocks.append(ConstraintBlock(
+            "discomfort_balance", row_block({"p_load": eye, "s_pos": -eye, "s_neg": eye}), "=",
+            _as_array(params["p_ref"], T)))
+        blocks.append(ConstraintBlock(
+            "power_balance",
+            row_block({"p_load": eye, "p_pv": -eye, "p_import": -eye, "p_export": eye, "p_dis": -eye, "p_ch": eye}),
+            "=", np.zeros(T)))
+        blocks.append(ConstraintBlock("Epsilon_Constraint", sum_row("s_pos", "s_neg"), "<",
+                                      np.array([float(epsilon_discomfort)])))
+    else:
+        blocks.append(ConstraintBlock(
+            "power_balance", row_block({"p_load": eye, "p_pv": -eye, "p_import": -eye, "p_export": eye}),
+            "=", np.zeros(T)))
+
+        if mode == "min_energy":
+            blocks.append(ConstraintBlock("energy_min", sum_row("p_load"), ">",
+                                          np.array([float(params["energy_min"])])))
+        elif mode == "epsilon" and formulation in ("nonconvex", "qcp"):
+            # sum (p_load - p_ref)^2 <= eps  <=>  p_load @ p_load - 2 p_ref @ p_load <= eps - p_ref @ p_ref
+            p_ref = _as_array(params["p_ref"], T)
+            constant = float(p_ref @ p_ref)
+            quadratic = QuadraticBlock("Epsilon_Constraint", "p_load", -2.0 * p_ref,
+                                       float(epsilon_discomfort) - constant, constant)
+        elif mode == "epsilon":
+            p_ref = _as_array(params["p_ref"], T)
+            if formulation == "l1":
+                blocks.append(ConstraintBlock(
+                    "discomfort_balance", row_block({"p_load": eye, "s_pos": -eye, "s_neg": eye}), "=", p_ref))
+                blocks.append(ConstraintBlock("Epsilon_Constraint", sum_row("s_pos", "s_neg"), "<",
+                                              np.array([float(epsilon_discomfort)])))
+            else:
+                # z = p_load - p_ref
+                blocks.append(ConstraintBlock(
+                    "discomfort_balance", row_block({"p_load": eye, "z": -eye}), "=", p_ref))
+                if formulation == "soc":
+                    cone = ConeBlock("Epsilon_Constraint", "z", "r")
+                else:
+                    # Secants of z^2 between K+1 points a_k over the possible deviation range (0 is one of
+                    # them for even K). They lie above z^2 there, so sum(d) <= epsilon also bounds the true
+                    # squared deviation (tangents would under-estimate it and break the limit):
+                    # d[t] >= (a_k + a_k+1) z[t] - a_k a_k+1  <=>  (a_k + a_k+1) z[t] - d[t] <= a_k a_k+1
+                    max_dev = float(np.max(np.maximum(_as_array(params["max_load"], T) - p_ref, p_ref)))
+                    a = np.linspace(-max_dev, max_dev, pwl_segments + 1)
+                    lo, hi = a[:-1], a[1:]
+                    rows = sp.vstack([row_block({"z": (al + ah) * eye, "d": -eye}) for al, ah in zip(lo, hi)],
+                                     format="csr")
+                    blocks.append(ConstraintBlock("discomfort_pwl", rows, "<", np.repeat(lo * hi, T)))
+                    blocks.append(ConstraintBlock("Epsilon_Constraint", sum_row("d"), "<",
+                                                  np.array([float(epsilon_discomfort)])))
+        elif mode != "cost_only":
+            raise ValueError(f"Unknown mode: {mode}")
+
+    return MatrixLP(
+        mode=mode,
+        n_hours=T,
+        var_names=var_names,
+        slices=slices,
+        lb=np.concatenate([lbs[name] for name in var_names]),
+        ub=np.concatenate([ubs[name] for name in var_names]),
+        obj=np.concatenate([objs[name] for name in var_names]),
+        blocks=blocks,
+        quadratic=quadratic,
+        cone=cone,
+        discomfort_formulation=formulation,
+    )
+
+
+def build_gurobi(m, lp):
+    """
+    Add a MatrixLP to the gurobipy model m.
+    Returns (vars, constraints): one MVar per variable group and one MConstr / MQConstr per block.
+    """
+    vars = {}
+    for name in lp.var_names:
+        s = lp.slices[name]
+        vars[name] = m.addMVar(s.stop - s.start, lb=lp.lb[s], ub=lp.ub[s], obj=lp.obj[s], name=name)
+    x = gp.hstack([vars[name] for name in lp.var_names])
+
+    constraints = {}
+    for block in lp.blocks:
+        constraints[block.name] = m.addMConstr(block.A, x, block.sense, block.rhs, name=block.name)
+
+    if lp.quadratic is not None:
+        q = lp.quadratic
+        v = vars[q.var]
+        constraints[q.name] = m.addConstr(v @ v + q.linear @ v <= q.rhs, name=q.name)
+
+    if lp.cone is not None:
+        c = lp.cone
+        constraints[c.name] = m.addConstr(vars[c.lhs] @ vars[c.lhs] <= vars[c.rhs] @ vars[c.rhs], name=c.name)
+
+    return vars, constraints
+
+
+def discomfort_value(lp, x, p_ref):
+    """Discomfort of a solution, x maps variable group names to arrays. None for modes without discomfort."""
+    if lp.mode == "battery" or lp.discomfort_formulation == "l1":
+        return float(x["s_pos"].sum() + x["s_neg"].sum())
+    if lp.mode in ("cost_only", "epsilon"):
+        return float(np.sum((x["p_load"] - np.asarray(p_ref, dtype=float)) ** 2))
+    return None
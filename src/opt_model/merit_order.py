@@ -0,0 +1,157 @@
+# src/opt_model/merit_order.py
+"""
+Solver-free merit-order solution of the Q1.a model class (build_and_solve / mode "min_energy"):
+
+    min  sum_t (price_t + import_tariff) p_import_t - (price_t - export_tariff) p_export_t
+    s.t. p_load_t = p_pv_t + p_import_t - p_export_t      (lambda_t)
+         sum_t p_load_t >= energy_min                      (eta)
+         0 <= p_load_t <= max_load, 0 <= p_pv_t <= pv_max_t,
+         0 <= p_import_t <= max_import, 0 <= p_export_t <= max_export
+
+Every hour can supply its load from three sources with a constant marginal cost:
+PV that cannot be exported (cost 0), PV that would otherwise be exported (cost = export revenue)
+and grid import (cost = price + import tariff). Sorting these segments by cost and filling them
+greedily, first everything with a negative cost and then the cheapest segments until energy_min is
+reached, is an exact solution of the LP. It needs import_tariff + export_tariff >= 0, otherwise
+importing to export again would be profitable.
+
+All inputs broadcast over a leading batch axis, so K price/tariff vectors are solved at once.
+"""
+import numpy as np
+
+
+def solve_merit_order(prices, import_tariff, export_tariff, pv_max, max_load, energy_min,
+                      max_import=np.inf, max_export=np.inf):
+    """
+    Solve K instances at once.
+
+    prices and pv_max have shape (T,) or (K, T), the other parameters are scalars or (K,).
+    Returns a dict of NumPy arrays with the same meaning as the Gurobi results:
+        "obj" (K,), "p_load", "p_import", "p_export", "p_pv" (K, T),
+        "lambda" (K, T) dual of power_balance[t], "eta" (K,) dual of energy_min,
+        "feasible" (K,) bool; infeasible instances are NaN.
+
+    Where the LP duals are not unique (degenerate hours), lambda[t] is the marginal supply cost at the
+    optimal load: the cheapest source for hours without load, the last used source for hours at max_load
+    and -eta otherwise.
+    """
+    prices = np.atleast_2d(np.asarray(prices, dtype=float))
+    K, T = prices.shape
+    pv_max = np.broadcast_to(np.asarray(pv_max, dtype=float), (K, T))
+
+    def per_instance(value):
+        return np.broadcast_to(np.asarray(value, dtype=float), (K,))[:, None]
+
+    import_tariff = per_instance(import_tariff)
+    export_tariff = per_instance(export_tariff)
+    max_load = per_instance(max_load)
+    max_import = per_instance(max_import)
+    max_export = per_instance(max_export)
+    energy_min = per_instance(energy_min)[:, 0]
+
+    if np.any(import_tariff + export_tariff < 0):
+        raise ValueError("Merit order needs import_tariff + export_tariff >= 0 (no import/export arbitrage)")
+
+    c_imp = prices + import_tariff           # cost of one kWh imported
+    c_exp = prices - export_tariff           # revenue of one kWh exported
+    exporting = c_exp > 0                    # surplus PV is only exported when it earns money
+
+    # --- Supply segments per hour: [PV not exportable, PV otherwise exported, import] ---
+    exportable = np.where(exporting, np.minimum(pv_max, max_export), 0.0)
+    lengths = np.stack([pv_max - exportable, exportable, np.broadcast_to(max_import, (K, T))], axis=-1)
+    costs = np.stack([np.zeros((K, T)), np.maximum(c_exp, 0.0), c_imp], axis=-1)
+
+    # Sort the segments of every hour by cost and cap the cumulative length at max_load
+    order = np.argsort(costs, axis=-1, kind="stable")
+    costs_s = np.take_along_axis(costs, order, axis=-1)
+    lengths_s = np.take_along_axis(lengths, order, axis=-1)
+    cum = np.cumsum(lengths_s, axis=-1)
+    cap = max_load[:, :, None]
+    lengths_s = np.clip(np.minimum(cum, cap) - (cum - lengths_s), 0.0, None)
+
+    # --- Global merit order over all (hour, segment) pairs ---
+    flat_cost = costs_s.reshape(K, 3 * T)
+    flat_len = lengths_s.reshape(K, 3 * T)
+
+    # Negative-cost segments lower the cost, they are always used
+    negative = flat_cost < 0
+    taken = np.where(negative, flat_len, 0.0)
+    need = np.maximum(energy_min - taken.sum(axis=1), 0.0)
+
+    # The rest of energy_min comes from the cheapest non-negative segments
+    merit = np.argsort(np.where(negative, np.inf, flat_cost), axis=1, kind="stable")
+    merit_len = np.take_along_axis(np.where(negative, 0.0, flat_len), merit, axis=1)
+    merit_cost = np.take_along_axis(flat_cost, merit, axis=1)
+    merit_cum = np.cumsum(merit_len, axis=1)
+    fill = np.clip(need[:, None] - (merit_cum - merit_len), 0.0, merit_len)
+    np.put_along_axis(taken, merit, np.take_along_axis(taken, merit, axis=1) + fill, axis=1)
+
+    feasible = merit_cum[:, -1] >= need - 1e-9
+
+    # eta: cost of the marginal (last filled) segment when energy_min is binding
+    filled = fill > 0
+    last = np.where(filled.any(axis=1), 3 * T - 1 - np.argmax(filled[:, ::-1], axis=1), 0)
+    eta = np.where((need > 0) & filled.any(axis=1), merit_cost[np.arange(K), last], 0.0)
+
+    # --- Back to hours and sources ---
+    taken_s = taken.reshape(K, T, 3)
+    taken_src = np.zeros_like(taken_s)
+    np.put_along_axis(taken_src, order, taken_s, axis=-1)
+
+    p_load = taken_s.sum(axis=-1)
+    p_import = taken_src[:, :, 2]
+    p_export = exportable - taken_src[:, :, 1]
+    p_pv = taken_src[:, :, 0] + taken_src[:, :, 1] + p_export
+
+    obj = np.sum(c_imp * p_import - c_exp * p_export, axis=1)
+
+    # lambda[t] = -(marginal supply cost of hour t), see docstring for the degenerate cases
+    used = taken_s > 1e-12
+    free = (lengths_s - taken_s) > 1e-12
+    last_used = np.where(used.any(axis=-1), 2 - np.argmax(used[:, :, ::-1], axis=-1), 0)
+    first_free = np.where(free.any(axis=-1), np.argmax(free, axis=-1), 2)
+    left = np.take_along_axis(costs_s, last_used[:, :, None], axis=-1)[:, :, 0]
+    right = np.take_along_axis(costs_s, first_free[:, :, None], axis=-1)[:, :, 0]
+    has_right = free.any(axis=-1)
+
+    marginal = np.broadcast_to(eta[:, None], (K, T)).copy()
+    at_zero = (p_load <= 1e-12) & has_right
+    at_max = (p_load >= max_load - 1e-12) & used.any(axis=-1)
+    marginal[at_zero] = right[at_zero]
+    marginal[at_max & ~at_zero] = left[at_max & ~at_zero]
+    lam = -marginal
+
+    results = {
+        "obj": obj,
+        "p_load": p_load,
+        "p_import": p_import,
+        "p_export": p_export,
+        "p_pv": p_pv,
+        "lambda": lam,
+        "eta": eta,
+        "feasible": feasible,
+    }
+    for key in ("obj", "eta"):
+        results[key] = np.where(feasible, results[key], np.nan)
+    for key in ("p_load", "p_import", "p_export", "p_pv", "lambda"):
+        results[key] = np.where(feasible[:, None], results[key], np.nan)
+    return results
+
+
+def solve_merit_order_params(params, **overrides):
+    """
+    Merit-order solve from OptModel.get_parameters(), with the scenario keys as overrides, e.g.
+        solve_merit_order_params(params, energy_price_DKK_per_kWh=price_matrix)
+    """
+    p = dict(params)
+    p.update(overrides)
+    return solve_merit_order(
+        prices=p["energy_price_DKK_per_kWh"],
+        import_tariff=p["import_tariff_DKK/kWh"],
+        export_tariff=p["export_tariff_DKK/kWh"],
+        pv_max=p["pv_max"],
+        max_load=p["max_load"],
+        energy_min=p["energy_min"],
+        max_import=p["max_import_kW"],
+        max_export=p["max_export_kW"],
+    )
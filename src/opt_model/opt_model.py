@@ -1,15 +1,54 @@
 # src/opt_model/opt_model.py
+import numpy as np
 import gurobipy as gp
 from gurobipy import GRB
 from pathlib import Path
 
+from .matrix_builder import assemble_lp, build_gurobi, discomfort_value
+from .backends import get_backend
+from .environment import get_env
+from .extraction import extract_arrays, get_array
+from instrumentation import report, is_quiet, apply_output_flag, PhaseTimer, optimize
+
+# Scenario keys that can be changed on a built parametric model without rebuilding it
+PARAMETRIC_KEYS = (
+    "energy_price_DKK_per_kWh",  # objective coefficients
+    "import_tariff_DKK/kWh",
+    "export_tariff_DKK/kWh",
+    "max_import_kW",             # bounds
+    "max_export_kW",
+    "pv_max",
+    "energy_min",                # right-hand sides
+    "epsilon",
+    "p_ref",
+    "initial_soc_kWh",
+    "terminal_soc_kWh",          # None leaves the terminal state of charge free
+)
+
+
 class OptModel:
 
-    def __init__(self, data: dict):
+    def __init__(self, data, solver_params=None, env=None):
+        """
+        data: dict of DataFrames from DataLoader, or data_ops.ConsumerInputs for the parametric and
+        matrix-form models (build_and_solve / build_and_solve_multi_objective need the DataFrames).
+        env: Gurobi environment of the models, defaults to the shared one of environment.open_env()
+        """
         self.data = data
         self.model = None
+        self.env = env
+        # Gurobi parameters applied to every model built by this object, e.g. {"Threads": 2}
+        self.solver_params = dict(solver_params or {})
+        # Parametric model state (see build_parametric)
+        self.mode = None
+        self.lp = None
+        self.vars = {}
+        self.constraints = {}
+        self.base_params = None
+        self.params = None
 
     def build_and_solve(self):
+        phases = PhaseTimer(method="build_and_solve").start("build")
         # Extract data
         bus_df = self.data["bus_params"]
         der_df = self.data["DER_production"]
@@ -40,7 +79,8 @@ class OptModel:
 
 
         # Model
-        m = gp.Model("Consumer_Flexibility")
+        m = self._new_model("Consumer_Flexibility")
+        self._apply_solver_params(m)
 
         # Decision variables
         p_load = m.addVars(hours, name="p_load", lb=0, ub=max_load)
@@ -65,45 +105,55 @@ class OptModel:
         m.setObjective(total_cost, GRB.MINIMIZE)
 
         # Solve
-        m.optimize()
+        phases.stop()
+        optimize(m, method="build_and_solve")
+        phases.start("extract")
+
+        # Kept for extract()
+        self.model = m
+        self.vars = {"p_load": p_load, "p_pv": p_pv, "p_import": p_import, "p_export": p_export}
 
         # Print results
         if m.status == GRB.OPTIMAL:
 
-            #Store results
+            #Store results, one bulk attribute query per variable group
+            x = {name: get_array(m, "X", group) for name, group in self.vars.items()}
+            duals = np.asarray(m.getAttr("Pi", m.getConstrs()))
             results = {
             "obj": m.ObjVal,
-            "p_load": [p_load[t].X for t in hours],
-            "p_import": [p_import[t].X for t in hours],
-            "p_export": [p_export[t].X for t in hours],
-            "p_pv": [p_pv[t].X for t in hours],
-            "duals": [constr.Pi for constr in m.getConstrs()]
+            "p_load": x["p_load"].tolist(),
+            "p_import": x["p_import"].tolist(),
+            "p_export": x["p_export"].tolist(),
+            "p_pv": x["p_pv"].tolist(),
+            "duals": duals.tolist()
             }
 
         
-            #Print the     
-            total_load = sum(p_load[t].X for t in hours)
-            total_import = sum(p_import[t].X for t in hours)
-            total_pv = sum(p_pv[t].X for t in hours)
-            total_export = sum(p_export[t].X for t in hours)
-            total_pv_used = total_pv - total_export
-                
-            print("\n -- Energy Summary -- ")
-            print(f"Total energy consumed by load: {total_load:.4f} kWh/day")
-            print(f"Imported from grid: {total_import:.4f} kWh/day")
-            print(f"From PV:  {total_pv_used:.4f} kWh/day")
+            #Print the summary (skipped in quiet mode, also the sums)
+            if not is_quiet():
+                total_load = x["p_load"].sum()
+                total_import = x["p_import"].sum()
+                total_pv = x["p_pv"].sum()
+                total_export = x["p_export"].sum()
+                total_pv_used = total_pv - total_export
 
-            #Print lambda and eta dual values
-            for t in hours:
-                lam = self.constraints[f"power_balance[{t}]"].Pi
-                print(f"lambda[{t}] = {lam:.4f}")
+                print("\n -- Energy Summary -- ")
+                print(f"Total energy consumed by load: {total_load:.4f} kWh/day")
+                print(f"Imported from grid: {total_import:.4f} kWh/day")
+                print(f"From PV:  {total_pv_used:.4f} kWh/day")
 
-            eta = self.constraints["energy_min"].Pi
-            print(f"eta (min daily energy) = {eta:.4f}")
+                #Print lambda and eta dual values (power_balance rows come first, then energy_min)
+                for t in hours:
+                    print(f"lambda[{t}] = {duals[t]:.4f}")
 
+                eta = duals[len(hours)]
+                print(f"eta (min daily energy) = {eta:.4f}")
+
+            phases.stop()
             return results
         else:
-            print(f"Optimization of {m.ModelName} was not successful")
+            phases.stop()
+            report(f"Optimization of {m.ModelName} was not successful")
             return None
 
 
@@ -114,6 +164,7 @@ class OptModel:
         # --- Q1.b: Multi-Objective (Epsilon-Constraint Method) ---
 
     def build_and_solve_multi_objective(self, mode="cost_only", epsilon_discomfort=None):
+        phases = PhaseTimer(method="build_and_solve_multi_objective", mode=mode).start("build")
 
         # --- 1. Extract and Prepare Data ---
         bus_df = self.data["bus_params"]
@@ -145,7 +196,8 @@ class OptModel:
         pv_max = [max_pv_power * ratio for ratio in pv_profile]
 
         # --- 2. Model Setup ---
-        m = gp.Model("Consumer_Q1b_EpsilonConstraint")
+        m = self._new_model("Consumer_Q1b_EpsilonConstraint")
+        self._apply_solver_params(m)
         m.params.NonConvex = 2  # Required for quadratic constraints
 
         # --- 3. Decision Variables ---
@@ -174,14 +226,15 @@ class OptModel:
             # Power Balance
             m.addConstrs((p_load[t] == p_pv[t] + p_import[t] - p_export[t]) for t in hours)
             m.setObjective(J_cost, GRB.MINIMIZE)
-            m.optimize()
+            phases.stop()
+            optimize(m, method="build_and_solve_multi_objective", mode=mode)
 
             if m.status == GRB.OPTIMAL:
                 epsilon_max = J_discomfort.getValue()
-                print(f"Phase 1: Max Discomfort (epsilon_max) found: {epsilon_max:.4f} kW^2/day")
+                report(f"Phase 1: Max Discomfort (epsilon_max) found: {epsilon_max:.4f} kW^2/day")
                 return epsilon_max
             else:
-                print("Cost-only optimization failed.")
+                report("Cost-only optimization failed.")
                 return None
 
         elif mode == "epsilon" and epsilon_discomfort is not None:
@@ -197,30 +250,20 @@ class OptModel:
             m.addConstr(J_discomfort <= epsilon_discomfort, name="Epsilon_Constraint")
             #m.addConstr(p_load >= 27.9410, name="Epsilon_Constraint")
 
-            m.optimize()
-            print(gp.quicksum(pv_max[t] for t in hours))
-
-            if m.status == GRB.OPTIMAL:
-                # Return actual discomfort achieved, min cost, and load profile
-                #actual_discomfort = J_discomfort.getValue()
-                #load_profile = [p_load[t].X for t in hours]
-                total_load = sum(p_load[t].X for t in hours)
-                total_import = sum(p_import[t].X for t in hours)
-                total_pv = sum(p_pv[t].X for t in hours)
-                total_export = sum(p_export[t].X for t in hours)
-                total_pv_used = total_pv - total_export
-                    
-
-            
+            phases.stop()
+            optimize(m, method="build_and_solve_multi_objective", mode=mode)
+            phases.start("extract")
 
             if m.status == GRB.OPTIMAL:
                 # Return actual discomfort achieved, min cost, and load profile
                 actual_discomfort = J_discomfort.getValue()
-                load_profile = [p_load[t].X for t in hours]
+                load_profile = get_array(m, "X", p_load).tolist()
+                phases.stop()
                 return (actual_discomfort, m.ObjVal, load_profile)
             
                 
             else:
+                phases.stop()
                 return None
         elif mode == "battery" and epsilon_discomfort is not None:
             storage_capacity = der_storage_df[0]["storage_capacity_kWh"]
@@ -271,16 +314,19 @@ class OptModel:
             # Constraint discomfort with epsilon
             constraints["epsilon"] = m.addConstr(J_discomfort <= epsilon_discomfort, name="Epsilon_Constraint")
 
-            m.optimize()
+            phases.stop()
+            optimize(m, method="build_and_solve_multi_objective", mode=mode)
 
-            if m.status == GRB.OPTIMAL:
+            if m.status == GRB.OPTIMAL and is_quiet():
+                return m.ObjVal
+            elif m.status == GRB.OPTIMAL:
                 print("\n -- Energy Summary -- ")
-                total_load = sum(p_load[t].X for t in hours)
-                total_import = sum(p_import[t].X for t in hours)
-                total_export = sum(p_export[t].X for t in hours)
-                total_pv = sum(p_pv[t].X for t in hours)
-                total_battery_discharge = sum(p_dis[t].X for t in hours)
-                total_battery_charge = sum(p_ch[t].X for t in hours)
+                total_load = get_array(m, "X", p_load).sum()
+                total_import = get_array(m, "X", p_import).sum()
+                total_export = get_array(m, "X", p_export).sum()
+                total_pv = get_array(m, "X", p_pv).sum()
+                total_battery_discharge = get_array(m, "X", p_dis).sum()
+                total_battery_charge = get_array(m, "X", p_ch).sum()
                 total_pv_used = total_pv - total_export
 
                 print(f"Total energy consumed by load: {total_load:.4f} kWh/day")
@@ -291,17 +337,283 @@ class OptModel:
 
 
                 #Power balance duals
-                for t, constr in constraints["power_balance"].items():
-                    try:
-                        print(f"lambda[{t}] = {constr.Pi:.4f}")
-                    except AttributeError:
+                try:
+                    lambdas = get_array(m, "Pi", constraints["power_balance"])
+                except gp.GurobiError:
+                    lambdas = None
+                for t in constraints["power_balance"]:
+                    if lambdas is None:
                         print(f"lambda[{t}] = (no dual value)")
+                    else:
+                        print(f"lambda[{t}] = {lambdas[t]:.4f}")
 
                 # SOC dynamics duals
-                for t, constr in constraints["soc_balance"].items():
-                    print(f"soc_balance[{t}] dual = {constr.Pi:.4f}")
+                soc_duals = get_array(m, "Pi", constraints["soc_balance"])
+                for t, dual in zip(constraints["soc_balance"], soc_duals):
+                    print(f"soc_balance[{t}] dual = {dual:.4f}")
 
 
                 return m.ObjVal
             else:
                 return None
+
+
+
+    def _new_model(self, name):
+        return gp.Model(name, env=self.env if self.env is not None else get_env())
+
+    def _apply_solver_params(self, m):
+        apply_output_flag(m)
+        for name, value in self.solver_params.items():
+            m.setParam(name, value)
+
+    # --- Parametric model: build once, update in place for each scenario ---
+
+    def get_parameters(self):
+        """Read the model parameters from the input data into a flat dict keyed like the scenario dicts."""
+        # Compiled inputs (data_ops.ConsumerInputs) already hold the parameters as arrays
+        if hasattr(self.data, "as_params"):
+            return self.data.as_params()
+
+        bus_df = self.data["bus_params"]
+        der_df = self.data["DER_production"]
+        load_df = self.data["appliance_params"]["load"]
+        der_appliance_df = self.data["appliance_params"]["DER"]
+        der_storage_df = self.data["appliance_params"].get("storage")
+        # Q1.a names the file usage_preference, Q1.b/Q1.c usage_preferences
+        usage_pref_df = self.data.get("usage_preferences", self.data.get("usage_preference"))
+
+        max_pv_power = der_appliance_df[0]["max_power_kW"]
+        max_load = load_df[0]["max_load_kWh_per_hour"]
+        load_prefs = usage_pref_df["load_preferences"].iloc[0][0]
+
+        params = {
+            "energy_price_DKK_per_kWh": list(bus_df["energy_price_DKK_per_kWh"].iloc[0]),
+            "import_tariff_DKK/kWh": float(bus_df["import_tariff_DKK/kWh"].iloc[0]),
+            "export_tariff_DKK/kWh": float(bus_df["export_tariff_DKK/kWh"].iloc[0]),
+            "max_import_kW": float(bus_df["max_import_kW"].iloc[0]),
+            "max_export_kW": float(bus_df["max_export_kW"].iloc[0]),
+            "pv_max": [max_pv_power * ratio for ratio in der_df["hourly_profile_ratio"].iloc[0]],
+            "max_load": float(max_load),
+            "p_ref": None,
+            "energy_min": None,
+            "epsilon": None,
+            "storage": None,
+            "initial_soc_kWh": None,
+            "terminal_soc_kWh": None,
+        }
+
+        # Minimum daily energy (Q1.a), converted to kWh/day as in build_and_solve
+        if load_prefs.get("min_total_energy_per_day_hour_equivalent") is not None:
+            params["energy_min"] = load_prefs["min_total_energy_per_day_hour_equivalent"] * max_pv_power
+
+        # Reference load profile (Q1.b/Q1.c)
+        if load_prefs.get("hourly_profile_ratio") is not None:
+            params["p_ref"] = [max_load * ratio for ratio in load_prefs["hourly_profile_ratio"]]
+
+        if der_storage_df:
+            params["storage"] = dict(der_storage_df[0])
+            # The battery starts and ends the day half full
+            params["initial_soc_kWh"] = 0.5 * params["storage"]["storage_capacity_kWh"]
+            params["terminal_soc_kWh"] = params["initial_soc_kWh"]
+
+        return params
+
+    def build_parametric(self, mode="min_energy", epsilon_discomfort=None, overrides=None,
+                         discomfort_formulation="nonconvex"):
+        """
+        Build the variables and constraints of a model once, so that scenarios can later be applied with
+        update_parameters() and solved with solve_parametric() without rebuilding the Gurobi model.
+        The model is built in matrix form (see matrix_builder), which keeps build time and memory low
+        for long horizons (8760 h, sub-hourly steps).
+
+        mode:
+            "min_energy": Q1.a cost minimisation with the minimum daily energy constraint (build_and_solve)
+            "cost_only":  Q1.b phase 1, cost minimisation without discomfort limit
+            "epsilon":    Q1.b phase 2, cost minimisation with squared discomfort <= epsilon
+            "battery":    Q1.c, battery with linear (absolute) discomfort <= epsilon
+
+        overrides replaces parameters before the model is built, e.g. price/PV/reference series of another
+        horizon length for rolling-horizon runs.
+
+        discomfort_formulation selects how mode "epsilon" writes the discomfort limit
+        (see matrix_builder.DISCOMFORT_FORMULATIONS). "nonconvex" is the original NonConvex=2 model, "qcp"
+        and "soc" are exact convex formulations, "pwl" and "l1" keep the problem an LP. "pwl" over-estimates
+        the squared deviation, so its schedules keep the limit at a slightly higher cost; the "discomfort"
+        of the results is always the true squared deviation.
+        """
+        if mode in ("epsilon", "battery") and epsilon_discomfort is None:
+            raise ValueError(f"mode='{mode}' needs an initial epsilon_discomfort")
+
+        params = self.get_parameters()
+        params.update(overrides or {})
+        params["epsilon"] = epsilon_discomfort
+        lp = assemble_lp(params, mode, epsilon_discomfort, discomfort_formulation=discomfort_formulation)
+
+        phases = PhaseTimer(method="build_parametric", mode=mode).start("build")
+        m = self._new_model(f"Consumer_Parametric_{mode}")
+        self._apply_solver_params(m)
+        if lp.discomfort_formulation == "nonconvex":
+            m.params.NonConvex = 2  # Same formulation as build_and_solve_multi_objective
+        if lp.discomfort_formulation in ("nonconvex", "qcp", "soc"):
+            m.params.QCPDual = 1
+        m.ModelSense = GRB.MINIMIZE
+
+        self.vars, self.constraints = build_gurobi(m, lp)
+        if "Epsilon_Constraint" in self.constraints:
+            self.constraints["epsilon"] = self.constraints.pop("Epsilon_Constraint")
+        m.update()
+
+        self.lp = lp
+        self.model = m
+        self.mode = mode
+        self.base_params = params
+        self.params = dict(params)
+        phases.stop()
+        return m
+
+    def update_parameters(self, changes: dict, reset=True):
+        """
+        Apply a scenario to the built parametric model in place.
+
+        changes uses the same keys as the scenario dicts (see PARAMETRIC_KEYS). With reset=True the
+        scenario is applied on top of the base data, otherwise on top of the currently applied scenario.
+        Only attributes whose value actually changes are written to the Gurobi model, each as one
+        vectorized attribute update.
+        """
+        if self.model is None or self.lp is None:
+            raise RuntimeError("Call build_parametric() before update_parameters()")
+        changes = dict(changes)
+
+        unknown = set(changes) - set(PARAMETRIC_KEYS)
+        if unknown:
+            raise KeyError(f"Cannot update {sorted(unknown)} in place, supported keys: {PARAMETRIC_KEYS}")
+
+        target = dict(self.base_params) if reset else dict(self.params)
+        target.update(changes)
+        if target.get("epsilon") is None and self.mode in ("epsilon", "battery"):
+            target["epsilon"] = self.params["epsilon"]
+        current = self.params
+        T = self.lp.n_hours
+
+        def changed(key):
+            if target[key] is None or current[key] is None:
+                return target[key] is not current[key]
+            return not np.array_equal(np.asarray(target[key], dtype=float), np.asarray(current[key], dtype=float))
+
+        # Objective coefficients
+        prices = np.asarray(target["energy_price_DKK_per_kWh"], dtype=float)
+        if prices.shape != (T,):
+            raise ValueError(f"Expected {T} prices, got {prices.shape}")
+        if changed("energy_price_DKK_per_kWh") or changed("import_tariff_DKK/kWh"):
+            self.vars["p_import"].Obj = prices + target["import_tariff_DKK/kWh"]
+        if changed("energy_price_DKK_per_kWh") or changed("export_tariff_DKK/kWh"):
+            self.vars["p_export"].Obj = -(prices - target["export_tariff_DKK/kWh"])
+
+        # Bounds
+        if changed("max_import_kW"):
+            self.vars["p_import"].UB = np.full(T, float(target["max_import_kW"]))
+        if changed("max_export_kW"):
+            self.vars["p_export"].UB = np.full(T, float(target["max_export_kW"]))
+        if changed("pv_max"):
+            self.vars["p_pv"].UB = np.asarray(target["pv_max"], dtype=float)
+
+        # Right-hand sides
+        if changed("energy_min"):
+            if "energy_min" not in self.constraints:
+                raise KeyError(f"energy_min is not part of mode {self.mode}")
+            self.constraints["energy_min"].RHS = np.array([float(target["energy_min"])])
+        if changed("epsilon"):
+            if "epsilon" not in self.constraints:
+                raise KeyError(f"epsilon is not part of mode {self.mode}")
+            if self.lp.quadratic is not None:
+                # The constant sum(p_ref^2) of the squared deviation sits on the right-hand side
+                self.constraints["epsilon"].QCRHS = float(target["epsilon"]) - self.lp.quadratic.constant
+            elif self.lp.cone is not None:
+                # The cone radius r is fixed to sqrt(epsilon) through its bounds
+                radius = np.array([np.sqrt(max(float(target["epsilon"]), 0.0))])
+                self.vars["r"].LB = radius
+                self.vars["r"].UB = radius
+            else:
+                self.constraints["epsilon"].RHS = np.array([float(target["epsilon"])])
+        if changed("p_ref"):
+            if "discomfort_balance" not in self.constraints:
+                raise KeyError(f"p_ref can not be updated in place in mode {self.mode} ({self.lp.discomfort_formulation})")
+            self.constraints["discomfort_balance"].RHS = np.asarray(target["p_ref"], dtype=float)
+        if changed("initial_soc_kWh"):
+            self.constraints["init_soc"].RHS = np.array([float(target["initial_soc_kWh"])])
+        if changed("terminal_soc_kWh"):
+            terminal = self.constraints["terminal_soc"]
+            if target["terminal_soc_kWh"] is None:
+                # E_bat[T-1] >= 0 is implied by the bounds, i.e. a free terminal state of charge
+                terminal.Sense = np.array([GRB.GREATER_EQUAL])
+                terminal.RHS = np.array([0.0])
+            else:
+                terminal.Sense = np.array([GRB.EQUAL])
+                terminal.RHS = np.array([float(target["terminal_soc_kWh"])])
+
+        self.params = target
+
+    def solve_parametric(self, warm_start=True):
+        """
+        (Re-)solve the parametric model and return the results dict.
+
+        Gurobi reuses the previous simplex basis automatically for LP re-solves. With warm_start=True the
+        previous primal solution is also passed as a start, which the NonConvex=2 epsilon model uses.
+        """
+        m = self.model
+        if m is None or self.lp is None:
+            raise RuntimeError("Call build_parametric() before solve_parametric()")
+
+        if warm_start and m.SolCount > 0 and self.lp.discomfort_formulation == "nonconvex":
+            m.setAttr("Start", m.getVars(), m.getAttr("X", m.getVars()))
+
+        optimize(m, method="solve_parametric", mode=self.mode)
+
+        if m.status != GRB.OPTIMAL:
+            report(f"Optimization of {m.ModelName} was not successful")
+            return None
+
+        phases = PhaseTimer(method="solve_parametric", mode=self.mode).start("extract")
+        results = {"obj": m.ObjVal}
+        x = {name: var.X for name, var in self.vars.items()}
+        for name, values in x.items():
+            results[name] = values.tolist()
+
+        discomfort = discomfort_value(self.lp, x, self.params.get("p_ref"))
+        if discomfort is not None:
+            results["discomfort"] = discomfort
+
+        try:
+            results["duals"] = m.getAttr("Pi", m.getConstrs())
+        except gp.GurobiError:
+            # No duals when Gurobi had to solve the quadratic model with spatial branching
+            results["duals"] = None
+        phases.stop()
+        return results
+
+    # --- Solver independent path ---
+
+    def extract(self, sensitivity=False):
+        """
+        NumPy arrays of the last solved model (parametric model or build_and_solve): primals, reduced costs,
+        duals and slacks, and with sensitivity=True the LP ranges of the price/tariff cost coefficients and
+        the energy_min / epsilon right-hand sides (see extraction.extract_arrays).
+        """
+        if self.model is None or self.model.SolCount == 0:
+            raise RuntimeError("No solved model to extract from")
+        return extract_arrays(self.model, self.vars, self.constraints, sensitivity=sensitivity)
+
+    def solve_with_backend(self, mode="min_energy", epsilon_discomfort=None, backend="gurobi",
+                           discomfort_formulation="nonconvex", overrides=None):
+        """
+        Assemble the matrix form of a mode and solve it with a pluggable backend ("gurobi" or "highs",
+        see backends.py). Returns the same results dict as solve_parametric(), plus "backend".
+        """
+        if mode in ("epsilon", "battery") and epsilon_discomfort is None:
+            raise ValueError(f"mode='{mode}' needs epsilon_discomfort")
+        params = self.get_parameters()
+        params.update(overrides or {})
+        params["epsilon"] = epsilon_discomfort
+        lp = assemble_lp(params, mode, epsilon_discomfort, discomfort_formulation=discomfort_formulation)
+        return get_backend(backend).solve(lp, p_ref=params["p_ref"], solver_params=self.solver_params)
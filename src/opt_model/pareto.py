@@ -0,0 +1,147 @@
+# src/opt_model/pareto.py
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+import gurobipy as gp
+
+from .opt_model import OptModel
+from instrumentation import report
+
+
+@dataclass
+class ParetoPoint:
+    """One solved point of the cost vs. discomfort frontier."""
+    epsilon_target: float
+    cost: float
+    discomfort: float
+    load_profile: List[float]
+    duals: Optional[List[float]]
+    epsilon_dual: Optional[float]
+
+
+@dataclass
+class ParetoFrontier:
+    """Cost vs. discomfort frontier returned by ParetoSweep.run()."""
+    mode: str
+    epsilon_max: float
+    points: List[ParetoPoint] = field(default_factory=list)
+
+    @property
+    def epsilons(self):
+        return np.array([p.epsilon_target for p in self.points])
+
+    @property
+    def costs(self):
+        return np.array([p.cost for p in self.points])
+
+    @property
+    def discomforts(self):
+        return np.array([p.discomfort for p in self.points])
+
+    @property
+    def load_profiles(self):
+        """Load profiles as an array of shape (points, hours)."""
+        return np.array([p.load_profile for p in self.points])
+
+    def to_dataframe(self):
+        import pandas as pd
+        return pd.DataFrame({
+            "epsilon_target": self.epsilons,
+            "actual_discomfort": self.discomforts,
+            "min_cost": self.costs,
+        })
+
+
+class ParetoSweep:
+    """
+    Epsilon-constraint Pareto sweep on a single parametric model.
+
+    The model is built once (see OptModel.build_parametric). Phase 1 solves it with a non-binding
+    discomfort limit to find epsilon_max, and every frontier point afterwards only changes the
+    right-hand side of Epsilon_Constraint and re-solves from the previous solution/basis.
+
+    mode="epsilon" uses the squared discomfort of Q1.b, mode="battery" the absolute discomfort of Q1.c.
+    """
+
+    def __init__(self, df_data, mode="epsilon", discomfort_formulation="nonconvex"):
+        if mode not in ("epsilon", "battery"):
+            raise ValueError(f"Pareto sweep needs mode 'epsilon' or 'battery', got {mode}")
+        self.mode = mode
+        self.opt_model = OptModel(df_data)
+        self.epsilon_max = None
+
+        # Largest discomfort any feasible load profile can have, used as the non-binding limit of phase 1
+        params = self.opt_model.get_parameters()
+        p_ref = np.asarray(params["p_ref"], dtype=float)
+        max_dev = np.maximum(params["max_load"] - p_ref, p_ref)
+        absolute = mode == "battery" or discomfort_formulation == "l1"
+        self.epsilon_loose = float(np.sum(max_dev) if absolute else np.sum(max_dev ** 2)) + 1.0
+
+        self.opt_model.build_parametric(mode=mode, epsilon_discomfort=self.epsilon_loose,
+                                        discomfort_formulation=discomfort_formulation)
+
+    def _solve_point(self, epsilon):
+        model = self.opt_model
+        model.update_parameters({"epsilon": epsilon}, reset=False)
+        res = model.solve_parametric(warm_start=True)
+        if res is None:
+            return None
+
+        try:
+            if model.lp.quadratic is not None:
+                epsilon_dual = model.constraints["epsilon"].QCPi
+            elif model.lp.cone is not None:
+                # d cost / d epsilon = RC(r) * d r / d epsilon with r = sqrt(epsilon)
+                radius = model.vars["r"].X
+                epsilon_dual = model.vars["r"].RC / (2.0 * radius) if radius[0] > 0 else np.array([np.nan])
+            else:
+                epsilon_dual = model.constraints["epsilon"].Pi
+            epsilon_dual = float(np.asarray(epsilon_dual).ravel()[0])
+        except (gp.GurobiError, AttributeError):
+            epsilon_dual = None
+
+        return ParetoPoint(
+            epsilon_target=float(epsilon),
+            cost=res["obj"],
+            discomfort=res["discomfort"],
+            load_profile=res["p_load"],
+            duals=res["duals"],
+            epsilon_dual=epsilon_dual,
+        )
+
+    def find_epsilon_max(self):
+        """Phase 1: discomfort of the cost-optimal solution (discomfort limit not binding)."""
+        point = self._solve_point(self.epsilon_loose)
+        if point is None:
+            return None
+        self.epsilon_max = point.discomfort
+        return self.epsilon_max
+
+    def run(self, num_points=10, epsilon_min=0.0, epsilon_values=None, direction="descending"):
+        """
+        Solve the frontier and return a ParetoFrontier.
+
+        epsilon_values overrides the default grid np.linspace(epsilon_min, epsilon_max, num_points).
+        direction="descending" starts at the loose end and tightens the limit point by point,
+        direction="ascending" starts at the tight end and relaxes it. Points are stored in solve order.
+        """
+        if direction not in ("ascending", "descending"):
+            raise ValueError(f"direction must be 'ascending' or 'descending', got {direction}")
+
+        if self.epsilon_max is None and self.find_epsilon_max() is None:
+            report("Optimization failed during Phase 1. Cannot proceed.")
+            return None
+
+        if epsilon_values is None:
+            epsilon_values = np.linspace(epsilon_min, self.epsilon_max, num_points)
+        epsilon_values = np.sort(np.asarray(epsilon_values, dtype=float))
+        if direction == "descending":
+            epsilon_values = epsilon_values[::-1]
+
+        frontier = ParetoFrontier(mode=self.mode, epsilon_max=self.epsilon_max)
+        for epsilon in epsilon_values:
+            point = self._solve_point(epsilon)
+            if point is not None:
+                frontier.points.append(point)
+        return frontier
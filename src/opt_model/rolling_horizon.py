@@ -0,0 +1,129 @@
+# src/opt_model/rolling_horizon.py
+import time
+
+import numpy as np
+
+from .opt_model import OptModel
+
+
+class RollingHorizon:
+    """
+    Receding-horizon (MPC) driver for the battery model of Q1.c.
+
+    Walks long price / PV / reference-load series with a window of `window` hours that moves by `step`
+    hours. Each window is optimised, the first `step` hours are committed and the realised E_bat at the
+    end of the step becomes the initial state of charge of the next window.
+
+    The battery model is built once for the window length (see OptModel.build_parametric) and every window
+    only updates prices, PV bounds, reference load and the initial/terminal state of charge in place.
+
+    terminal_soc:
+        "initial": every window has to end at the initial SoC of the data (half full, as the daily model)
+        None:      free terminal SoC
+        float:     every window has to end at this SoC in kWh
+    epsilon_discomfort limits the absolute discomfort of each window.
+    The last windows are padded with the final values of the series when they run past its end.
+
+    Example:
+        rh = RollingHorizon(df_data, prices=year_prices, pv_max=year_pv, window=48, step=24)
+        out = rh.run()
+        out["total_cost"], out["wall_time_s"], out["window_latency_s"]
+    """
+
+    def __init__(self, df_data, prices, pv_max, p_ref=None, window=24, step=24,
+                 epsilon_discomfort=0, terminal_soc="initial", solver_params=None):
+        if step < 1 or window < step:
+            raise ValueError(f"Need 1 <= step <= window, got step={step}, window={window}")
+
+        self.df_data = df_data
+        self.window = int(window)
+        self.step = int(step)
+        self.epsilon_discomfort = epsilon_discomfort
+        self.solver_params = solver_params
+
+        self.prices = np.asarray(prices, dtype=float)
+        self.pv_max = np.asarray(pv_max, dtype=float)
+        n = len(self.prices)
+        if self.pv_max.shape != (n,):
+            raise ValueError(f"pv_max needs {n} values, got {self.pv_max.shape}")
+
+        base = OptModel(df_data).get_parameters()
+        if p_ref is None:
+            # Repeat the daily reference profile over the whole series
+            daily = np.asarray(base["p_ref"], dtype=float)
+            p_ref = np.resize(daily, n)
+        self.p_ref = np.asarray(p_ref, dtype=float)
+        if self.p_ref.shape != (n,):
+            raise ValueError(f"p_ref needs {n} values, got {self.p_ref.shape}")
+
+        self.initial_soc = base["initial_soc_kWh"]
+        self.terminal_soc = base["initial_soc_kWh"] if terminal_soc == "initial" else terminal_soc
+
+        # Pad with the last values so that the last window can run past the end of the series
+        pad = self.window
+        self._prices = np.pad(self.prices, (0, pad), mode="edge")
+        self._pv_max = np.pad(self.pv_max, (0, pad), mode="edge")
+        self._p_ref = np.pad(self.p_ref, (0, pad), mode="edge")
+
+    def _window_data(self, start):
+        stop = start + self.window
+        # Slices of the padded arrays are views, no copy per window
+        return {
+            "energy_price_DKK_per_kWh": self._prices[start:stop],
+            "pv_max": self._pv_max[start:stop],
+            "p_ref": self._p_ref[start:stop],
+        }
+
+    def run(self):
+        """
+        Run all windows and return the realised (committed) schedule, per-window latency and wall time.
+        """
+        t_start = time.perf_counter()
+        n = len(self.prices)
+
+        model = OptModel(self.df_data, solver_params=self.solver_params)
+        overrides = self._window_data(0)
+        overrides.update({"initial_soc_kWh": self.initial_soc, "terminal_soc_kWh": self.terminal_soc})
+        model.build_parametric(mode="battery", epsilon_discomfort=self.epsilon_discomfort, overrides=overrides)
+        build_time = time.perf_counter() - t_start
+
+        names = list(model.vars.keys())
+        realised = {name: np.zeros(n) for name in names}
+        latencies, window_costs = [], []
+        soc = self.initial_soc
+
+        for start in range(0, n, self.step):
+            t_window = time.perf_counter()
+            changes = self._window_data(start)
+            changes["initial_soc_kWh"] = soc
+            model.update_parameters(changes, reset=False)
+            res = model.solve_parametric()
+            latencies.append(time.perf_counter() - t_window)
+            if res is None:
+                raise RuntimeError(f"Rolling-horizon window starting at hour {start} is infeasible")
+
+            # Commit the first step hours, the rest of the window is only look-ahead
+            commit = min(self.step, n - start)
+            for name in names:
+                realised[name][start:start + commit] = res[name][:commit]
+            soc = realised["E_bat"][start + commit - 1]
+            window_costs.append(res["obj"])
+
+        prices = self.prices
+        import_tariff = model.params["import_tariff_DKK/kWh"]
+        export_tariff = model.params["export_tariff_DKK/kWh"]
+        total_cost = float(np.sum(realised["p_import"] * (prices + import_tariff)
+                                  - realised["p_export"] * (prices - export_tariff)))
+
+        latencies = np.array(latencies)
+        return {
+            "schedule": realised,
+            "total_cost": total_cost,
+            "final_soc": float(soc),
+            "window_objectives": window_costs,
+            "window_latency_s": latencies,
+            "mean_window_latency_s": float(latencies.mean()) if len(latencies) else 0.0,
+            "build_time_s": build_time,
+            "wall_time_s": time.perf_counter() - t_start,
+            "n_windows": len(latencies),
+        }
@@ -0,0 +1,244 @@
+# src/opt_model/stochastic.py
+"""
+Two-stage stochastic version of the consumer models over price / PV scenarios.
+
+The load schedule, the battery schedule and the discomfort variables are decided once (first stage) and
+hedge across all scenarios. PV use, import and export are the recourse of each scenario, which has to
+balance power for the shared first-stage schedule. All scenarios go into one extensive-form model that
+minimises the expected cost.
+
+Forecast ensembles with hundreds of members are first reduced with reduce_scenarios(), a weighted
+k-medoids clustering of the price / PV vectors. The medoids are kept as scenarios and get the
+probability of their cluster.
+
+Example:
+    sm = StochasticOptModel(df_data, prices=price_ensemble, pv_max=pv_ensemble)   # (members, hours) arrays
+    sm.reduce(n_scenarios=10)
+    sm.build(mode="battery", epsilon_discomfort=3.0)
+    res = sm.solve()
+    res["expected_cost"], res["p_load"], res["scenario_costs"]
+"""
+import numpy as np
+import scipy.sparse as sp
+import gurobipy as gp
+from gurobipy import GRB
+
+from .opt_model import OptModel
+from .environment import get_env
+from .matrix_builder import MatrixLP, ConstraintBlock, assemble_lp, build_gurobi, discomfort_value
+from instrumentation import report, apply_output_flag, optimize, PhaseTimer
+
+# Variable groups decided before the scenario is known, everything else is recourse
+FIRST_STAGE = ("p_load", "p_ch", "p_dis", "E_bat", "s_pos", "s_neg", "z", "d", "r")
+
+
+def _scenario_array(values, n_scenarios=None):
+    """(scenarios, hours) array, a single series is used for every scenario."""
+    arr = np.asarray(values, dtype=float)
+    if arr.ndim == 1:
+        arr = arr[None, :] if n_scenarios is None else np.tile(arr, (n_scenarios, 1))
+    if arr.ndim != 2:
+        raise ValueError(f"Expected (scenarios, hours) values, got shape {arr.shape}")
+    return arr
+
+
+def reduce_scenarios(features, probabilities=None, n_clusters=10, seed=0, max_iter=100):
+    """
+    Weighted k-medoids reduction of scenarios.
+
+    features: (scenarios, n) array, e.g. prices and PV of each member side by side. Every column is
+    standardised, so prices and PV weigh the same.
+    Returns (medoids, reduced_probabilities, labels): the indices of the kept scenarios, the probability
+    of their clusters and the cluster of every original scenario.
+    """
+    X = np.asarray(features, dtype=float)
+    n = len(X)
+    p = np.full(n, 1.0 / n) if probabilities is None else np.asarray(probabilities, dtype=float)
+    p = p / p.sum()
+    k = min(int(n_clusters), n)
+    if k >= n:
+        return np.arange(n), p, np.arange(n)
+
+    std = X.std(axis=0)
+    X = (X - X.mean(axis=0)) / np.where(std > 0, std, 1.0)
+    sq = np.einsum("ij,ij->i", X, X)
+    D = np.sqrt(np.maximum(sq[:, None] + sq[None, :] - 2.0 * X @ X.T, 0.0))
+
+    # k-means++ style start, weighted by probability
+    rng = np.random.default_rng(seed)
+    medoids = [int(rng.choice(n, p=p))]
+    for _ in range(k - 1):
+        weight = p * D[:, medoids].min(axis=1) ** 2
+        if weight.sum() <= 0:
+            weight = p * ~np.isin(np.arange(n), medoids)
+        medoids.append(int(rng.choice(n, p=weight / weight.sum())))
+    medoids = np.array(medoids)
+
+    # Alternate between assigning scenarios and moving every medoid to its cluster's weighted center
+    for _ in range(max_iter):
+        labels = np.argmin(D[:, medoids], axis=1)
+        new = medoids.copy()
+        for c in range(k):
+            members = np.flatnonzero(labels == c)
+            if len(members):
+                new[c] = members[np.argmin(D[np.ix_(members, members)] @ p[members])]
+        if np.array_equal(new, medoids):
+            break
+        medoids = new
+
+    labels = np.argmin(D[:, medoids], axis=1)
+    return medoids, np.bincount(labels, weights=p, minlength=k), labels
+
+
+class StochasticOptModel:
+    """Extensive-form two-stage model over price / PV scenarios, see the module docstring."""
+
+    def __init__(self, data, prices, pv_max, probabilities=None, solver_params=None, env=None):
+        self.data = data
+        self.env = env
+        self.solver_params = dict(solver_params or {})
+        prices = np.asarray(prices, dtype=float)
+        pv_max = np.asarray(pv_max, dtype=float)
+        n = max(len(prices) if prices.ndim == 2 else 1, len(pv_max) if pv_max.ndim == 2 else 1)
+        self.prices = _scenario_array(prices, n)
+        self.pv_max = _scenario_array(pv_max, n)
+        if self.prices.shape != self.pv_max.shape:
+            raise ValueError(f"prices {self.prices.shape} and pv_max {self.pv_max.shape} do not match")
+        self.probabilities = (np.full(n, 1.0 / n) if probabilities is None
+                              else np.asarray(probabilities, dtype=float) / np.sum(probabilities))
+        if self.probabilities.shape != (n,):
+            raise ValueError(f"Expected {n} probabilities, got {self.probabilities.shape}")
+        self.reduction = None
+        self.model = None
+        self.vars = {}
+        self.constraints = {}
+
+    @property
+    def n_scenarios(self):
+        return len(self.prices)
+
+    def reduce(self, n_scenarios=10, seed=0):
+        """Keep n_scenarios medoids of the price / PV scenarios (see reduce_scenarios)."""
+        medoids, probabilities, labels = reduce_scenarios(np.hstack([self.prices, self.pv_max]),
+                                                          self.probabilities, n_scenarios, seed=seed)
+        self.reduction = {"n_original": self.n_scenarios, "medoids": medoids, "labels": labels}
+        self.prices = self.prices[medoids]
+        self.pv_max = self.pv_max[medoids]
+        self.probabilities = probabilities
+        return self
+
+    # --- Extensive form ---
+    def _extensive_form(self, lps):
+        """One MatrixLP with the first-stage groups once and the recourse groups once per scenario."""
+        base = lps[0]
+        first = [name for name in base.var_names if name in FIRST_STAGE]
+        recourse = [name for name in base.var_names if name not in FIRST_STAGE]
+        var_names = first + [f"{name}[{s}]" for s in range(len(lps)) for name in recourse]
+
+        slices, start = {}, 0
+        for name in first:
+            size = base.slices[name].stop - base.slices[name].start
+            slices[name] = slice(start, start + size)
+            start += size
+        for s in range(len(lps)):
+            for name in recourse:
+                size = base.slices[name].stop - base.slices[name].start
+                slices[f"{name}[{s}]"] = slice(start, start + size)
+                start += size
+        n_vars = start
+
+        # Column of every scenario model variable in the extensive form
+        col_maps = []
+        for s in range(len(lps)):
+            cols = np.empty(base.n_vars, dtype=np.int64)
+            for name in base.var_names:
+                target = slices[name] if name in FIRST_STAGE else slices[f"{name}[{s}]"]
+                cols[base.slices[name]] = np.arange(target.start, target.stop)
+            col_maps.append(cols)
+
+        lb, ub, obj = np.zeros(n_vars), np.zeros(n_vars), np.zeros(n_vars)
+        for s, (lp, prob) in enumerate(zip(lps, self.probabilities)):
+            cols = col_maps[s]
+            lb[cols], ub[cols] = lp.lb, lp.ub
+            # First-stage costs add up to their expectation, recourse costs are weighted per scenario
+            obj[cols] += prob * lp.obj
+
+        is_first = np.zeros(base.n_vars, dtype=bool)
+        for name in first:
+            is_first[base.slices[name]] = True
+
+        blocks = []
+        for b, block in enumerate(base.blocks):
+            A = block.A.tocsr()
+            shared = bool(np.all(is_first[A.indices]))
+            for s in ([0] if shared else range(len(lps))):
+                blk = lps[s].blocks[b]
+                A_s = sp.csr_matrix((A.data, col_maps[s][A.indices], A.indptr), shape=(A.shape[0], n_vars))
+                blocks.append(ConstraintBlock(block.name if shared else f"{block.name}[{s}]", A_s, blk.sense, blk.rhs))
+
+        return MatrixLP(mode=base.mode, n_hours=base.n_hours, var_names=var_names, slices=slices, lb=lb, ub=ub,
+                        obj=obj, blocks=blocks, quadratic=base.quadratic, cone=base.cone,
+                        discomfort_formulation=base.discomfort_formulation)
+
+    def build(self, mode="battery", epsilon_discomfort=None, discomfort_formulation="nonconvex"):
+        """Build the extensive-form Gurobi model of a mode (see OptModel.build_parametric for the modes)."""
+        if mode in ("epsilon", "battery") and epsilon_discomfort is None:
+            raise ValueError(f"mode='{mode}' needs epsilon_discomfort")
+        phases = PhaseTimer(method="stochastic", mode=mode).start("build")
+        params = OptModel(self.data).get_parameters()
+        params["epsilon"] = epsilon_discomfort
+        self.params = params
+        lps = []
+        for prices, pv_max in zip(self.prices, self.pv_max):
+            scenario = dict(params, energy_price_DKK_per_kWh=prices, pv_max=pv_max)
+            lps.append(assemble_lp(scenario, mode, epsilon_discomfort, discomfort_formulation=discomfort_formulation))
+        self.lps = lps
+        self.lp = self._extensive_form(lps)
+
+        m = gp.Model(f"Consumer_Stochastic_{mode}", env=self.env if self.env is not None else get_env())
+        apply_output_flag(m)
+        for name, value in self.solver_params.items():
+            m.setParam(name, value)
+        if self.lp.discomfort_formulation == "nonconvex":
+            m.params.NonConvex = 2
+        m.ModelSense = GRB.MINIMIZE
+        self.vars, self.constraints = build_gurobi(m, self.lp)
+        m.update()
+        self.model = m
+        self.mode = mode
+        phases.stop()
+        return m
+
+    def solve(self):
+        """Solve the extensive form and return the first-stage schedule and the recourse of every scenario."""
+        if self.model is None:
+            raise RuntimeError("Call build() before solve()")
+        m = self.model
+        optimize(m, method="stochastic", mode=self.mode)
+        if m.status != GRB.OPTIMAL:
+            report(f"Optimization of {m.ModelName} was not successful")
+            return None
+
+        base = self.lps[0]
+        x = {name: var.X for name, var in self.vars.items()}
+        first = {name: x[name] for name in base.var_names if name in FIRST_STAGE}
+        recourse = [name for name in base.var_names if name not in FIRST_STAGE]
+
+        results = {"obj": m.ObjVal, "expected_cost": m.ObjVal}
+        for name, values in first.items():
+            results[name] = values.tolist()
+        for name in recourse:
+            results[name] = np.vstack([x[f"{name}[{s}]"] for s in range(self.n_scenarios)])
+
+        # Cost of the shared schedule in every scenario
+        costs = []
+        for s, lp in enumerate(self.lps):
+            full = np.concatenate([first[name] if name in FIRST_STAGE else x[f"{name}[{s}]"] for name in base.var_names])
+            costs.append(float(lp.obj @ full))
+        results["scenario_costs"] = np.array(costs)
+        results["probabilities"] = self.probabilities.copy()
+
+        discomfort = discomfort_value(base, first, self.params.get("p_ref"))
+        if discomfort is not None:
+            results["discomfort"] = discomfort
+        return results
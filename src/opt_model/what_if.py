@@ -0,0 +1,183 @@
+# src/opt_model/what_if.py
+"""
+What-if evaluation of price, tariff and right-hand-side changes on a solved parametric LP.
+
+    model = OptModel(df_data)
+    model.build_parametric("battery", epsilon_discomfort=0)
+    what_if = WhatIf(model)
+    res = what_if.evaluate({"export_tariff_DKK/kWh": 0.35})
+    res["path"]  # "analytic" or "resolve"
+
+The optimal basis B of the base solve is factorised once. A scenario is written to the Gurobi model with
+update_parameters() (attribute updates only) and then checked against that basis:
+
+    objective changes c -> c':  y = B^-T c'_B, the basis stays optimal if the reduced costs c' - A^T y keep
+                                their signs, the primal solution is unchanged
+    rhs / bound changes:        x_B = B^-1 (b' - N x_N), the basis stays optimal if x_B stays within its bounds,
+                                the duals are unchanged
+
+If both hold, the new solution follows from two sparse triangular solves ("analytic"). Otherwise the model
+is re-solved starting from the base basis ("resolve"). Quadratic (epsilon) models always re-solve.
+"""
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+from gurobipy import GRB
+
+from .matrix_builder import discomfort_value
+from instrumentation import count, emit
+
+
+class WhatIf:
+    """Analytic / warm re-solve evaluation of scenarios around the base solution of a parametric OptModel."""
+
+    def __init__(self, model, tol=1e-7):
+        if model.model is None or model.lp is None:
+            raise RuntimeError("Call build_parametric() before creating a WhatIf")
+        self.model = model
+        self.tol = tol
+        m = model.model
+        if m.SolCount == 0:
+            model.solve_parametric()
+        if m.status != GRB.OPTIMAL:
+            raise RuntimeError(f"The base model {m.ModelName} has no optimal solution")
+
+        self.base_params = dict(model.params)
+        self.analytic = m.IsMIP == 0 and m.IsQP == 0 and m.IsQCP == 0
+        variables, constrs = m.getVars(), m.getConstrs()
+        self._variables, self._constrs = variables, constrs
+        self.base_obj = m.ObjVal
+        self.base_x = np.asarray(m.getAttr("X", variables), dtype=float)
+        self.base_duals = np.asarray(m.getAttr("Pi", constrs), dtype=float) if self.analytic else None
+        # Position of every variable group in m.getVars()
+        self._groups = {name: np.array([v.index for v in var.tolist()]) for name, var in model.vars.items()}
+
+        if self.analytic:
+            self.vbasis = np.asarray(m.getAttr("VBasis", variables), dtype=int)
+            self.cbasis = np.asarray(m.getAttr("CBasis", constrs), dtype=int)
+            self._factorize(m)
+
+    # --- Base basis ---
+    def _factorize(self, m):
+        """LU factorisation of the basis matrix [A | I] restricted to the basic columns."""
+        self.A = m.getA().tocsc()
+        n_rows = self.A.shape[0]
+        self.sense = np.asarray(m.getAttr("Sense", self._constrs))
+        self.basic_vars = np.flatnonzero(self.vbasis == 0)
+        self.basic_slacks = np.flatnonzero(self.cbasis == 0)
+        self.nonbasic_vars = np.flatnonzero(self.vbasis != 0)
+        # Slack s_i of row i: A_i x + s_i = b_i, so its column is the unit vector e_i
+        slack_cols = sp.csc_matrix((np.ones(len(self.basic_slacks)), (self.basic_slacks, np.arange(len(self.basic_slacks)))),
+                                   shape=(n_rows, len(self.basic_slacks)))
+        B = sp.hstack([self.A[:, self.basic_vars], slack_cols], format="csc")
+        self._lu = splu(B) if B.shape[0] == B.shape[1] and B.shape[0] > 0 else None
+
+    def _restore_basis(self):
+        m = self.model.model
+        m.setAttr("VBasis", self._variables, self.vbasis.tolist())
+        m.setAttr("CBasis", self._constrs, self.cbasis.tolist())
+
+    # --- Checks ---
+    def _dual_check(self, c):
+        """Duals y of the base basis under costs c, None if a reduced cost has the wrong sign."""
+        y = self._lu.solve(np.concatenate([c[self.basic_vars], np.zeros(len(self.basic_slacks))]), trans="T")
+        d = c - self.A.T @ y
+        tol = self.tol * max(1.0, np.abs(c).max(initial=0.0))
+        nb = self.vbasis[self.nonbasic_vars]
+        d_nb = d[self.nonbasic_vars]
+        if np.any((nb == -1) & (d_nb < -tol)) or np.any((nb == -2) & (d_nb > tol)) or np.any((nb == -3) & (np.abs(d_nb) > tol)):
+            return None
+        # Tight rows: the slack sits at 0, which needs y <= 0 for <= rows and y >= 0 for >= rows
+        tight = self.cbasis != 0
+        if np.any(tight & (self.sense == "<") & (y > tol)) or np.any(tight & (self.sense == ">") & (y < -tol)):
+            return None
+        return y
+
+    def _primal_check(self, lb, ub, rhs):
+        """Primal solution of the base basis under new bounds and right-hand sides, None if infeasible."""
+        x = np.empty(len(self.vbasis))
+        nb = self.vbasis[self.nonbasic_vars]
+        x[self.nonbasic_vars] = np.where(nb == -1, lb[self.nonbasic_vars],
+                                         np.where(nb == -2, ub[self.nonbasic_vars], self.base_x[self.nonbasic_vars]))
+        if np.any(~np.isfinite(x[self.nonbasic_vars])):
+            return None
+        n_basic = len(self.basic_vars)
+        x_basic = self._lu.solve(rhs - self.A[:, self.nonbasic_vars] @ x[self.nonbasic_vars])
+        x[self.basic_vars] = x_basic[:n_basic]
+        slacks = x_basic[n_basic:]
+
+        tol = self.tol * max(1.0, np.abs(x).max(initial=0.0))
+        xb = x[self.basic_vars]
+        if np.any(xb < lb[self.basic_vars] - tol) or np.any(xb > ub[self.basic_vars] + tol):
+            return None
+        sense = self.sense[self.basic_slacks]
+        if np.any((sense == "<") & (slacks < -tol)) or np.any((sense == ">") & (slacks > tol)):
+            return None
+        return x
+
+    # --- Evaluation ---
+    def _results(self, obj, x, duals, path, elapsed):
+        results = {"obj": obj}
+        values = {name: x[idx] for name, idx in self._groups.items()}
+        for name, arr in values.items():
+            results[name] = arr.tolist()
+        discomfort = discomfort_value(self.model.lp, values, self.model.params.get("p_ref"))
+        if discomfort is not None:
+            results["discomfort"] = discomfort
+        results["duals"] = None if duals is None else duals.tolist()
+        results["path"] = path
+        results["time_s"] = elapsed
+        return results
+
+    def _resolve(self, start):
+        if self.analytic:
+            self._restore_basis()
+        res = self.model.solve_parametric(warm_start=True)
+        if res is None:
+            return None
+        res["path"] = "resolve"
+        res["time_s"] = time.perf_counter() - start
+        return res
+
+    def evaluate(self, changes):
+        """
+        Results dict (as solve_parametric(), plus "path" and "time_s") of the base data with changes applied.
+        changes uses the keys of PARAMETRIC_KEYS; returns None if the scenario is infeasible.
+        """
+        start = time.perf_counter()
+        model = self.model
+        m = model.model
+        model.update_parameters(changes, reset=True)
+
+        res = None
+        if self.analytic and self._lu is not None:
+            m.update()
+            c = np.asarray(m.getAttr("Obj", self._variables), dtype=float)
+            lb = np.asarray(m.getAttr("LB", self._variables), dtype=float)
+            ub = np.asarray(m.getAttr("UB", self._variables), dtype=float)
+            rhs = np.asarray(m.getAttr("RHS", self._constrs), dtype=float)
+            y = self._dual_check(c)
+            x = self._primal_check(lb, ub, rhs) if y is not None else None
+            if x is not None:
+                res = self._results(float(c @ x) + m.ObjCon, x, y, "analytic", time.perf_counter() - start)
+
+        if res is None:
+            res = self._resolve(start)
+        path = "infeasible" if res is None else res["path"]
+        count(f"what_if_{path}")
+        emit("timer", "what_if", time.perf_counter() - start, path=path)
+        return res
+
+    def evaluate_all(self, scenarios):
+        """{name: results} for a dict of scenarios (or a list, keyed by position)."""
+        if not isinstance(scenarios, dict):
+            scenarios = dict(enumerate(scenarios))
+        return {name: self.evaluate(changes) for name, changes in scenarios.items()}
+
+    def reset(self):
+        """Put the base parameters and basis back on the Gurobi model."""
+        self.model.update_parameters({}, reset=True)
+        if self.analytic:
+            self._restore_basis()
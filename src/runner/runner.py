@@ -1,7 +1,130 @@
+import csv
+import json
+import os
+import traceback
+import multiprocessing as mp
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
 from typing import Dict, List
-from copy import deepcopy
 from opt_model import OptModel
+from opt_model.environment import open_env, close_env
+from data_ops.scenario_overlay import ScenarioOverlay
+from utils.solve_cache import SolveCache
+from utils.results_store import ResultsStore
+from instrumentation import report, count, set_quiet, is_quiet
+
+# Keys of a batch config file (JSON or YAML) and their defaults, see Runner.from_config()
+DEFAULT_CONFIG = {
+    "question": "question_1c",
+    "mode": "battery",              # "min_energy" (Q1.a) or "battery" (Q1.c)
+    "data_dir": "data",             # relative paths are relative to the config file
+    "output_dir": "results/batch",
+    "scenarios": {"type": "default"},
+    "epsilon": 0,                   # discomfort limit of battery scenarios without their own epsilon
+    "solver_params": {},            # Gurobi parameters of every model
+    "env_params": {"Threads": 1},   # parameters of the shared Gurobi environment
+    "n_workers": 1,                 # 1 solves in this process, more use a process pool
+    "threads_per_worker": None,
+    "chunk_size": 256,
+    "cache": False,                 # True keeps a solve cache on disk in output_dir/solve_cache
+    "store": True,                  # results store in output_dir/store, makes the batch resumable
+    "quiet": False,
+}
+
+
+def plan_thread_budget(n_tasks, n_workers=None, threads_per_worker=None, total_cores=None):
+    """
+    Split the available cores between pool workers and Gurobi Threads per worker,
+    so that n_workers * threads_per_worker never exceeds the number of cores.
+    Returns (n_workers, threads_per_worker).
+    """
+    total_cores = total_cores or os.cpu_count() or 1
+    n_tasks = max(1, n_tasks)
+
+    if n_workers is None and threads_per_worker is None:
+        # Small LPs scale better over processes than over solver threads, spare cores go to Gurobi
+        n_workers = min(n_tasks, total_cores)
+    if n_workers is None:
+        n_workers = max(1, total_cores // threads_per_worker)
+    n_workers = max(1, min(n_workers, n_tasks, total_cores))
+    if threads_per_worker is None:
+        threads_per_worker = max(1, total_cores // n_workers)
+    threads_per_worker = max(1, min(threads_per_worker, total_cores // n_workers))
+    return n_workers, threads_per_worker
+
+
+def _chunked(items, size):
+    """Lazily cut an iterable into lists of at most size elements."""
+    items = iter(items)
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+
+def _error_record(name, exc):
+    return {
+        "status": "error",
+        "scenario": name,
+        "error": f"{type(exc).__name__}: {exc}",
+        "traceback": traceback.format_exc(),
+    }
+
+
+def _solve_cached(model, cache):
+    """solve_parametric() through the cache, keyed on the parameters currently applied to the model."""
+    count("scenarios", mode=model.mode)
+    if cache is None:
+        return model.solve_parametric()
+    key = cache.key(model.params, model.mode, model.params.get("epsilon"), model.lp.discomfort_formulation,
+                    model.solver_params)
+    return cache.get_or_solve(key, model.solve_parametric)
+
+
+# Base data of a pool worker process, sent once per process by _init_worker
+_worker = {"data": None}
+
+
+def _init_worker(data):
+    _worker["data"] = data
+
+
+def _solve_scenario_chunk(df_data, kind, chunk, solver_params, default_epsilon, cache=None, env_params=None):
+    """
+    Worker entry point: build one parametric model and solve a chunk of (index, name, scenario).
+    A failing scenario gives an error record instead of aborting the rest of the chunk.
+    df_data None uses the base data the worker process was started with (see _init_worker), so a chunk
+    only carries the scenario dicts.
+    cache is a SolveCache, or the directory of its on-disk tier when the chunk runs in a worker process.
+    env_params opens the shared Gurobi environment of the process (once per worker, see opt_model.open_env).
+    """
+    out = []
+    if df_data is None:
+        df_data = _worker["data"]
+    if isinstance(cache, (str, os.PathLike)):
+        cache = SolveCache(cache_dir=cache)
+    if env_params is not None:
+        open_env(env_params)
+    try:
+        model = OptModel(df_data, solver_params=solver_params)
+        if kind == "battery":
+            model.build_parametric(mode="battery", epsilon_discomfort=default_epsilon)
+        else:
+            model.build_parametric(mode="min_energy")
+    except Exception as exc:
+        return [(idx, name, _error_record(name, exc)) for idx, name, _ in chunk]
+
+    for idx, name, sc in chunk:
+        try:
+            changes = dict(sc)
+            if kind == "battery":
+                changes.setdefault("epsilon", default_epsilon)
+            model.update_parameters(changes)
+            out.append((idx, name, _solve_cached(model, cache)))
+        except Exception as exc:
+            out.append((idx, name, _error_record(name, exc)))
+    return out
 
 
 class Runner:
@@ -9,102 +132,340 @@ class Runner:
     Handles configuration setting, data loading and preparation, model(s) execution, results saving and ploting
     """
 
-    def __init__(self, df_data, scenarios) -> None:
+    def __init__(self, df_data, scenarios, store=None, question=None, cache=None) -> None:
+        """
+        Args:
+            scenarios: Dict of scenario name -> scenario dict, or any iterable of (name, scenario) pairs
+                       (e.g. a utils.ScenarioGenerator), which is consumed lazily
+            store: Optional utils.ResultsStore, every solved scenario is written to it and scenarios
+                   that are already stored are skipped, so an interrupted sweep can be resumed
+            question: Partition of the store (e.g. "question_1a")
+            cache: Optional utils.SolveCache, scenarios that were solved before are not solved again
+        """
         self.df_data = df_data
         self.scenarios = scenarios
         self.results = {}
+        self.store = store
+        self.question = question or "default"
+        self.cache = cache
+        # Parameters of the shared Gurobi environment of pool workers (None: Gurobi's default environment)
+        self.env_params = None
+        self.config = None
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Runner for a batch config, a JSON/YAML file or a dict with the keys of DEFAULT_CONFIG:
+
+            {"question": "question_1c", "mode": "battery", "output_dir": "results/tariffs",
+             "scenarios": {"type": "grid", "values": {"export_tariff_DKK/kWh": [0.1, 0.4, 1.0], "epsilon": [0, 5]}},
+             "solver_params": {"Method": 1}, "n_workers": 4}
+
+        Scenario types: "default" (make_scenarios / make_scenarios_battery), "grid" (make_scenario_grid),
+        "monte_carlo" (the other keys are passed to utils.ScenarioGenerator) and "explicit"
+        ({"scenarios": {name: scenario}}). Run it with run().
+        """
+        runner = cls(None, {})
+        runner._load_config(config)
+        runner._create_directories()
+        runner.prepare_data_single_simulation(runner.question)
+        return runner
+
+    def _load_config(self, config) -> None:
+        """Read a config file or dict, fill in the defaults and store the settings as attributes."""
+        base_dir = Path.cwd()
+        if not isinstance(config, Mapping):
+            path = Path(config)
+            base_dir = path.resolve().parent
+            with open(path) as f:
+                if path.suffix.lower() in (".yaml", ".yml"):
+                    import yaml
+                    config = yaml.safe_load(f)
+                else:
+                    config = json.load(f)
+        unknown = set(config) - set(DEFAULT_CONFIG)
+        if unknown:
+            raise KeyError(f"Unknown config keys {sorted(unknown)}, supported: {sorted(DEFAULT_CONFIG)}")
+        if config.get("mode", DEFAULT_CONFIG["mode"]) not in ("min_energy", "battery"):
+            raise ValueError(f"mode must be 'min_energy' or 'battery', got {config['mode']}")
+
+        self.config = {**DEFAULT_CONFIG, **config}
+        self.question = self.config["question"]
+        self.mode = self.config["mode"]
+        self.data_dir = base_dir / self.config["data_dir"]
+        self.output_dir = base_dir / self.config["output_dir"]
+        self.solver_params = dict(self.config["solver_params"])
+        self.env_params = dict(self.config["env_params"])
+        if self.config["quiet"]:
+            set_quiet(True)
 
-    def _load_config(self) -> None:
-        """Load configuration (placeholder method)"""
-    # Extract simulation configuration and hyperparameter values (e.g. question, scenarios for sensitivity analysis, duration of simulation, solver name, etc.) and store them as class attributes (e.g. self.scenario_list, self.solver_name, etc.)
-    
     def _create_directories(self) -> None:
-        """Create required directories for each simulation configuration. (placeholder method)"""
+        """Create the output directory with the results store and the solve cache of the config."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self.config["store"]:
+            self.store = ResultsStore(self.output_dir / "store")
+        if self.config["cache"]:
+            self.cache = SolveCache(cache_dir=self.output_dir / "solve_cache")
+
+    def _make_scenarios(self, spec):
+        from utils.utils import make_scenarios, make_scenarios_battery, make_scenario_grid
+
+        spec = dict(spec)
+        kind = spec.pop("type", "default")
+        if kind == "default":
+            make = make_scenarios_battery if self.mode == "battery" else make_scenarios
+            return make(self.df_data["bus_params"])
+        if kind == "grid":
+            return make_scenario_grid(spec["values"], prefix=spec.get("prefix", "grid"))
+        if kind == "monte_carlo":
+            from utils.scenario_generator import ScenarioGenerator
+            return ScenarioGenerator(self.df_data, **spec)
+        if kind == "explicit":
+            return dict(spec["scenarios"])
+        raise ValueError(f"Unknown scenario type {kind}, use 'default', 'grid', 'monte_carlo' or 'explicit'")
 
     def prepare_data_single_simulation(self, question_name) -> None:
-        """Prepare input data for a single simulation (placeholder method)"""
-        # Prepare input data using DataProcessor for a given simulation configuration and store it as class attributes (e.g. self.data)
-
-    def prepare_data_all_simulations(self) -> None:
-        """Prepare input data for multiple scenarios/sensitivity analysis/questions (placeholder method)"""
-        # Extend data_loader to handle multiple scenarios/questions
-        # Prepare data using data_loader for multiple scenarios/questions
-        
-    def run_single_simulation(self,Args) -> None:
+        """Load the input data of a question and create the scenarios of the config."""
+        from data_ops import DataLoader
+
+        self.question = question_name
+        self.df_data = DataLoader(input_path=str(self.data_dir), question_name=question_name).load_dataset_as_df()
+        self.scenarios = self._make_scenarios(self.config["scenarios"])
+
+    def _pending(self):
+        """Scenarios that still have to be solved, stored results of the others are loaded into self.results."""
+        if not isinstance(self.scenarios, Mapping):
+            return self._pending_lazy()
+        if self.store is None:
+            return list(self.scenarios.items())
+        done = self.store.completed(self.question)
+        pending = []
+        for name, sc in self.scenarios.items():
+            if name in done:
+                self.results[name] = self.store.load(self.question, name)
+            else:
+                pending.append((name, sc))
+        if done:
+            report(f"Resuming {self.question}: {len(self.scenarios) - len(pending)} scenarios already stored, "
+                  f"{len(pending)} to solve")
+        return pending
+
+    def _pending_lazy(self):
+        """Generator version of _pending() for iterables of (name, scenario)."""
+        done = self.store.completed(self.question) if self.store is not None else set()
+        if done:
+            report(f"Resuming {self.question}: {len(done)} scenarios already stored")
+        for name, sc in self.scenarios:
+            if name in done:
+                self.results[name] = self.store.load(self.question, name)
+            else:
+                yield name, sc
+
+    def _record(self, name, res):
+        self.results[name] = res
+        # Error records are not stored, so the scenario is retried when the sweep is resumed
+        if self.store is not None and not (isinstance(res, dict) and res.get("status") == "error"):
+            self.store.append(self.question, name, res)
+
+    def _record_errors(self, pending, exc):
+        """The model could not be built: an error record for every pending scenario."""
+        for name, _ in pending:
+            self._record(name, _error_record(name, exc))
+        return self._finish()
+
+    def _cache_dir(self):
+        # Worker processes only share the on-disk tier of the cache
+        if self.cache is None or self.cache.cache_dir is None:
+            return None
+        return str(self.cache.cache_dir)
+
+    def _finish(self):
+        if self.store is not None:
+            self.store.flush()
+        # Keep the scenario order of self.scenarios (iterables are recorded in their order already)
+        if isinstance(self.scenarios, Mapping):
+            self.results = {name: self.results[name] for name in self.scenarios if name in self.results}
+        return self.results
+
+    def run_single_simulation(self, name, scenario=None, kind="min_energy", default_epsilon=0, solver_params=None):
         """
-        Run a single simulation for a given question and simulation path (placeholder method).
+        Run a single scenario in this process and return its result (or an error record).
 
-        Args (examples):
-            question: The question name for the simulation
-            simulation_path: The path to the simulation data
+        Args:
+            name: Scenario name, looked up in self.scenarios if scenario is not given
+            scenario: Scenario dict with the parameters to change
+            kind: "min_energy" (Q1.a) or "battery" (Q1.c)
+        """
+        scenario = self.scenarios[name] if scenario is None else scenario
+        [(_, _, res)] = _solve_scenario_chunk(self.df_data, kind, [(0, name, scenario)], solver_params, default_epsilon,
+                                              self.cache)
+        self._record(name, res)
+        if self.store is not None:
+            self.store.flush()
+        return res
 
+    def run_all_simulations(self, kind="min_energy", n_workers=None, threads_per_worker=None,
+                            default_epsilon=0, solver_params=None, chunk_size=256):
         """
-        # Initialize Optimization Model for the given question and simulation path
-        # Run the model
-        pass
-    def run_all_simulations(self) -> None:
-        """Run all simulations for the configured scenarios (placeholder method)."""
-        pass
-
-    def run_scenario_analysis(self):
-        results = {}
-        for name, sc in self.scenarios.items():
-            modified_data = deepcopy(self.df_data)
-            bus_df = modified_data["bus_params"]
-
-            # Apply scenario-specific modifications
-            #Modify prices if specified in the scenario
-            if "prices" in sc:
-                bus_df["electricity_prices"] = sc["prices"]
-            
-            #Modify tariffs if specified in the scenario
-            if "import_tariff" in sc:
-                bus_df["import_tariff"] = sc["import_tariff"]
-            if "export_tariff" in sc:
-                bus_df["export_tariff"] = sc["export_tariff"]
-            if "epsilon" in sc:
-                bus_df["epsilon"] = sc["epsilon"]
-
-                
-
-            
-            # Apply scenario modifications to modified_data
-            # e.g., modified_data['some_param'] *= sc['multiplier']
-            model = OptModel(modified_data)
-            res = model.build_and_solve()
-            results[name] = res  
-        self.results = results
-        return results
-       
+        Run all scenarios in a process pool.
 
-    def run_scenario_analysis_battery(self):
-        results = {}
-        for name, sc in self.scenarios.items():
-            modified_data = deepcopy(self.df_data)
-            bus_df = modified_data["bus_params"]
-
-            # Apply scenario-specific modifications
-            #Modify prices if specified in the scenario
-            if "prices" in sc:
-                bus_df["electricity_prices"] = sc["prices"]
-            
-            #Modify tariffs if specified in the scenario
-            if "import_tariff" in sc:
-                bus_df["import_tariff"] = sc["import_tariff"]
-            if "export_tariff" in sc:
-                bus_df["export_tariff"] = sc["export_tariff"]
-
-            #Modify epsilon if specified in the scenario
-            if "epsilon" in sc:
-                bus_df["epsilon"] = sc["epsilon"]
-
-                
-
-            
-            # Apply scenario modifications to modified_data
-            # e.g., modified_data['some_param'] *= sc['multiplier']
-            model = OptModel(modified_data)
-            res = model.build_and_solve_multi_objective()
-            results[name] = res  
-        self.results = results
+        The cores are split between pool workers and Gurobi Threads (see plan_thread_budget). A Threads value
+        in solver_params is kept and the number of workers is planned around it. Every worker builds one
+        parametric model and solves a contiguous chunk of scenarios on it. Results are returned in scenario
+        order, and a failing scenario or worker gives an error record for the affected scenarios.
+        With a store, each chunk is written as soon as it finishes and stored scenarios are skipped.
+
+        A dict of scenarios is split into one chunk per worker. An iterable of scenarios is read lazily in
+        chunks of chunk_size, with at most two chunks per worker in flight.
+        """
+        items = ((idx, name, sc) for idx, (name, sc) in enumerate(self._pending()))
+        if isinstance(self.scenarios, Mapping):
+            items = list(items)
+            if not items:
+                return self._finish()
+            n_tasks = len(items)
+        else:
+            n_tasks = os.cpu_count() or 1
+        solver_params = dict(solver_params or {})
+        if threads_per_worker is None and solver_params.get("Threads"):
+            # Threads set by the caller is kept and the number of workers is planned around it
+            threads_per_worker = int(solver_params["Threads"])
+        n_workers, threads = plan_thread_budget(n_tasks, n_workers, threads_per_worker)
+        solver_params.setdefault("Threads", threads)
+
+        if isinstance(items, list):
+            # Contiguous chunks, one per worker, so each worker builds its model only once
+            size, extra = divmod(len(items), n_workers)
+            chunks, start = [], 0
+            for w in range(n_workers):
+                stop = start + size + (1 if w < extra else 0)
+                if stop > start:
+                    chunks.append(items[start:stop])
+                start = stop
+        else:
+            chunks = _chunked(items, max(1, int(chunk_size)))
+
+        def collect(chunk, future):
+            try:
+                for idx, name, res in future.result():
+                    self._record(name, res)
+            except Exception as exc:
+                # The worker process itself died, e.g. out of memory
+                for idx, name, _ in chunk:
+                    self._record(name, _error_record(name, exc))
+
+        # The workers get the base parameters once (a few kB instead of the input tables), chunks only the
+        # scenario dicts. spawn: Gurobi environments must not be inherited through fork
+        base = ScenarioOverlay(self.df_data).compact()
+        in_flight = deque()
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=mp.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(base,)) as pool:
+            for chunk in chunks:
+                in_flight.append((chunk, pool.submit(_solve_scenario_chunk, None, kind, chunk, solver_params,
+                                                     default_epsilon, self._cache_dir(), self.env_params)))
+                # Collect in submission order, so results keep the scenario order
+                while len(in_flight) > 2 * n_workers:
+                    collect(*in_flight.popleft())
+            while in_flight:
+                collect(*in_flight.popleft())
+
+        return self._finish()
+
+    def run_scenario_analysis(self, solver_params=None):
+        """
+        Solve every scenario of Q1.a on one parametric model that is built once and updated in place.
+        A failing scenario gives an error record, as in run_all_simulations().
+        """
+        pending = self._pending()
+        if isinstance(pending, list) and not pending:
+            return self._finish()
+        try:
+            model = OptModel(self.df_data, solver_params=solver_params)
+            model.build_parametric(mode="min_energy")
+        except Exception as exc:
+            return self._record_errors(pending, exc)
+
+        for name, sc in pending:
+            try:
+                # Only prices, tariffs, bounds and right-hand sides change between scenarios
+                model.update_parameters(sc)
+                res = _solve_cached(model, self.cache)
+            except Exception as exc:
+                res = _error_record(name, exc)
+            self._record(name, res)
+        return self._finish()
+
+    def run_scenario_analysis_battery(self, default_epsilon=0, solver_params=None):
+        """
+        Solve every scenario of Q1.c on one parametric battery model that is built once and updated in place.
+        A failing scenario gives an error record, as in run_all_simulations().
+        """
+        pending = self._pending()
+        if isinstance(pending, list) and not pending:
+            return self._finish()
+        try:
+            model = OptModel(self.df_data, solver_params=solver_params)
+            model.build_parametric(mode="battery", epsilon_discomfort=default_epsilon)
+        except Exception as exc:
+            return self._record_errors(pending, exc)
+
+        for name, sc in pending:
+            try:
+                # Scenarios without an epsilon use the default discomfort limit
+                changes = dict(sc)
+                changes.setdefault("epsilon", default_epsilon)
+                model.update_parameters(changes)
+                res = _solve_cached(model, self.cache)
+            except Exception as exc:
+                res = _error_record(name, exc)
+            self._record(name, res)
+        return self._finish()
+
+    # --- Config-driven batch ---
+    def run(self):
+        """
+        Run the batch of the config in this process (n_workers=1) or a process pool, with one shared Gurobi
+        environment per process, and write output_dir/summary.csv. Returns the results dict.
+        """
+        if self.config is None:
+            raise RuntimeError("run() needs a config, create the Runner with Runner.from_config()")
+        cfg = self.config
+        self.env_params = dict(cfg["env_params"])
+        if is_quiet():
+            self.env_params.setdefault("OutputFlag", 0)
+
+        open_env(self.env_params)
+        try:
+            if cfg["n_workers"] == 1:
+                if self.mode == "battery":
+                    results = self.run_scenario_analysis_battery(cfg["epsilon"], self.solver_params)
+                else:
+                    results = self.run_scenario_analysis(self.solver_params)
+            else:
+                results = self.run_all_simulations(kind=self.mode, n_workers=cfg["n_workers"],
+                                                   threads_per_worker=cfg["threads_per_worker"],
+                                                   default_epsilon=cfg["epsilon"], solver_params=self.solver_params,
+                                                   chunk_size=cfg["chunk_size"])
+        finally:
+            close_env()
+
+        path = self.write_summary()
+        report(f"Solved {len(results)} scenarios of {self.question}, summary in {path}")
+        if self.cache is not None:
+            self.cache.print_stats()
         return results
+
+    def write_summary(self, path=None):
+        """One CSV row per scenario with status, objective and discomfort."""
+        path = Path(path) if path is not None else self.output_dir / "summary.csv"
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["scenario", "status", "obj", "discomfort"])
+            for name, res in self.results.items():
+                if res is None:
+                    writer.writerow([name, "infeasible", "", ""])
+                elif res.get("status") == "error":
+                    writer.writerow([name, "error", "", ""])
+                else:
+                    writer.writerow([name, "optimal", res["obj"], res.get("discomfort", "")])
+        return path
@@ -1 +1,30 @@
-from .utils import load_dataset, save_model_results, plot_data, run_epsilon_constraint, make_scenarios, make_scenarios_battery
\ No newline at end of file
+# Submodules are imported on first use of one of their names (see data_ops/__init__.py)
+_EXPORTS = {
+    "load_dataset": ".utils",
+    "save_model_results": ".utils",
+    "plot_data": ".utils",
+    "run_epsilon_constraint": ".utils",
+    "make_scenarios": ".utils",
+    "make_scenarios_battery": ".utils",
+    "make_scenario_grid": ".utils",
+    "ResultsStore": ".results_store",
+    "SolveCache": ".solve_cache",
+    "canonical_key": ".solve_cache",
+    "ScenarioGenerator": ".scenario_generator",
+    "RepresentativeDays": ".representative_days",
+    "sample_year": ".representative_days",
+}
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,205 @@
+# src/utils/representative_days.py
+"""
+Representative-day aggregation for annual estimates.
+
+The daily price / PV / reference-load profiles of a year are clustered into k representative days
+(weighted k-medoids, see opt_model.reduce_scenarios). Only the k medoid days are solved, and the annual
+cost and discomfort are the day results weighted by the number of days in their cluster:
+
+    rd = RepresentativeDays(df_data, prices=year_prices, pv_max=year_pv)    # (365, 24) arrays
+    rd.cluster(k=8)
+    est = rd.solve(mode="battery", epsilon_discomfort=2)
+    est["annual_cost"], est["annual_discomfort"]
+
+error_report() compares the estimate for several k against solving every day, e.g. on
+sample_year(df_data), a synthetic year built from the daily profiles of the sample data.
+"""
+import time
+
+import numpy as np
+
+from opt_model import OptModel, reduce_scenarios
+from .scenario_generator import ScenarioGenerator
+
+DAY_KEYS = ("energy_price_DKK_per_kWh", "pv_max", "p_ref")
+
+
+def _daily(values, T, name):
+    arr = np.asarray(values, dtype=float)
+    if arr.ndim == 1:
+        if arr.size % T:
+            raise ValueError(f"{name} needs a multiple of {T} values, got {arr.size}")
+        arr = arr.reshape(-1, T)
+    return arr
+
+
+def sample_year(df_data, n_days=365, seed=0, price_sigma=0.15, pv_sigma=0.25):
+    """
+    Synthetic year from the daily profiles of the data (bus_params prices, DER_production PV ratios,
+    usage_preferences reference load): seasonal PV and price levels with correlated daily noise.
+    Returns {"energy_price_DKK_per_kWh", "pv_max", "p_ref"} as (n_days, 24) arrays, "p_ref" only if the
+    question has a reference load.
+    """
+    gen = ScenarioGenerator(df_data, n_samples=n_days, seed=seed, price_sigma=price_sigma, pv_sigma=pv_sigma,
+                            price_level_sigma=0.1, price_pv_correlation=-0.3)
+    days = gen.sample_arrays()
+    season = np.cos(2 * np.pi * (np.arange(n_days) - 172) / 365)[:, None]  # +1 in midsummer, -1 in midwinter
+    year = {
+        "energy_price_DKK_per_kWh": days["energy_price_DKK_per_kWh"] * (1.0 - 0.2 * season),
+        "pv_max": days["pv_max"] * (0.55 + 0.45 * season),
+    }
+    p_ref = OptModel(df_data).get_parameters().get("p_ref")
+    if p_ref is not None:
+        # More load in winter, the daily shape of the preference stays the same
+        year["p_ref"] = np.asarray(p_ref, dtype=float)[None, :] * (1.0 - 0.15 * season)
+    return year
+
+
+class RepresentativeDays:
+    """Clustering of daily profiles into weighted representative days, see the module docstring."""
+
+    def __init__(self, df_data, prices, pv_max, p_ref=None, solver_params=None):
+        """prices / pv_max / p_ref: (days, 24) arrays or series of whole days, p_ref defaults to the data profile."""
+        self.df_data = df_data
+        self.solver_params = solver_params
+        self.base = OptModel(df_data).get_parameters()
+        T = len(self.base["energy_price_DKK_per_kWh"])
+        self.days = {
+            "energy_price_DKK_per_kWh": _daily(prices, T, "prices"),
+            "pv_max": _daily(pv_max, T, "pv_max"),
+        }
+        n_days = len(self.days["energy_price_DKK_per_kWh"])
+        if p_ref is None and self.base.get("p_ref") is not None:
+            p_ref = np.tile(np.asarray(self.base["p_ref"], dtype=float), (n_days, 1))
+        if p_ref is not None:
+            self.days["p_ref"] = _daily(p_ref, T, "p_ref")
+        shapes = {key: arr.shape for key, arr in self.days.items()}
+        if len(set(shapes.values())) > 1:
+            raise ValueError(f"Daily profiles have different shapes: {shapes}")
+        self.n_days = n_days
+        self.medoids = None
+        self.weights = None
+        self.labels = None
+
+    def cluster(self, k=8, seed=0):
+        """Pick k representative days, weights are the number of days each one stands for."""
+        features = np.hstack([self.days[key] for key in DAY_KEYS if key in self.days])
+        medoids, probabilities, labels = reduce_scenarios(features, n_clusters=k, seed=seed)
+        self.medoids = medoids
+        self.weights = probabilities * self.n_days
+        self.labels = labels
+        return self
+
+    def _solve_days(self, days, mode, epsilon_discomfort):
+        """(costs, discomforts) of the given day indices, on one parametric model where possible."""
+        # Only the discomfort modes use p_ref, the others keep one model for all days
+        keys = [key for key in self.days if key != "p_ref" or mode in ("epsilon", "battery")]
+
+        def changes(d):
+            return {key: self.days[key][d] for key in keys}
+
+        model = OptModel(self.df_data, solver_params=self.solver_params)
+        model.build_parametric(mode=mode, epsilon_discomfort=epsilon_discomfort, overrides=changes(days[0]))
+        # p_ref sits in a quadratic constraint in mode "epsilon", there the model is rebuilt for every day
+        in_place = "p_ref" not in keys or "discomfort_balance" in model.constraints
+
+        costs, discomforts = np.zeros(len(days)), np.zeros(len(days))
+        for i, d in enumerate(days):
+            day = changes(d)
+            if in_place:
+                model.update_parameters(day)
+            elif i > 0:
+                # The model of the first day was built above
+                model.build_parametric(mode=mode, epsilon_discomfort=epsilon_discomfort, overrides=day)
+            res = model.solve_parametric()
+            if res is None:
+                raise RuntimeError(f"Day {d} is infeasible in mode {mode}")
+            costs[i] = res["obj"]
+            discomforts[i] = res.get("discomfort", 0.0)
+        return costs, discomforts
+
+    def solve(self, mode="battery", epsilon_discomfort=None, n_check=0, seed=0):
+        """
+        Annual estimate from the representative days (call cluster() first).
+
+        The medoids are central days and miss part of the hour-to-hour spread the models exploit, so the
+        plain estimate tends to be a few percent off. With n_check > 0 that many other days are solved as
+        well: their difference to the medoid of their cluster gives a bias correction ("corrected_cost",
+        "corrected_discomfort") and its standard error ("cost_stderr", "discomfort_stderr").
+        """
+        if self.medoids is None:
+            raise RuntimeError("Call cluster() before solve()")
+        if mode == "battery" and epsilon_discomfort is None:
+            epsilon_discomfort = 0
+        t0 = time.perf_counter()
+        others = np.setdiff1d(np.arange(self.n_days), self.medoids)
+        n_check = min(int(n_check), len(others))
+        checks = np.sort(np.random.default_rng(seed).choice(others, n_check, replace=False))
+        costs, discomforts = self._solve_days(np.concatenate([self.medoids, checks]), mode, epsilon_discomfort)
+        k = len(self.medoids)
+
+        results = {
+            "annual_cost": float(self.weights @ costs[:k]),
+            "annual_discomfort": float(self.weights @ discomforts[:k]),
+            "day_costs": costs[:k],
+            "day_discomforts": discomforts[:k],
+            "medoids": self.medoids,
+            "weights": self.weights,
+            "n_solves": k + n_check,
+        }
+        if n_check:
+            # Stratified estimate: medoids are exact, the other days are sampled without replacement
+            finite = np.sqrt(max(1.0 - n_check / len(others), 0.0)) if n_check > 1 else np.nan
+            for key, values in (("cost", costs), ("discomfort", discomforts)):
+                diff = values[k:] - values[:k][self.labels[checks]]
+                stderr = len(others) * diff.std(ddof=1) / np.sqrt(n_check) * finite if n_check > 1 else np.nan
+                results[f"corrected_{key}"] = results[f"annual_{key}"] + len(others) * float(diff.mean())
+                results[f"{key}_stderr"] = float(stderr)
+            results["check_days"] = checks
+        results["solve_time_s"] = time.perf_counter() - t0
+        return results
+
+    def solve_full(self, mode="battery", epsilon_discomfort=None):
+        """Reference: every day solved."""
+        if mode == "battery" and epsilon_discomfort is None:
+            epsilon_discomfort = 0
+        t0 = time.perf_counter()
+        costs, discomforts = self._solve_days(np.arange(self.n_days), mode, epsilon_discomfort)
+        return {
+            "annual_cost": float(costs.sum()),
+            "annual_discomfort": float(discomforts.sum()),
+            "day_costs": costs,
+            "day_discomforts": discomforts,
+            "n_solves": self.n_days,
+            "solve_time_s": time.perf_counter() - t0,
+        }
+
+    def error_report(self, k_values=(4, 8, 12, 24), mode="battery", epsilon_discomfort=None, n_check=0, seed=0,
+                     full=None):
+        """
+        One row per k: annual estimate, relative errors against the full-year run and speed-up.
+        full is the result of solve_full(), computed if not given.
+        """
+        full = full or self.solve_full(mode, epsilon_discomfort)
+
+        def rel(value, ref):
+            return (value - ref) / max(abs(ref), 1e-9)
+
+        rows = []
+        for k in k_values:
+            t0 = time.perf_counter()
+            self.cluster(k, seed=seed)
+            est = self.solve(mode, epsilon_discomfort, n_check=n_check, seed=seed)
+            elapsed = time.perf_counter() - t0
+            row = {"k": int(k), "n_solves": est["n_solves"]}
+            for key in ("cost", "discomfort"):
+                row[f"annual_{key}"] = est[f"annual_{key}"]
+                row[f"full_{key}"] = full[f"annual_{key}"]
+                row[f"{key}_error"] = rel(est[f"annual_{key}"], full[f"annual_{key}"])
+                if n_check:
+                    row[f"corrected_{key}_error"] = rel(est[f"corrected_{key}"], full[f"annual_{key}"])
+                    row[f"{key}_stderr"] = est[f"{key}_stderr"] / max(abs(full[f"annual_{key}"]), 1e-9)
+            row["time_s"] = elapsed
+            row["speedup"] = full["solve_time_s"] / elapsed if elapsed > 0 else np.inf
+            rows.append(row)
+        return rows
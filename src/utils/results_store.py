@@ -0,0 +1,183 @@
+# src/utils/results_store.py
+"""
+Append-only, columnar store of solved scenarios.
+
+Layout (one directory per partition, one .npy file per column):
+
+    <root>/question=<question>/scenario=<scenario>/
+        meta.json         scalars (obj, discomfort, status, ...) and the column names
+        p_load.npy        time series, one file per variable group
+        duals.npy         constraint duals in model order
+        duals.<block>.npy for results with duals per constraint block (BatchOptModel)
+
+Scenario and question names are sanitised for the file system, a name that changes gets a short hash of the
+raw name appended (scenario=a_b~1f2e3d4c for "a/b"), so different names never share a partition.
+
+A partition is written to a temporary directory first and then renamed, so it is either complete or absent.
+Partitions are never overwritten, which makes a sweep resumable: scenarios that already have a partition are
+skipped (see ResultsStore.completed and Runner). Columns are read back as read-only memmaps.
+"""
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+
+def safe_name(value):
+    """
+    value as a readable file or directory name. Names that had to be changed (or are empty / only dots) get a
+    short hash of the raw name ("~" is never kept by the sanitising), so "a/b" and "a_b" stay different.
+    """
+    raw = str(value)
+    name = "".join(c if c.isalnum() or c in "-_." else "_" for c in raw)
+    if name != raw or not name.strip("."):
+        name += "~" + hashlib.sha1(raw.encode()).hexdigest()[:8]
+    return name
+
+
+def _partition_name(key, value):
+    return f"{key}={safe_name(value)}"
+
+
+def _split_result(result):
+    """Split a results dict into array columns and JSON scalars."""
+    columns, scalars = {}, {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            for sub, sub_value in value.items():
+                columns[f"{key}.{sub}"] = np.asarray(sub_value)
+        elif isinstance(value, (list, tuple, np.ndarray)):
+            columns[key] = np.asarray(value)
+        elif value is None or isinstance(value, (bool, int, float, str)):
+            scalars[key] = value
+        elif isinstance(value, np.generic):
+            scalars[key] = value.item()
+        # Anything else (models, callables) is not persisted
+    return columns, scalars
+
+
+class ResultsStore:
+    """
+    Columnar results store with buffered, append-only writes.
+
+    Example:
+        store = ResultsStore("results", batch_size=50)
+        store.append("question_1a", "Flat_Prices", results)
+        store.flush()
+        store.completed("question_1a")               # {"Flat_Prices"}
+        store.load("question_1a", "Flat_Prices")["p_load"]   # memmap
+    """
+
+    def __init__(self, root, batch_size=20):
+        self.root = Path(root)
+        self.batch_size = max(1, int(batch_size))
+        self._buffer = []
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _partition(self, question, scenario):
+        return self.root / _partition_name("question", question) / _partition_name("scenario", scenario)
+
+    # --- Writing ---
+    def append(self, question, scenario, result):
+        """Buffer one result, the buffer is written every batch_size results (or on flush)."""
+        self._buffer.append((question, scenario, result))
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered results, returns the number of partitions written."""
+        written = 0
+        for question, scenario, result in self._buffer:
+            written += self._write(question, scenario, result)
+        self._buffer = []
+        return written
+
+    def _write(self, question, scenario, result):
+        target = self._partition(question, scenario)
+        if target.exists():
+            # Append-only: a scenario that is already stored is never overwritten
+            return 0
+
+        if result is None:
+            columns, scalars = {}, {"status": "infeasible"}
+        else:
+            columns, scalars = _split_result(result)
+            scalars.setdefault("status", "optimal")
+        scalars.update({"question": str(question), "scenario": str(scenario), "columns": sorted(columns)})
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.parent / f".tmp-{target.name}-{uuid.uuid4().hex}"
+        tmp.mkdir()
+        try:
+            for name, values in columns.items():
+                np.save(tmp / f"{name}.npy", values, allow_pickle=False)
+            # meta.json is written last, a partition without it is incomplete
+            with open(tmp / "meta.json", "w") as f:
+                json.dump(scalars, f, indent=2)
+            os.replace(tmp, target)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            if target.exists():
+                # Another process stored the same scenario first
+                return 0
+            raise
+        return 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    # --- Reading ---
+    def questions(self):
+        return sorted(p.name.split("=", 1)[1] for p in self.root.glob("question=*") if p.is_dir())
+
+    def completed(self, question):
+        """Names of the scenarios of a question that are stored (including buffered ones)."""
+        done = set()
+        for meta in self.root.glob(f"{_partition_name('question', question)}/scenario=*/meta.json"):
+            with open(meta) as f:
+                done.add(json.load(f)["scenario"])
+        done.update(str(s) for q, s, _ in self._buffer if str(q) == str(question))
+        return done
+
+    def load(self, question, scenario, mmap=True):
+        """Stored result as a dict; columns are read-only memmaps unless mmap=False. None for infeasible scenarios."""
+        path = self._partition(question, scenario)
+        with open(path / "meta.json") as f:
+            meta = json.load(f)
+        if meta["status"] == "infeasible":
+            return None
+
+        result = {k: v for k, v in meta.items() if k not in ("question", "scenario", "columns", "status")}
+        for name in meta["columns"]:
+            values = np.load(path / f"{name}.npy", mmap_mode="r" if mmap else None, allow_pickle=False)
+            if "." in name:
+                key, sub = name.split(".", 1)
+                result.setdefault(key, {})[sub] = values
+            else:
+                result[name] = values
+        return result
+
+    def load_question(self, question, mmap=True):
+        return {scenario: self.load(question, scenario, mmap=mmap) for scenario in sorted(self.completed(question))}
+
+    def to_dataframe(self, question, columns=("p_load", "p_import", "p_export", "p_pv")):
+        """Long DataFrame (scenario, hour, column...) of the time series of one question."""
+        import pandas as pd
+
+        frames = []
+        for scenario, result in self.load_question(question).items():
+            if result is None:
+                continue
+            data = {c: np.asarray(result[c]) for c in columns if c in result}
+            if not data:
+                continue
+            n = len(next(iter(data.values())))
+            frames.append(pd.DataFrame({"scenario": scenario, "hour": np.arange(n), **data}))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
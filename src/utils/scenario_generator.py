@@ -0,0 +1,127 @@
+# src/utils/scenario_generator.py
+"""
+Vectorized Monte Carlo scenarios for the Runner.
+
+Samples are drawn in NumPy batches and yielded one by one, so thousands of scenarios never exist as Python
+dicts at the same time:
+
+    gen = ScenarioGenerator(df_data, n_samples=5000, seed=42, price_sigma=0.15, pv_sigma=0.3,
+                            price_pv_correlation=-0.3, epsilon_range=(0, 24))
+    results = Runner(df_data, gen).run_scenario_analysis_battery()
+
+Noise model (per sample, hours t = 0..T-1):
+    price[t] = base_price[t] * exp(level + price_sigma * e_price[t])    level ~ N(0, price_level_sigma^2)
+    pv[t]    = max_power * clip(ratio[t] * (1 + pv_sigma * e_pv[t]), 0, 1)
+where e_price and e_pv are standard normal with AR(1) correlation rho^|t - s| over the hours. PV shares
+the innovations of the price process with weight price_pv_correlation, which is the correlation between
+price and PV at the same hour when both AR(1) coefficients are equal (smaller otherwise). The joint
+factor is built once, every batch is one matrix product.
+
+Every component (noise, price level, each tariff, epsilon) has its own RNG stream spawned from one
+SeedSequence, so the samples do not depend on batch_size (up to rounding) and switching a component on or
+off does not change the others.
+"""
+import numpy as np
+
+from opt_model import OptModel
+
+
+class ScenarioGenerator:
+    """Lazy iterable of (name, scenario) pairs with randomly perturbed prices, PV, tariffs and epsilon."""
+
+    def __init__(self, df_data, n_samples=1000, seed=0, price_sigma=0.1, price_level_sigma=0.0,
+                 price_correlation=0.8, pv_sigma=0.2, pv_correlation=0.8, price_pv_correlation=0.0,
+                 import_tariff_range=None, export_tariff_range=None, epsilon_range=None,
+                 batch_size=1024, prefix="MC"):
+        """
+        Args:
+            price_correlation / pv_correlation: AR(1) coefficient rho of the hourly noise
+            import_tariff_range / export_tariff_range / epsilon_range: (low, high) of uniform draws,
+                None keeps the base value (and leaves epsilon out of the scenarios)
+        """
+        params = OptModel(df_data).get_parameters()
+        self.base_prices = np.asarray(params["energy_price_DKK_per_kWh"], dtype=float)
+        self.T = len(self.base_prices)
+        max_power = df_data["appliance_params"]["DER"][0]["max_power_kW"] if isinstance(df_data, dict) else None
+        if max_power is not None:
+            self.max_power = float(max_power)
+            self.pv_ratio = np.asarray(df_data["DER_production"]["hourly_profile_ratio"].iloc[0], dtype=float)
+        else:
+            # Compiled inputs only hold pv_max, treat it as the full-scale profile
+            pv_max = np.asarray(params["pv_max"], dtype=float)
+            self.max_power = float(pv_max.max()) if pv_max.max() > 0 else 1.0
+            self.pv_ratio = pv_max / self.max_power
+
+        self.n_samples = int(n_samples)
+        self.price_sigma = price_sigma
+        self.price_level_sigma = price_level_sigma
+        self.pv_sigma = pv_sigma
+        self.import_tariff_range = import_tariff_range
+        self.export_tariff_range = export_tariff_range
+        self.epsilon_range = epsilon_range
+        self.batch_size = max(1, int(batch_size))
+        self.prefix = prefix
+        self.seed = seed
+        self._factor = self._noise_factor(price_correlation, pv_correlation, price_pv_correlation)
+
+    def _noise_factor(self, rho_price, rho_pv, cross):
+        """
+        Lower-triangular factor F of the joint (2T, 2T) covariance of the price and PV noise, e = F @ z.
+        Both AR(1) processes are driven by their own innovations and the PV process also by the price
+        innovations (shared innovation): e_pv = L_pv (cross * z_price + sqrt(1 - cross^2) * z_pv). F has a
+        positive diagonal, so the covariance F F^T is positive definite for every |rho| < 1 and |cross| <= 1.
+        """
+        for name, value in (("price_correlation", rho_price), ("pv_correlation", rho_pv)):
+            if not -1.0 < value < 1.0:
+                raise ValueError(f"{name} must be in (-1, 1), got {value}")
+        if not -1.0 <= cross <= 1.0:
+            raise ValueError(f"price_pv_correlation must be in [-1, 1], got {cross}")
+        lags = np.abs(np.subtract.outer(np.arange(self.T), np.arange(self.T)))
+        L_price = np.linalg.cholesky(rho_price ** lags)
+        L_pv = np.linalg.cholesky(rho_pv ** lags)
+        zeros = np.zeros((self.T, self.T))
+        return np.block([[L_price, zeros], [cross * L_pv, np.sqrt(1.0 - cross ** 2) * L_pv]])
+
+    def _streams(self):
+        seq = self.seed if isinstance(self.seed, np.random.SeedSequence) else np.random.SeedSequence(self.seed)
+        return [np.random.default_rng(s) for s in seq.spawn(5)]
+
+    def __len__(self):
+        return self.n_samples
+
+    # --- Sampling ---
+    def batches(self):
+        """Yield dicts of (batch, T) / (batch,) arrays until n_samples are drawn."""
+        noise_rng, import_rng, export_rng, eps_rng, level_rng = self._streams()
+        T = self.T
+        for start in range(0, self.n_samples, self.batch_size):
+            n = min(self.batch_size, self.n_samples - start)
+            e = noise_rng.standard_normal((n, 2 * T)) @ self._factor.T
+            level = self.price_level_sigma * level_rng.standard_normal((n, 1))
+            batch = {
+                "energy_price_DKK_per_kWh": self.base_prices * np.exp(level + self.price_sigma * e[:, :T]),
+                "pv_max": self.max_power * np.clip(self.pv_ratio * (1.0 + self.pv_sigma * e[:, T:]), 0.0, 1.0),
+            }
+            if self.import_tariff_range is not None:
+                batch["import_tariff_DKK/kWh"] = import_rng.uniform(*self.import_tariff_range, size=n)
+            if self.export_tariff_range is not None:
+                batch["export_tariff_DKK/kWh"] = export_rng.uniform(*self.export_tariff_range, size=n)
+            if self.epsilon_range is not None:
+                batch["epsilon"] = eps_rng.uniform(*self.epsilon_range, size=n)
+            yield start, batch
+
+    def sample_arrays(self):
+        """All samples as arrays, e.g. for StochasticOptModel(df_data, prices=..., pv_max=...)."""
+        parts = list(self.batches())
+        return {key: np.concatenate([batch[key] for _, batch in parts]) for key in parts[0][1]}
+
+    def __iter__(self):
+        """Yield (name, scenario dict) lazily, the scenario values are views into the current batch."""
+        width = len(str(max(self.n_samples - 1, 0)))
+        for start, batch in self.batches():
+            for key in batch:
+                batch[key].flags.writeable = False
+            n = len(batch["energy_price_DKK_per_kWh"])
+            for i in range(n):
+                scenario = {key: (values[i] if values.ndim == 2 else float(values[i])) for key, values in batch.items()}
+                yield f"{self.prefix}_{start + i:0{width}d}", scenario
@@ -0,0 +1,203 @@
+# src/utils/solve_cache.py
+"""
+Content-addressed memoization of model solves.
+
+A solve is identified by a SHA-256 over the normalised model parameters (OptModel.get_parameters(), or the
+params of a parametric model after update_parameters()), the mode, epsilon, the discomfort formulation and
+the Gurobi parameters of the model (except the log settings).
+Two inputs that describe the same model get the same key, no matter whether they come from a deepcopy of
+the data with an edited bus_params row or from a scenario applied to a parametric model. The key also holds
+a fingerprint of the model code (model_version), so results of older model code are never returned.
+
+The cache has two tiers:
+    memory: bounded LRU (maxsize entries) in this process
+    disk:   one pickle per key in cache_dir, written atomically, so several processes can share it
+"""
+import copy
+import functools
+import hashlib
+import os
+import pickle
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from opt_model import OptModel
+from instrumentation import report, count
+
+# Bump when the results dicts change, old disk entries are then ignored
+CACHE_VERSION = "1"
+MODEL_DIR = Path(__file__).resolve().parent.parent / "opt_model"
+
+
+def _feed(h, value):
+    """Feed a normalised, type-tagged representation of value into the hash h."""
+    if value is None:
+        h.update(b"N")
+    elif isinstance(value, dict):
+        h.update(b"D%d" % len(value))
+        for key in sorted(value, key=str):
+            _feed(h, str(key))
+            _feed(h, value[key])
+    elif isinstance(value, str):
+        data = value.encode()
+        h.update(b"S%d:" % len(data) + data)
+    elif isinstance(value, (bool, np.bool_)):
+        h.update(b"B1" if value else b"B0")
+    else:
+        # Numbers, lists and arrays are all hashed as float64 arrays; + 0.0 turns -0.0 into 0.0
+        arr = np.ascontiguousarray(np.asarray(value, dtype=np.float64) + 0.0)
+        h.update(b"A" + repr(arr.shape).encode())
+        h.update(arr.tobytes())
+
+
+@functools.lru_cache(maxsize=1)
+def model_version():
+    """Fingerprint of the model code (opt_model/*.py), a change of the models invalidates old disk entries."""
+    h = hashlib.sha256()
+    for path in sorted(MODEL_DIR.glob("*.py")):
+        h.update(path.name.encode())
+        h.update(path.read_bytes())
+    return h.hexdigest()[:16]
+
+
+# Gurobi parameters that only change the log, every other solver parameter is part of the key
+LOG_PARAMS = ("OutputFlag", "LogToConsole", "LogFile", "DisplayInterval")
+
+
+def canonical_key(params, mode, epsilon=None, discomfort_formulation="nonconvex", solver_params=None):
+    """SHA-256 hex key of one solve."""
+    params = dict(params)
+    solver = {name: value for name, value in (solver_params or {}).items() if name not in LOG_PARAMS}
+    params["epsilon"] = epsilon
+    # The formulation only changes the model of mode "epsilon"
+    if mode != "epsilon":
+        discomfort_formulation = None
+    h = hashlib.sha256()
+    _feed(h, {"version": CACHE_VERSION, "model": model_version(), "mode": mode, "formulation": discomfort_formulation,
+              "solver": solver, "params": params})
+    return h.hexdigest()
+
+
+class SolveCache:
+    """
+    LRU + disk cache of results dicts.
+
+    Example:
+        cache = SolveCache(maxsize=256, cache_dir="processed_data/solve_cache")
+        res = cache.solve(df_data, mode="battery", epsilon_discomfort=0)
+        cache.stats()  # {"hits": ..., "memory_hits": ..., "disk_hits": ..., "misses": ..., "hit_rate": ...}
+    """
+
+    def __init__(self, maxsize=128, cache_dir=None):
+        self.maxsize = max(0, int(maxsize))
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    key = staticmethod(canonical_key)
+
+    # --- Tiers ---
+    def _disk_path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.pkl"
+
+    def _remember(self, key, value):
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+    def _lookup(self, key):
+        """(found, value), checks memory first and then disk."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return True, self._memory[key]
+
+        if self.cache_dir is not None:
+            path = self._disk_path(key)
+            try:
+                with open(path, "rb") as f:
+                    value = pickle.load(f)
+            except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+                pass
+            else:
+                self.disk_hits += 1
+                self._remember(key, value)
+                return True, value
+
+        self.misses += 1
+        return False, None
+
+    def _store(self, key, value):
+        self._remember(key, value)
+        if self.cache_dir is None:
+            return
+        path = self._disk_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a unique temporary file and rename, readers never see a partial pickle
+        tmp = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    # --- Public API ---
+    def get_or_solve(self, key, solve):
+        """Cached result for key, or call solve() and cache its result (None for infeasible is cached too)."""
+        found, value = self._lookup(key)
+        count("cache_hits" if found else "cache_misses")
+        if not found:
+            value = solve()
+            self._store(key, value)
+        # Callers get their own copy, so editing a result does not change the cache
+        return copy.deepcopy(value)
+
+    def solve(self, data, mode="min_energy", epsilon_discomfort=None, discomfort_formulation="nonconvex",
+              solver_params=None):
+        """Solve OptModel(data) in the given mode through the cache (parametric model, see solve_parametric())."""
+        model = OptModel(data, solver_params=solver_params)
+        key = canonical_key(model.get_parameters(), mode, epsilon_discomfort, discomfort_formulation,
+                            model.solver_params)
+
+        def run():
+            model.build_parametric(mode=mode, epsilon_discomfort=epsilon_discomfort,
+                                   discomfort_formulation=discomfort_formulation)
+            return model.solve_parametric()
+
+        return self.get_or_solve(key, run)
+
+    def clear(self, disk=False):
+        with self._lock:
+            self._memory.clear()
+        if disk and self.cache_dir is not None:
+            for path in self.cache_dir.glob("*/*.pkl"):
+                path.unlink(missing_ok=True)
+
+    def stats(self):
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        report(f"Solve cache: {s['hits']} hits ({s['memory_hits']} memory, {s['disk_hits']} disk), "
+              f"{s['misses']} misses, hit rate {100 * s['hit_rate']:.1f}%")
@@ -3,17 +3,26 @@
 # src/utils/utils.py
 import json
 import csv
+import itertools
 import numpy as np
-import pandas as pd
 from pathlib import Path
-from opt_model import OptModel
+from .results_store import ResultsStore
+from instrumentation import report, timer
+
+# Binary / large files that load_dataset leaves to the streaming loader
+STREAMED_SUFFIXES = (".npy", ".npz", ".parquet", ".gz", ".bz2", ".xz", ".zip")
+
 
 def load_dataset(base_path: Path, question_name: str):
     """
     Load all JSON or CSV files from the given question directory.
     Returns a dict where keys are filenames (without extension) and values are parsed content.
     """
-    question_path = Path(base_path) / question_name
+    with timer("load", question=question_name):
+        return _load_question_files(Path(base_path) / question_name)
+
+
+def _load_question_files(question_path):
     result = {}
 
     if not question_path.exists():
@@ -23,25 +32,38 @@ def load_dataset(base_path: Path, question_name: str):
         if file_path.is_file():
             stem = file_path.stem
             suffix = file_path.suffix.lower()
+            if suffix in STREAMED_SUFFIXES:
+                # Large series are read lazily through DataLoader.open_timeseries()
+                continue
             try:
                 if suffix == ".json":
                     with open(file_path, "r") as f:
                         result[stem] = json.load(f)
                 elif suffix == ".csv":
+                    import pandas as pd
                     result[stem] = pd.read_csv(file_path)
                 else:
                     with open(file_path, "r") as f:
                         result[stem] = f.read()
             except Exception as e:
-                print(f"Error loading {file_path}: {e}")
+                report(f"Error loading {file_path}: {e}")
 
     return result
 
 
-# example function to save model results in a specified directory
-def save_model_results():
-    """Placeholder for save_model_results function."""
-    pass
+# --- Save model results in a specified directory ---
+def save_model_results(results, question_name, output_dir="results"):
+    """
+    Write a {scenario: results dict} mapping to the columnar ResultsStore in output_dir.
+    Scenarios that are already stored are kept. Returns the store.
+    """
+    store = ResultsStore(output_dir, batch_size=max(1, len(results)))
+    for scenario, res in results.items():
+        if isinstance(res, dict) and res.get("status") == "error":
+            continue
+        store.append(question_name, scenario, res)
+    store.flush()
+    return store
 
 # example function to plot data from a specified directory
 def plot_data():
@@ -50,57 +72,43 @@ def plot_data():
 
 
 # --- Helper Function for Multi-Objective Logic (Q1.ii) ---
-def run_epsilon_constraint(df_data):
-    """Executes the two-phase epsilon-constraint procedure."""
+def run_epsilon_constraint(df_data, num_points=10, direction="descending"):
+    """Executes the two-phase epsilon-constraint procedure on one warm-started model and returns the ParetoFrontier."""
+    from opt_model import ParetoSweep
 
-    # Phase 1: Find Max Discomfort (Epsilon_max)
-    optmodel = OptModel(df_data)
-    epsilon_max = optmodel.build_and_solve_multi_objective(mode="cost_only")
+    # Phase 1: Find Max Discomfort (Epsilon_max), on the same model that is used for the sweep
+    sweep = ParetoSweep(df_data, mode="epsilon")
+    epsilon_max = sweep.find_epsilon_max()
 
     if epsilon_max is None:
-        print("Optimization failed during Phase 1. Cannot proceed.")
+        report("Optimization failed during Phase 1. Cannot proceed.")
         return
+    report(f"Phase 1: Max Discomfort (epsilon_max) found: {epsilon_max:.4f} kW^2/day")
 
-    # Phase 2: Generate Pareto Front
-    num_points = 10  # Number of points to generate on the Pareto front
-    epsilon_min = 0.0  # Assumed minimum discomfort (perfect reference match)
+    # Phase 2: Generate Pareto Front, only the RHS of Epsilon_Constraint changes between points
+    report(f"\n--- Phase 2: Solving {num_points} Epsilon-Constraint Problems ---")
+    frontier = sweep.run(num_points=num_points, epsilon_min=0.0, direction=direction)
 
-    # Create a grid of epsilon values
-    epsilon_values = np.linspace(epsilon_min, epsilon_max, num_points)
-
-    pareto_solutions = []
-
-    print(f"\n--- Phase 2: Solving {num_points} Epsilon-Constraint Problems ---")
-
-    for k, epsilon in enumerate(epsilon_values):
-        print(f"  Solving for Epsilon[{k + 1}/{num_points}] = {epsilon:.4f}")
-
-        # Instantiate a new model for each run to ensure clean optimization
-        current_model = OptModel(df_data)
+    # Results Summary
+    report("\n-------------------------------------------------------------")
+    report("      Pareto Frontier Results (Discomfort vs. Cost)      ")
+    report("-------------------------------------------------------------")
+    report("Target $\\epsilon$ | Actual Discomfort | Min Cost (DKK)")
+    report("-------------------------------------------------------------")
+    for sol in sorted(frontier.points, key=lambda p: p.epsilon_target):
+        report(f"{sol.epsilon_target:^11.4f} | {sol.discomfort:^17.4f} | {sol.cost:^13.4f}")
+    report("-------------------------------------------------------------")
 
-        result = current_model.build_and_solve_multi_objective(
-            mode="epsilon",
-            epsilon_discomfort=epsilon
-        )
+    return frontier
 
-        if result:
-            actual_discomfort, min_cost, _ = result
-            pareto_solutions.append({
-                'epsilon_target': epsilon,
-                'actual_discomfort': actual_discomfort,
-                'min_cost': min_cost
-            })
 
-    # Results Summary
-    print("\n-------------------------------------------------------------")
-    print("      Pareto Frontier Results (Discomfort vs. Cost)      ")
-    print("-------------------------------------------------------------")
-    print("Target $\epsilon$ | Actual Discomfort | Min Cost (DKK)")
-    print("-------------------------------------------------------------")
-    for sol in pareto_solutions:
-        print(f"{sol['epsilon_target']:^11.4f} | {sol['actual_discomfort']:^17.4f} | {sol['min_cost']:^13.4f}")
-    print("-------------------------------------------------------------")
 
+def make_scenario_grid(grid, prefix="grid"):
+    """Full factorial scenarios from {parameter: [values]}, e.g. {"export_tariff_DKK/kWh": [0.1, 0.4], "epsilon": [0, 5]}."""
+    keys = list(grid)
+    combos = list(itertools.product(*(grid[key] for key in keys)))
+    width = len(str(max(len(combos) - 1, 0)))
+    return {f"{prefix}_{i:0{width}d}": dict(zip(keys, values)) for i, values in enumerate(combos)}
 
 
 def make_scenarios(bus_df):
@@ -0,0 +1,6 @@
+# tests/conftest.py
+import sys
+from pathlib import Path
+
+# The packages live in src/ and are imported as top-level packages (as when running from src/)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,23 @@
+# tests/test_discomfort_formulations.py
+from pathlib import Path
+
+import pytest
+
+from data_ops import DataLoader
+from opt_model import OptModel
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+@pytest.mark.parametrize("epsilon", [2.0, 10.0, 25.0])
+def test_pwl_keeps_the_discomfort_limit(epsilon):
+    df_data = DataLoader(input_path=str(DATA_DIR), question_name="question_1b").load_dataset_as_df()
+    results = {}
+    for formulation in ("qcp", "pwl"):
+        model = OptModel(df_data, solver_params={"OutputFlag": 0})
+        model.build_parametric(mode="epsilon", epsilon_discomfort=epsilon, discomfort_formulation=formulation)
+        results[formulation] = model.solve_parametric()
+
+    # The secant approximation is conservative: true squared deviation within epsilon, cost not below the exact one
+    assert results["pwl"]["discomfort"] <= epsilon + 1e-6
+    assert results["pwl"]["obj"] >= results["qcp"]["obj"] - 1e-6
@@ -0,0 +1,56 @@
+# tests/test_scenario_overlay.py
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from data_ops import DataLoader, ScenarioOverlay
+from opt_model import OptModel
+from instrumentation import set_quiet
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+@pytest.fixture(autouse=True)
+def quiet():
+    set_quiet(True)
+    yield
+    set_quiet(False)
+
+
+def load(question):
+    return DataLoader(input_path=str(DATA_DIR), question_name=question).load_dataset_as_df()
+
+
+def test_non_bus_key_changes_the_solved_result():
+    df_data = load("question_1a")
+    base = ScenarioOverlay(df_data)
+    pv_max = np.asarray(base.as_params()["pv_max"])
+
+    base_res = OptModel(base).build_and_solve()
+    no_pv_res = OptModel(base.with_patch(pv_max=np.zeros_like(pv_max))).build_and_solve()
+
+    assert max(no_pv_res["p_pv"]) == 0.0
+    assert no_pv_res["obj"] > base_res["obj"] + 1e-6
+
+
+def test_tables_match_the_patched_parameters():
+    df_data = load("question_1c")
+    params = OptModel(df_data).get_parameters()
+    patch = {"pv_max": 0.5 * np.asarray(params["pv_max"]), "p_ref": 0.8 * np.asarray(params["p_ref"]),
+             "import_tariff_DKK/kWh": 0.9}
+    overlay = ScenarioOverlay(df_data, patch)
+
+    tables = {name: overlay[name] for name in overlay}
+    from_tables = OptModel(tables).get_parameters()
+    for key, value in patch.items():
+        assert np.allclose(from_tables[key], value)
+    # The base tables are not changed
+    assert np.allclose(OptModel(df_data).get_parameters()["pv_max"], params["pv_max"])
+
+
+def test_patch_without_table_raises():
+    overlay = ScenarioOverlay(load("question_1c"), {"epsilon": 5})
+    assert overlay.as_params()["epsilon"] == 5
+    with pytest.raises(KeyError, match="epsilon"):
+        overlay["bus_params"]